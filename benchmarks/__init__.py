@@ -0,0 +1,8 @@
+'''Benchmark suite for img2txt.
+
+Run from the root of the repository with ``python -m benchmarks``; see ``python -m benchmarks --help``.
+Every image is generated from a fixed seed, so results of different commits can be compared with
+``python -m benchmarks compare``.
+
+:author: Willow Ciesialka
+'''
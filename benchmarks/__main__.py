@@ -0,0 +1,155 @@
+'''Command line interface of the benchmark suite.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import PIL
+import img2txt
+from img2txt.conversion import ConversionOptions
+from img2txt.methods import COLOR_METHODS
+from benchmarks.images import IMAGE_KINDS, SIZES
+from benchmarks.load import load
+from benchmarks.startup import DEFAULT_BUDGET_MS, check_startup
+from benchmarks.suites import SUITES
+
+def environment() -> Dict[str, Any]:
+    '''Describe the machine and versions a run was made with.'''
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "img2txt": img2txt.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "numpy": numpy_version,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+
+def run(args: argparse.Namespace) -> int:
+    pattern = re.compile(args.filter) if args.filter else None
+    results = []
+    for suite in args.suites:
+        for result in SUITES[suite](args.sizes, args.repeat):
+            if pattern is not None and not pattern.search(result.key):
+                continue
+            results.append(result.to_json())
+            print(f"{result.key:<60} best {result.best * 1000:10.2f} ms  median {result.median * 1000:10.2f} ms", file=sys.stderr)
+    report = {"environment": environment(), "repeat": args.repeat, "results": results}
+    json.dump(report, args.output, indent=2)
+    args.output.write("\n")
+    return 0
+
+def compare(args: argparse.Namespace) -> int:
+    base = {result["key"]: result for result in json.load(args.base)["results"]}
+    new = {result["key"]: result for result in json.load(args.new)["results"]}
+    regressions = 0
+    for key in [key for key in base if key in new]:
+        ratio = new[key]["best"] / base[key]["best"] if base[key]["best"] > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  slower"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  faster"
+        print(f"{key:<60} {base[key]['best'] * 1000:10.2f} ms -> {new[key]['best'] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    for key in sorted(base.keys() - new.keys()):
+        print(f"{key:<60} only in {args.base.name}")
+    for key in sorted(new.keys() - base.keys()):
+        print(f"{key:<60} only in {args.new.name}")
+    return 1 if regressions else 0
+
+def load_test(args: argparse.Namespace) -> int:
+    options = ConversionOptions(color=args.color, limit=args.limit)
+    report = load(args.kind, args.size, options, requests=args.requests, concurrency=args.concurrency, jobs=args.jobs, backlog=args.backlog, cold=args.cold)
+    for name in ("served", "cold"):
+        if name in report:
+            summary = report[name]
+            print(f"{name:<7} p50 {summary['p50_ms']:9.2f} ms  p90 {summary['p90_ms']:9.2f} ms  p99 {summary['p99_ms']:9.2f} ms  max {summary['max_ms']:9.2f} ms  {summary['requests_per_second']:8.2f} requests/sec", file=sys.stderr)
+    served = report["served"]
+    print(f"answered {served['answered']}, refused {served['refused']}, failed {served['failed']}", file=sys.stderr)
+    report["environment"] = environment()
+    json.dump(report, args.output, indent=2)
+    args.output.write("\n")
+    return 0
+
+def startup(args: argparse.Namespace) -> int:
+    result = check_startup(budget_ms=args.budget, repeat=args.repeat)
+    print(f"import img2txt.__main__: best {result.best_ms:.2f} ms, budget {result.budget_ms:.2f} ms", file=sys.stderr)
+    for name in result.imported_deferred:
+        print(f"imported at startup: {name}", file=sys.stderr)
+    return 0 if result.passed else 1
+
+def main(argv: List[str] | None = None) -> int:
+    argparser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark img2txt.")
+    subparsers = argparser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and write the results as JSON.")
+    run_parser.add_argument("--suites", action="store", type=lambda value: value.split(","), default=list(SUITES), help=f"Comma separated suites to run, from {', '.join(SUITES)}. Default is all.")
+    run_parser.add_argument("--sizes", action="store", type=lambda value: value.split(","), default=["small"], help=f"Comma separated image sizes, from {', '.join(SIZES)}. Default is small.")
+    run_parser.add_argument("--repeat", '-r', action="store", type=int, default=3, help="Number of times every benchmark is timed.")
+    run_parser.add_argument("--filter", '-k', action="store", default=None, help="Only keep benchmarks whose key matches this regular expression.")
+    run_parser.add_argument("--output", '-o', action="store", type=argparse.FileType("w", encoding="utf-8"), default="-", help="Output file.")
+    run_parser.set_defaults(function=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare the best times of two runs.")
+    compare_parser.add_argument("--threshold", action="store", type=float, default=0.1, help="Relative change reported as faster or slower. Default is 0.1.")
+    compare_parser.add_argument("base", action="store", type=argparse.FileType("r", encoding="utf-8"))
+    compare_parser.add_argument("new", action="store", type=argparse.FileType("r", encoding="utf-8"))
+    compare_parser.set_defaults(function=compare)
+
+    load_parser = subparsers.add_parser("load", help="Put \"img2txt serve\" under load and report latency percentiles.")
+    load_parser.add_argument("--kind", action="store", choices=IMAGE_KINDS.keys(), default="photo", help="Kind of image sent. Default is photo.")
+    load_parser.add_argument("--size", action="store", choices=SIZES.keys(), default="small", help="Size of image sent. Default is small.")
+    load_parser.add_argument("--color", '-c', action="store", choices=COLOR_METHODS.keys(), default="truecoloransi", help="Color method requested. Default is truecoloransi.")
+    load_parser.add_argument("--limit", '-l', action="store", type=int, default=None, help="Character limit requested.")
+    load_parser.add_argument("--requests", '-n', action="store", type=int, default=200, help="Number of requests sent. Default is 200.")
+    load_parser.add_argument("--concurrency", action="store", type=int, default=4, help="Number of clients sending at once. Default is 4.")
+    load_parser.add_argument("--jobs", '-j', action="store", type=int, default=1, help="Jobs of the server. Default is 1.")
+    load_parser.add_argument("--backlog", '-b', action="store", type=int, default=16, help="Backlog of the server. Default is 16.")
+    load_parser.add_argument("--cold", action="store", type=int, default=0, help="Also time this many conversions that each start the command line.")
+    load_parser.add_argument("--output", '-o', action="store", type=argparse.FileType("w", encoding="utf-8"), default="-", help="Output file.")
+    load_parser.set_defaults(function=load_test)
+
+    startup_parser = subparsers.add_parser("startup", help="Check the startup time of the command line against a budget.")
+    startup_parser.add_argument("--budget", action="store", type=float, default=DEFAULT_BUDGET_MS, help=f"Milliseconds the import of the command line may take. Default is {DEFAULT_BUDGET_MS}.")
+    startup_parser.add_argument("--repeat", '-r', action="store", type=int, default=5, help="Number of fresh interpreters timed; the best time is kept. Default is 5.")
+    startup_parser.set_defaults(function=startup)
+
+    args = argparser.parse_args(argv)
+    if args.command == "run":
+        for suite in args.suites:
+            if suite not in SUITES:
+                argparser.error(f"unknown suite {suite}.")
+        for size in args.sizes:
+            if size not in SIZES:
+                argparser.error(f"unknown size {size}.")
+        if args.repeat <= 0:
+            argparser.error("--repeat must be > 0.")
+    if args.command == "startup" and args.repeat <= 0:
+        argparser.error("--repeat must be > 0.")
+    if args.command == "load":
+        if args.requests <= 0 or args.concurrency <= 0:
+            argparser.error("--requests and --concurrency must be > 0.")
+    return args.function(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
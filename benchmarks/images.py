@@ -0,0 +1,78 @@
+'''Module containing deterministic synthetic images to benchmark with.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from random import Random
+from typing import Callable, Dict, Tuple
+import PIL.Image as Image
+from PIL import ImageDraw, ImageFilter
+
+SEED: int = 20240108
+
+SIZES: Dict[str, Tuple[int, int]] = {}
+SIZES["small"] = (160, 120)
+SIZES["medium"] = (640, 480)
+SIZES["large"] = (1920, 1080)
+SIZES["4k"] = (3840, 2160)
+
+def gradient(size: Tuple[int, int]) -> Image.Image:
+    '''Horizontal hue gradient fading to black from top to bottom.'''
+    width, height = size
+    hue = Image.linear_gradient("L").rotate(90).resize(size)
+    value = Image.linear_gradient("L").transpose(Image.FLIP_TOP_BOTTOM).resize(size)
+    saturation = Image.new("L", size, 255)
+    return Image.merge("HSV", (hue, saturation, value)).convert("RGB")
+
+def noise(size: Tuple[int, int]) -> Image.Image:
+    '''Uniform random noise in every channel.'''
+    width, height = size
+    return Image.frombytes("RGB", size, Random(SEED).randbytes(width * height * 3))
+
+def photo(size: Tuple[int, int]) -> Image.Image:
+    '''Photo-like image: smooth regions, hard edges and fine texture.'''
+    width, height = size
+    random = Random(SEED)
+    image = gradient(size)
+    draw = ImageDraw.Draw(image)
+    for _ in range(24):
+        x, y = random.randrange(width), random.randrange(height)
+        radius = random.randrange(max(2, width // 16), max(3, width // 4))
+        color = (random.randrange(256), random.randrange(256), random.randrange(256))
+        if random.random() < 0.5:
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+        else:
+            draw.rectangle((x - radius, y - radius // 2, x + radius, y + radius // 2), fill=color)
+    image = image.filter(ImageFilter.GaussianBlur(max(1, width // 200)))
+    texture = noise(size).filter(ImageFilter.GaussianBlur(1))
+    return Image.blend(image, texture, 0.15)
+
+def alpha(size: Tuple[int, int]) -> Image.Image:
+    '''Photo-like image where most pixels are transparent or partly transparent.'''
+    image = photo(size).convert("RGBA")
+    width, height = size
+    mask = Image.linear_gradient("L").resize(size)
+    draw = ImageDraw.Draw(mask)
+    for i in range(0, width, max(4, width // 20)):
+        draw.line((i, 0, i, height), fill=0, width=max(1, width // 80))
+    image.putalpha(mask)
+    return image
+
+IMAGE_KINDS: Dict[str, Callable[[Tuple[int, int]], Image.Image]] = {}
+IMAGE_KINDS["gradient"] = gradient
+IMAGE_KINDS["noise"] = noise
+IMAGE_KINDS["photo"] = photo
+IMAGE_KINDS["alpha"] = alpha
+
+def make_image(kind: str, size: str) -> Image.Image:
+    '''Return a synthetic image in RGBA mode.
+
+    :param kind: Kind of image, as found in IMAGE_KINDS.
+    :type kind: str
+    :param size: Size of image, as found in SIZES.
+    :type size: str
+    :return: Generated image.
+    :rtype: Image.Image
+    '''
+    return IMAGE_KINDS[kind](SIZES[size]).convert("RGBA")
@@ -0,0 +1,155 @@
+'''Module containing a load generator for ``img2txt serve``.
+
+A server is started in its own process on a temporary Unix socket, and client threads, each with
+its own connection, send it the same image as fast as it answers. The latency of every request is
+recorded from the time it is sent to the time its text has been read. For comparison, the same
+image can be converted by starting the command line once per image.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from math import ceil
+from time import perf_counter, sleep
+from typing import Any, Dict, List
+from img2txt.conversion import ConversionOptions
+from img2txt.server import ServerError, connect, request_conversion
+from benchmarks.images import make_image
+
+# Seconds to wait for the server to start.
+START_TIMEOUT: float = 30.0
+
+def percentile(values: List[float], percent: float) -> float:
+    '''Return the nearest-rank percentile of values.'''
+    ordered = sorted(values)
+    return ordered[max(0, ceil(percent / 100 * len(ordered)) - 1)]
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    '''Return the percentiles of latencies, in milliseconds.'''
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000
+    }
+
+def encode_image(kind: str, size: str) -> bytes:
+    '''Return a synthetic image encoded as PNG.'''
+    encoded = io.BytesIO()
+    make_image(kind, size).save(encoded, "PNG")
+    return encoded.getvalue()
+
+def start_server(socket_path: str, *, jobs: int, backlog: int) -> subprocess.Popen:
+    '''Start ``img2txt serve`` on a Unix socket and wait until it answers.'''
+    process = subprocess.Popen([sys.executable, "-m", "img2txt", "serve", "--socket", socket_path, "--jobs", str(jobs), "--backlog", str(backlog), "--quiet"], stderr=subprocess.DEVNULL)
+    deadline = perf_counter() + START_TIMEOUT
+    while perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}.")
+        if os.path.exists(socket_path):
+            connection = connect(socket_path=socket_path)
+            try:
+                connection.request("GET", "/stats")
+                connection.getresponse().read()
+                return process
+            except OSError:
+                pass
+            finally:
+                connection.close()
+        sleep(0.05)
+    process.terminate()
+    raise RuntimeError("server did not start in time.")
+
+def run_load(socket_path: str, data: bytes, options: ConversionOptions, *, requests: int, concurrency: int) -> Dict[str, Any]:
+    '''Send requests from several client threads and time them. Refused requests are not retried.
+
+    :return: Dict with the latencies of the answered requests, the number refused and failed,\
+         and the seconds taken by the whole run.
+    :rtype: Dict[str, Any]
+    '''
+    latencies: List[float] = []
+    counts = {"refused": 0, "failed": 0}
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def client():
+        connection = connect(socket_path=socket_path)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = perf_counter()
+                try:
+                    request_conversion(connection, data, options)
+                except ServerError as e:
+                    with lock:
+                        counts["refused" if e.status == 503 else "failed"] += 1
+                    continue
+                elapsed = perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"latencies": latencies, "seconds": perf_counter() - start, **counts}
+
+def cold_latencies(data: bytes, options: ConversionOptions, *, count: int) -> List[float]:
+    '''Time converting an image by starting the command line once per image.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "image.png")
+        with open(path, "wb") as image_file:
+            image_file.write(data)
+        command = [sys.executable, "-m", "img2txt", "--method", options.method, "--tolerance", str(options.tolerance), "--color", options.color, "--resample", options.resample, "--reduction", options.reduction, "--output", os.devnull]
+        if options.invert:
+            command.append("--invert")
+        if options.coalesce:
+            command.append("--coalesce")
+        if options.limit is not None:
+            command += ["--limit", str(options.limit)]
+        latencies = []
+        for _ in range(count):
+            start = perf_counter()
+            subprocess.run(command + [path], check=True)
+            latencies.append(perf_counter() - start)
+    return latencies
+
+def load(kind: str, size: str, options: ConversionOptions, *, requests: int, concurrency: int, jobs: int, backlog: int, cold: int) -> Dict[str, Any]:
+    '''Start a server, put it under load, and report latency percentiles and throughput.'''
+    data = encode_image(kind, size)
+    report: Dict[str, Any] = {
+        "kind": kind, "size": size, "options": options._asdict(),
+        "requests": requests, "concurrency": concurrency, "jobs": jobs, "backlog": backlog
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "img2txt.sock")
+        process = start_server(socket_path, jobs=jobs, backlog=backlog)
+        try:
+            result = run_load(socket_path, data, options, requests=requests, concurrency=concurrency)
+        finally:
+            process.terminate()
+            process.wait()
+    report["served"] = summarize(result["latencies"])
+    report["served"]["answered"] = len(result["latencies"])
+    report["served"]["refused"] = result["refused"]
+    report["served"]["failed"] = result["failed"]
+    report["served"]["requests_per_second"] = len(result["latencies"]) / result["seconds"]
+    if cold > 0:
+        latencies = cold_latencies(data, options, count=cold)
+        report["cold"] = summarize(latencies)
+        report["cold"]["requests_per_second"] = len(latencies) / sum(latencies)
+    return report
@@ -0,0 +1,69 @@
+'''Module containing the startup time check of the command line.
+
+``python -X importtime`` reports how long every module took to import. The import of
+``img2txt.__main__``, which is all that ``img2txt --help`` and argument errors wait for, is timed
+in fresh interpreters and held to a budget, and the modules it must leave for later, such as
+Pillow, are checked not to be imported at all.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+MODULE: str = "img2txt.__main__"
+# Milliseconds the import may take, with room for slow and busy machines.
+DEFAULT_BUDGET_MS: float = 75.0
+# Modules only needed once an image is opened, or by subcommands.
+DEFERRED_MODULES: List[str] = ["PIL", "numpy", "multiprocessing", "concurrent.futures", "http", "tracemalloc", "importlib.resources", "hashlib", "tempfile", "img2txt.server", "img2txt.batch", "img2txt.animation"]
+
+class StartupResult(NamedTuple):
+    '''Outcome of the startup check.'''
+    best_ms: float
+    budget_ms: float
+    imported_deferred: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return self.best_ms <= self.budget_ms and not self.imported_deferred
+
+def import_times(module: str = MODULE) -> Dict[str, float]:
+    '''Import a module in a fresh interpreter and return the cumulative import time of every
+    module it imported, in milliseconds. The interpreter imports the same img2txt as this process.'''
+    import img2txt
+    environment = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(img2txt.__file__)))
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [root, environment.get("PYTHONPATH")]))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True, env=environment)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+def check_startup(*, budget_ms: float = DEFAULT_BUDGET_MS, repeat: int = 5) -> StartupResult:
+    '''Time the import of the command line and check which modules it imports.
+
+    :param budget_ms: Milliseconds the import may take. Default is DEFAULT_BUDGET_MS.
+    :type budget_ms: float
+    :param repeat: Number of fresh interpreters to time; the best time is kept. The first run\
+         also writes the bytecode caches, so repeat should be at least 2.
+    :type repeat: int
+    :return: Best import time and the deferred modules that were imported.
+    :rtype: StartupResult
+    '''
+    best = None
+    imported = set()
+    for _ in range(repeat):
+        times = import_times()
+        imported.update(times)
+        if best is None or times[MODULE] < best:
+            best = times[MODULE]
+    deferred = [prefix for prefix in DEFERRED_MODULES if any(name == prefix or name.startswith(prefix + ".") for name in imported)]
+    return StartupResult(best, budget_ms, deferred)
@@ -0,0 +1,176 @@
+'''Module containing the benchmark suites.
+
+Every suite is a generator of Results. Caches that persist between conversions, such as the color
+difference cache, are cleared before every timed call, so that every call does the same work; the
+palette tables are loaded once, before timing, as they would be by a long-running process.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import io
+import os
+import tempfile
+from random import Random
+from typing import Callable, Dict, Iterator, List
+import PIL.Image as Image
+from img2txt.characters.brailleimage import BrailleImage
+from img2txt.colors import colordifference, quantization
+from img2txt.conversion import ConversionOptions, fit_to_limit, load_image, write_document
+from img2txt.methods import THRESHOLD_METHODS, COLOR_METHODS, REDUCTION_METHODS
+from img2txt.resultcache import CachedResult, ResultCache, file_digest, result_key
+from benchmarks.images import IMAGE_KINDS, SEED, make_image
+from benchmarks.timing import Result, measure
+
+# The pure-Python from_image is only timed on images up to this many pixels.
+SLOW_PATH_MAX_PIXELS: int = 160 * 120
+# Number of colors of every micro-benchmark.
+MICRO_SAMPLES: int = 2000
+
+def reset_caches():
+    '''Empty the caches that would otherwise make repeated calls cheaper.'''
+    colordifference.difference_lookup.clear(reset_stats=True)
+
+def warm_palettes():
+    '''Load every palette table, as the first conversion of a process would.'''
+    for name in quantization.palettes():
+        quantization.get_table(name)
+
+def stages(sizes: List[str], repeat: int) -> Iterator[Result]:
+    '''Time every stage of a conversion separately: decode, resize, RGBA conversion, from_image,
+    get_colored_text and write.'''
+    method = THRESHOLD_METHODS["luminance"]
+    formatter = COLOR_METHODS["truecoloransi"]()
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in IMAGE_KINDS:
+            for size in sizes:
+                image = make_image(kind, size)
+                params = {"kind": kind, "size": size}
+                encoded = io.BytesIO()
+                image.save(encoded, "PNG")
+                encoded = encoded.getvalue()
+                yield Result("stages", "decode", params, measure(lambda: Image.open(io.BytesIO(encoded)).load(), repeat=repeat))
+
+                limit = image.size[0] * image.size[1] // 32
+                yield Result("stages", "resize", params, measure(lambda: fit_to_limit(image.convert("RGB"), limit), repeat=repeat))
+                rgb = image.convert("RGB")
+                yield Result("stages", "convert", params, measure(lambda: rgb.convert("RGBA"), repeat=repeat))
+
+                if image.size[0] * image.size[1] <= SLOW_PATH_MAX_PIXELS:
+                    yield Result("stages", "from_image", params, measure(lambda: BrailleImage.from_image(image, method), repeat=repeat))
+                yield Result("stages", "from_image_fast", params, measure(lambda: BrailleImage.from_image_fast(image, method), repeat=repeat))
+
+                braille = BrailleImage.from_image_fast(image, method)
+                yield Result("stages", "get_colored_text", params, measure(lambda: braille.get_colored_text(formatter), repeat=repeat, setup=reset_caches))
+
+                lines = list(braille.iter_colored_lines(formatter))
+                path = os.path.join(directory, "output.txt")
+                def write():
+                    with open(path, "w", encoding="utf-8") as output:
+                        write_document(output, formatter, lines)
+                yield Result("stages", "write", params, measure(write, repeat=repeat))
+
+def matrix(sizes: List[str], repeat: int) -> Iterator[Result]:
+    '''Time from_image_fast and get_colored_text for every threshold method and color method.'''
+    warm_palettes()
+    for kind in IMAGE_KINDS:
+        for size in sizes:
+            image = make_image(kind, size)
+            for method_name, method in THRESHOLD_METHODS.items():
+                for color_name, formatter_type in COLOR_METHODS.items():
+                    def convert():
+                        BrailleImage.from_image_fast(image, method).get_colored_text(formatter_type())
+                    params = {"kind": kind, "size": size, "method": method_name, "color": color_name}
+                    yield Result("matrix", "convert", params, measure(convert, repeat=repeat, setup=reset_caches))
+
+def _random_colors(count: int) -> List[tuple]:
+    random = Random(SEED)
+    return [(random.randrange(256), random.randrange(256), random.randrange(256)) for _ in range(count)]
+
+def micro(sizes: List[str], repeat: int) -> Iterator[Result]:
+    '''Time the color difference functions and the nearest color searches, per palette.'''
+    warm_palettes()
+    colors = _random_colors(MICRO_SAMPLES)
+    pairs = list(zip(colors, reversed(colors)))
+    labs = [(colordifference.rgb_to_lab(a), colordifference.rgb_to_lab(b)) for a, b in pairs]
+    params = {"samples": MICRO_SAMPLES}
+
+    def ciede2000():
+        for lab_1, lab_2 in labs:
+            colordifference.ciede2000(lab_1, lab_2)
+    yield Result("micro", "ciede2000", params, measure(ciede2000, repeat=repeat))
+
+    def color_difference():
+        for rgb_1, rgb_2 in pairs:
+            colordifference.color_difference(rgb_1, rgb_2)
+    yield Result("micro", "color_difference_cold", params, measure(color_difference, repeat=repeat, setup=reset_caches))
+    yield Result("micro", "color_difference_warm", params, measure(color_difference, repeat=repeat, setup=color_difference))
+
+    for name, (keys, population) in quantization.palettes().items():
+        # The linear search is slow on large palettes, so it is timed on fewer colors.
+        sample = colors[:MICRO_SAMPLES // max(1, len(population) // 16)]
+        def linear(sample=sample, population=population):
+            for rgb in sample:
+                colordifference.find_nearest_color_neighbor(rgb, population)
+        def table(sample=sample, name=name):
+            for rgb in sample:
+                quantization.nearest(name, rgb)
+        palette_params = {"palette": name, "samples": len(sample)}
+        yield Result("micro", "find_nearest_color_neighbor", palette_params, measure(linear, repeat=repeat, setup=reset_caches))
+        yield Result("micro", "quantization.nearest", palette_params, measure(table, repeat=repeat, setup=reset_caches))
+
+def threshold(sizes: List[str], repeat: int) -> Iterator[Result]:
+    '''Time from_image_fast for every threshold method, including the dithering methods.'''
+    for kind in ("gradient", "photo"):
+        for size in sizes:
+            image = make_image(kind, size)
+            for name, method in THRESHOLD_METHODS.items():
+                params = {"kind": kind, "size": size, "method": name}
+                yield Result("threshold", "from_image_fast", params, measure(lambda: BrailleImage.from_image_fast(image, method), repeat=repeat))
+
+def reduction(sizes: List[str], repeat: int) -> Iterator[Result]:
+    '''Time the color of every character, per reduction, with NumPy when it is installed.'''
+    method = THRESHOLD_METHODS["luminance"]
+    for kind in IMAGE_KINDS:
+        for size in sizes:
+            braille = BrailleImage.from_image_fast(make_image(kind, size), method)
+            for name, cell_reduction in REDUCTION_METHODS.items():
+                params = {"kind": kind, "size": size, "reduction": name}
+                yield Result("reduction", "cell_colors", params, measure(lambda: braille.cell_colors(cell_reduction), repeat=repeat))
+
+def cache(sizes: List[str], repeat: int) -> Iterator[Result]:
+    '''Time answering from a ResultCache, hashing the image file included, against converting
+    the image file from scratch.'''
+    options = ConversionOptions(color="8bitansi")
+    method = options.threshold_method()
+    with tempfile.TemporaryDirectory() as directory:
+        results = ResultCache(directory)
+        for kind in IMAGE_KINDS:
+            for size in sizes:
+                encoded = io.BytesIO()
+                make_image(kind, size).save(encoded, "PNG")
+                params = {"kind": kind, "size": size}
+                def convert():
+                    encoded.seek(0)
+                    braille = BrailleImage.from_image_fast(load_image(encoded), method)
+                    formatter = options.formatter()
+                    output = io.StringIO(newline="")
+                    write_document(output, formatter, braille.iter_colored_lines(formatter))
+                    return output.getvalue()
+                yield Result("cache", "convert", params, measure(convert, repeat=repeat, setup=reset_caches))
+
+                encoded.seek(0)
+                key = result_key(file_digest(encoded)[0], options)
+                results.put(key, CachedResult(convert(), options.tolerance))
+                def hit():
+                    encoded.seek(0)
+                    results.get(result_key(file_digest(encoded)[0], options))
+                yield Result("cache", "hit", params, measure(hit, repeat=repeat))
+
+SUITES: Dict[str, Callable[[List[str], int], Iterator[Result]]] = {}
+SUITES["stages"] = stages
+SUITES["matrix"] = matrix
+SUITES["micro"] = micro
+SUITES["threshold"] = threshold
+SUITES["reduction"] = reduction
+SUITES["cache"] = cache
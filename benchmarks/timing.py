@@ -0,0 +1,61 @@
+'''Module containing the timing of benchmarks and their results.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from statistics import median
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple
+
+class Result(NamedTuple):
+    '''Times of one benchmark, in seconds.'''
+    suite: str
+    name: str
+    params: Dict[str, Any]
+    times: List[float]
+
+    @property
+    def key(self) -> str:
+        '''Name that identifies the benchmark across runs.'''
+        return "/".join([self.suite, self.name] + [str(value) for value in self.params.values()])
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return median(self.times)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "suite": self.suite,
+            "name": self.name,
+            "params": self.params,
+            "times": self.times,
+            "best": self.best,
+            "median": self.median
+        }
+
+def measure(function: Callable[[], Any], *, repeat: int, setup: Callable[[], Any] | None = None) -> List[float]:
+    '''Time a function.
+
+    :param function: Function to time.
+    :type function: Callable[[], Any]
+    :param repeat: Number of times to call it.
+    :type repeat: int
+    :param setup: Function called before every call, not timed. Used to reset caches.
+    :type setup: Callable[[], Any] | None
+    :return: Time taken by every call, in seconds.
+    :rtype: List[float]
+    '''
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return times
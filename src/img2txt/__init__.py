@@ -1,2 +1,10 @@
 __version__ = "2024.01.08"
-__authors__ = ["Willow Ciesialka"]
\ No newline at end of file
+__authors__ = ["Willow Ciesialka"]
+__all__ = ["Converter"]
+
+def __getattr__(name: str):
+    # Converter is imported on first use, so that the command line, which does not use it, starts quickly.
+    if name == "Converter":
+        from img2txt.converter import Converter
+        return Converter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
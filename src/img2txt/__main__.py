@@ -1,9 +1,7 @@
 import argparse
-from math import ceil, floor
-from os import linesep
-import PIL.Image as Image
-from img2txt.methods import THRESHOLD_METHODS, COLOR_METHODS
-from img2txt.characters.brailleimage import BrailleImage
+import sys
+from img2txt.conversion import AUTO_TOLERANCE, add_conversion_arguments, conversion_options, load_image, missing_dependency, resolve_tolerance, write_document
+from img2txt.resultcache import add_cache_arguments, result_cache
 
 
 def hsv_to_rgb(h, s, v):
@@ -41,45 +39,114 @@ def hsv_to_rgb(h, s, v):
         return int(v * 255), int(p * 255), int(q * 255)
 
 def main():
-    argparser = argparse.ArgumentParser(description="Convert image to text.")
-    argparser.add_argument("--method", '-m', action="store", choices=THRESHOLD_METHODS.keys(), default="luminance", help="Select method to use to determine if a pixel should be included in the image.")
-    argparser.add_argument("--tolerance", '-t', action="store", type=float, default=0.5, help="Tolerance limit for determinance method.")
-    argparser.add_argument("--invert", '-i', action='store_true', help="Include this flag to invert the determinance method.")
-    argparser.add_argument("--color", '-c', action="store", choices=COLOR_METHODS.keys(), default="none", help="Select color display method.")
-    argparser.add_argument("--limit", '-l', action="store", type=int, default=None, help="Enforce character limit.")
+    # Subcommands, and the modules used by only some conversions, are imported when needed, so
+    # that --help and argument errors do not wait for them.
+    if sys.argv[1:2] == ["batch"]:
+        from img2txt import batch
+        sys.exit(batch.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["animate"]:
+        from img2txt import animation
+        sys.exit(animation.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["serve"]:
+        from img2txt import server
+        sys.exit(server.serve_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["client"]:
+        from img2txt import server
+        sys.exit(server.client_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["cache"]:
+        from img2txt import resultcache
+        sys.exit(resultcache.main(sys.argv[2:]))
+
+    argparser = argparse.ArgumentParser(description="Convert image to text.", epilog="Run \"%(prog)s batch --help\" to convert many images at once, \"%(prog)s animate --help\" to convert every frame of an animation, or \"%(prog)s serve --help\" and \"%(prog)s client --help\" to convert images with a long-running server, or \"%(prog)s cache --help\" to inspect the cache enabled by --cache.")
+    add_conversion_arguments(argparser)
+    argparser.add_argument("--jobs", '-j', action="store", type=int, default=1, help="Number of processes to convert with. 0 for one per CPU.")
+    argparser.add_argument("--max-memory", action="store", type=int, default=None, help="Convert the image in horizontal strips, taking about this many megabytes. For images too large to convert at once.")
     argparser.add_argument("--output", '-o', action="store", type=argparse.FileType("w", encoding="utf-8"), default="-", help="Output file.")
+    argparser.add_argument("--profile", action="store", default=None, metavar="FILE", help="Write the time taken by every stage, counters and cache statistics as JSON to FILE, or to standard error if FILE is \"-\". Work done by --jobs processes is not included.")
+    argparser.add_argument("--trace-memory", action="store_true", help="With --profile, also trace the peak memory allocated by Python. Slows conversion down.")
+    add_cache_arguments(argparser)
     argparser.add_argument("image", action="store", type=argparse.FileType("rb"))
     
     args = argparser.parse_args()
 
-    if not args.limit is None:
-        if args.limit <= 0:
-            raise ValueError(f"Character limit must be > 0, not {args.limit}")
-    tolerance_method = THRESHOLD_METHODS[args.method]
-    printing_visitor = COLOR_METHODS[args.color]
+    if args.jobs < 0:
+        raise ValueError(f"Number of jobs must be >= 0, not {args.jobs}")
+    options = conversion_options(args)
+    missing = missing_dependency(options)
+    if missing is not None:
+        argparser.error(missing)
+    cache = result_cache(args)
+    printing_visitor = options.formatter()
 
-    # Get image, and resize if necessary
-    image = Image.open(args.image)
-    width, height = image.size
-    image_area = width * height
-    original_character_count = ceil(image_area / 8)
-    if args.limit and original_character_count > args.limit:
-        scaling_ratio = ((args.limit * 8) / image_area)**0.5
-        width = floor(width * scaling_ratio)
-        height = floor(height * scaling_ratio)
-        image = image.resize((width, height))
-    image = image.convert('RGBA')
-
-    # Create BrailleImage and write output.
-    braille = BrailleImage.from_image(image, tolerance_method, tolerance = args.tolerance, invert = args.invert)
-    result = braille.get_colored_text(printing_visitor)
-    if args.color == "html":
-        result = result.replace(linesep, '<br>')
-    args.output.write(result)
-    args.output.write(linesep)
+    if args.max_memory is not None:
+        if args.max_memory <= 0:
+            raise ValueError(f"Memory limit must be > 0, not {args.max_memory}")
+        if options.limit is not None or args.jobs != 1:
+            argparser.error("--max-memory cannot be combined with --limit or --jobs.")
+        if options.tolerance == AUTO_TOLERANCE:
+            argparser.error(f"--max-memory cannot be combined with --tolerance {AUTO_TOLERANCE}.")
+
+    if args.profile is None:
+        convert(args, options, printing_visitor, cache)
+    else:
+        import json
+        from img2txt import profiling
+        with profiling.profile(trace_memory=args.trace_memory) as profiler:
+            convert(args, options, printing_visitor, cache)
+            report = profiler.report()
+        if args.profile == "-":
+            json.dump(report, sys.stderr, indent=4)
+            sys.stderr.write("\n")
+        else:
+            with open(args.profile, "w", encoding="utf-8") as report_file:
+                json.dump(report, report_file, indent=4)
     args.image.close()
     args.output.close()
 
+def convert(args, options, printing_visitor, cache):
+    if cache is None:
+        tolerance = render(args, options, printing_visitor, args.image, args.output)
+    else:
+        # The document is written to memory, so that it can be kept, then to the output.
+        import io
+        from img2txt.resultcache import CachedResult, file_digest, result_key
+        digest, image_file = file_digest(args.image)
+        key = result_key(digest, options)
+        result = cache.get(key)
+        if result is None:
+            output = io.StringIO(newline="")
+            tolerance = render(args, options, printing_visitor, image_file, output)
+            result = CachedResult(output.getvalue(), tolerance)
+            cache.put(key, result)
+        args.output.write(result.text)
+        tolerance = result.tolerance
+    if options.tolerance == AUTO_TOLERANCE:
+        print(f"Tolerance: {tolerance}", file=sys.stderr)
+
+def render(args, options, printing_visitor, image_file, output):
+    '''Convert the image and write the document. Returns the tolerance it was converted with.'''
+    if args.max_memory is not None:
+        from img2txt import strips
+        image = strips.open_image(image_file)
+        lines = strips.iter_colored_lines(image, options.threshold_method(), printing_visitor, tolerance = options.tolerance, invert = options.invert, memory_limit = args.max_memory * 2**20, reduction = options.cell_reduction())
+        write_document(output, printing_visitor, lines)
+        return options.tolerance
+
+    # Get image, and resize if necessary
+    image = load_image(image_file, options.limit, options.resample)
+    tolerance = resolve_tolerance(image, options)
+
+    # Convert image and write output.
+    if args.jobs == 1:
+        from img2txt.characters.brailleimage import BrailleImage
+        braille = BrailleImage.from_image_fast(image, options.threshold_method(), tolerance = tolerance, invert = options.invert)
+        lines = braille.iter_colored_lines(printing_visitor, options.cell_reduction())
+    else:
+        from img2txt.parallel import iter_colored_lines
+        lines = iter_colored_lines(image, options.threshold_method(), printing_visitor, tolerance = tolerance, invert = options.invert, jobs = args.jobs, reduction = options.cell_reduction())
+    write_document(output, printing_visitor, lines)
+    return tolerance
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+'''Module containing conversion of animated images, frame by frame.
+
+Frames are decoded, converted and handed on one at a time, so only one frame's BrailleImage is
+alive however long the animation is. The size a frame is resized to and the compiled threshold
+are worked out for the first frame and reused for the rest, and the palette tables and color
+difference cache stay warm from frame to frame.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import argparse
+import sys
+from os import makedirs, path
+from time import perf_counter, sleep
+from typing import Iterator, List, TextIO, Tuple
+import PIL.Image as Image
+from img2txt.characters.brailleimage import BrailleImage
+from img2txt.colors.colors import ANSI_RESET
+from img2txt.conversion import REDUCING_GAP, ConversionOptions, add_conversion_arguments, conversion_options, limited_size, missing_dependency, resampling_filter, resolve_tolerance, write_document
+from img2txt.methods.threshold import compile_threshold
+from img2txt.terminal import CLEAR_SCREEN, CURSOR_HOME, HIDE_CURSOR, SHOW_CURSOR, DeltaRenderer
+
+# Duration, in milliseconds, of frames that do not give one.
+DEFAULT_FRAME_DURATION: int = 100
+
+def frame_count(image: Image.Image) -> int:
+    '''Return the number of frames of an image; 1 for still images.'''
+    return getattr(image, "n_frames", 1)
+
+def iter_frames(image: Image.Image, options: ConversionOptions) -> Iterator[Tuple[BrailleImage, int]]:
+    '''Convert every frame of an image, one at a time.
+
+    :param image: Opened image, still or animated.
+    :type image: Image.Image
+    :param options: Options of the conversion. Every frame is resized to the size chosen for the\
+         first, and converted with the tolerance chosen for it if the tolerance is automatic.
+    :type options: ConversionOptions
+    :return: Iterator of each frame's BrailleImage and duration in milliseconds.
+    :rtype: Iterator[Tuple[BrailleImage, int]]
+    '''
+    threshold = None
+    size = None
+    for index in range(frame_count(image)):
+        image.seek(index)
+        if size is None:
+            size = limited_size(image.size, options.limit)
+        frame = image if image.size == size else image.resize(size, resampling_filter(options.resample), reducing_gap=REDUCING_GAP)
+        duration = image.info.get("duration") or DEFAULT_FRAME_DURATION
+        frame = frame.convert('RGBA')
+        if threshold is None:
+            threshold = compile_threshold(options.threshold_method(), resolve_tolerance(frame, options), options.invert)
+        braille = BrailleImage.from_image_fast(frame, threshold, tolerance=threshold.tolerance, invert=options.invert)
+        del frame
+        yield braille, int(duration)
+
+def write_frames(image: Image.Image, options: ConversionOptions, template: str) -> List[str]:
+    '''Write every frame of an image to its own text file.
+
+    :param image: Opened image, still or animated.
+    :type image: Image.Image
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :param template: Output path template. May use ``{index}`` and ``{duration}``, in milliseconds.
+    :type template: str
+    :return: Paths written to, in order.
+    :rtype: List[str]
+    '''
+    written = []
+    for index, (braille, duration) in enumerate(iter_frames(image, options)):
+        destination = template.format(index=index, duration=duration)
+        directory = path.dirname(destination)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        formatter = options.formatter()
+        with open(destination, "w", encoding="utf-8") as output:
+            write_document(output, formatter, braille.iter_colored_lines(formatter, options.cell_reduction()))
+        written.append(destination)
+    return written
+
+def play(image: Image.Image, options: ConversionOptions, output: TextIO, *, loops: int = 1, delta: bool = True):
+    '''Play the frames of an image on a terminal, each shown for its duration.
+    Frames are timed against a running deadline, so slow frames do not make the animation drift.
+
+    :param image: Opened image, still or animated.
+    :type image: Image.Image
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :param output: Terminal to write to.
+    :type output: TextIO
+    :param loops: Number of times to play the animation. 0 to loop until interrupted.
+    :type loops: int
+    :param delta: Only redraw the cells that changed since the last frame, see DeltaRenderer.\
+         Ignored for stateful formatters. Default is True.
+    :type delta: bool
+    '''
+    renderer = None
+    formatter = options.formatter()
+    if delta and not formatter.stateful:
+        renderer = DeltaRenderer(formatter, reduction=options.cell_reduction())
+    output.write(HIDE_CURSOR + CLEAR_SCREEN)
+    try:
+        deadline = perf_counter()
+        loop = 0
+        while loops == 0 or loop < loops:
+            for braille, duration in iter_frames(image, options):
+                if renderer is not None:
+                    output.write(renderer.render(braille))
+                else:
+                    formatter = options.formatter()
+                    output.write(CURSOR_HOME)
+                    write_document(output, formatter, braille.iter_colored_lines(formatter, options.cell_reduction()))
+                output.flush()
+                del braille
+                deadline += duration / 1000
+                remaining = deadline - perf_counter()
+                if remaining > 0:
+                    sleep(remaining)
+            loop += 1
+    finally:
+        if renderer is not None:
+            output.write(renderer.cursor_below())
+        output.write(ANSI_RESET + SHOW_CURSOR)
+        output.flush()
+
+def main(argv: List[str] | None = None) -> int:
+    '''Entry point of ``img2txt animate``.
+
+    :param argv: Arguments, without the program name and subcommand. Defaults to sys.argv.
+    :type argv: List[str] | None
+    :return: Exit status.
+    :rtype: int
+    '''
+    argparser = argparse.ArgumentParser(prog="img2txt animate", description="Convert every frame of an animated GIF, APNG or WebP image to text.")
+    add_conversion_arguments(argparser)
+    argparser.add_argument("--output", '-o', action="store", default=None, help="Write each frame to a file named by this template, which may use {index} and {duration}. If not given, the frames are played on standard output.")
+    argparser.add_argument("--loop", action="store", type=int, default=1, help="Number of times to play the frames. 0 to loop until interrupted.")
+    argparser.add_argument("--full-frames", action="store_true", help="When playing, redraw every frame in full instead of only the cells that changed.")
+    argparser.add_argument("image", action="store", type=argparse.FileType("rb"))
+
+    args = argparser.parse_args(argv)
+    options = conversion_options(args)
+    missing = missing_dependency(options)
+    if missing is not None:
+        argparser.error(missing)
+    if args.loop < 0:
+        raise ValueError(f"Number of loops must be >= 0, not {args.loop}")
+    image = Image.open(args.image)
+    try:
+        if args.output is not None:
+            write_frames(image, options, args.output)
+        else:
+            play(image, options, sys.stdout, loops=args.loop, delta=not args.full_frames)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        args.image.close()
+    return 0
@@ -0,0 +1,189 @@
+'''Module containing batch conversion of many image files.
+
+Files are converted by a pool of worker processes that live for the whole batch, so the
+interpreter, Pillow, the palette tables and the color difference cache are set up once per worker
+rather than once per file. A file that fails to convert is reported and the batch carries on.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import argparse
+import glob
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import makedirs, path
+from time import perf_counter
+from typing import Iterable, Iterator, List, NamedTuple, TextIO
+import PIL.Image as Image
+from img2txt.characters.brailleimage import BrailleImage
+from img2txt.conversion import ConversionOptions, add_conversion_arguments, conversion_options, load_image, missing_dependency, resolve_tolerance, write_document
+from img2txt.parallel import resolve_jobs
+
+DEFAULT_TEMPLATE: str = "{parent}/{stem}.txt"
+
+class BatchResult(NamedTuple):
+    '''Outcome of converting one file of a batch.'''
+    source: str
+    destination: str
+    error: str | None
+    seconds: float
+    # Tolerance the image was converted with, which may have been chosen automatically.
+    tolerance: float | None = None
+
+def is_image_path(file_path: str) -> bool:
+    '''Return whether a path has the extension of an image format Pillow can open.'''
+    return path.splitext(file_path)[1].lower() in Image.registered_extensions()
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    '''Expand paths, directories and glob patterns into a list of files.
+    Directories are searched recursively for images. Files named directly are kept whatever
+    their extension, and each file is listed once.
+
+    :param patterns: Paths, directories or glob patterns.
+    :type patterns: Iterable[str]
+    :return: Files in the order given, directories and globs sorted.
+    :rtype: List[str]
+    '''
+    files = {}
+    for pattern in patterns:
+        if path.isdir(pattern):
+            matches = sorted(
+                match for match in glob.glob(path.join(glob.escape(pattern), "**", "*"), recursive=True)
+                if path.isfile(match) and is_image_path(match)
+            )
+        elif glob.has_magic(pattern):
+            matches = sorted(match for match in glob.glob(pattern, recursive=True) if path.isfile(match))
+        else:
+            matches = [pattern]
+        for match in matches:
+            files.setdefault(path.normpath(match), None)
+    return list(files)
+
+def read_manifest(manifest: TextIO) -> List[str]:
+    '''Read one path or pattern per line, skipping blank lines.'''
+    return [line.strip() for line in manifest if line.strip()]
+
+def output_path(template: str, source: str, index: int) -> str:
+    '''Fill in an output path template for a source file.
+
+    The template may use ``{parent}`` (directory of the source), ``{stem}`` (file name without
+    extension), ``{name}`` (file name), ``{ext}`` (extension without the dot) and ``{index}``
+    (position of the file in the batch).
+
+    :param template: Output path template.
+    :type template: str
+    :param source: Path of the source file.
+    :type source: str
+    :param index: Position of the file in the batch.
+    :type index: int
+    :return: Output path.
+    :rtype: str
+    '''
+    parent, name = path.split(source)
+    stem, ext = path.splitext(name)
+    return template.format(parent=parent or ".", stem=stem, name=name, ext=ext.lstrip("."), index=index)
+
+def convert_file(source: str, destination: str, options: ConversionOptions) -> BatchResult:
+    '''Convert one image file to a text file, capturing any error.
+
+    :param source: Path of the image.
+    :type source: str
+    :param destination: Path of the text file. Missing directories are created.
+    :type destination: str
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :return: Result of the conversion.
+    :rtype: BatchResult
+    '''
+    start = perf_counter()
+    try:
+        image = load_image(source, options.limit, options.resample)
+        formatter = options.formatter()
+        tolerance = resolve_tolerance(image, options)
+        braille = BrailleImage.from_image_fast(image, options.threshold_method(), tolerance=tolerance, invert=options.invert)
+        del image
+        directory = path.dirname(destination)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        with open(destination, "w", encoding="utf-8") as output:
+            write_document(output, formatter, braille.iter_colored_lines(formatter, options.cell_reduction()))
+    except Exception as e:
+        return BatchResult(source, destination, f"{e.__class__.__name__}: {e}", perf_counter() - start)
+    return BatchResult(source, destination, None, perf_counter() - start, tolerance)
+
+def run_batch(sources: List[str], template: str, options: ConversionOptions, *, jobs: int | None = None) -> Iterator[BatchResult]:
+    '''Convert many image files, yielding a result as each file finishes.
+
+    :param sources: Paths of the images.
+    :type sources: List[str]
+    :param template: Output path template, see output_path.
+    :type template: str
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :param jobs: Number of worker processes. None or 0 for one per CPU. With 1, files are\
+         converted in this process.
+    :type jobs: int | None
+    :return: Iterator of results, in order of completion.
+    :rtype: Iterator[BatchResult]
+    :raises ValueError: Raised if two sources would be written to the same output.
+    '''
+    destinations = [output_path(template, source, i) for i, source in enumerate(sources)]
+    seen = {}
+    for source, destination in zip(sources, destinations):
+        key = path.normcase(path.abspath(destination))
+        if key in seen:
+            raise ValueError(f"{seen[key]} and {source} would both be written to {destination}.")
+        seen[key] = source
+
+    jobs = min(resolve_jobs(jobs), max(1, len(sources)))
+    if jobs == 1:
+        for source, destination in zip(sources, destinations):
+            yield convert_file(source, destination, options)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(convert_file, source, destination, options) for source, destination in zip(sources, destinations)]
+        for future in as_completed(futures):
+            yield future.result()
+
+def main(argv: List[str] | None = None) -> int:
+    '''Entry point of ``img2txt batch``.
+
+    :param argv: Arguments, without the program name and subcommand. Defaults to sys.argv.
+    :type argv: List[str] | None
+    :return: Exit status; 1 if any file failed.
+    :rtype: int
+    '''
+    argparser = argparse.ArgumentParser(prog="img2txt batch", description="Convert many images to text files.")
+    add_conversion_arguments(argparser)
+    argparser.add_argument("--output", '-o', action="store", default=DEFAULT_TEMPLATE, help=f"Output path template. May use {{parent}}, {{stem}}, {{name}}, {{ext}} and {{index}}. Default is \"{DEFAULT_TEMPLATE}\".")
+    argparser.add_argument("--manifest", action="store", type=argparse.FileType("r", encoding="utf-8"), default=None, help="File listing one input per line, - for stdin.")
+    argparser.add_argument("--jobs", '-j', action="store", type=int, default=0, help="Number of processes to convert with. 0 for one per CPU.")
+    argparser.add_argument("inputs", action="store", nargs="*", help="Images, directories or glob patterns.")
+
+    args = argparser.parse_args(argv)
+    options = conversion_options(args)
+    missing = missing_dependency(options)
+    if missing is not None:
+        argparser.error(missing)
+    if args.jobs < 0:
+        raise ValueError(f"Number of jobs must be >= 0, not {args.jobs}")
+    patterns = list(args.inputs)
+    if args.manifest is not None:
+        patterns.extend(read_manifest(args.manifest))
+        args.manifest.close()
+    sources = expand_inputs(patterns)
+    if not sources:
+        argparser.error("no input images given.")
+
+    start = perf_counter()
+    failures = 0
+    for result in run_batch(sources, args.output, options, jobs=args.jobs):
+        if result.error is not None:
+            failures += 1
+            print(f"{result.source}: {result.error}", file=sys.stderr)
+    elapsed = perf_counter() - start
+    converted = len(sources) - failures
+    rate = converted / elapsed if elapsed > 0 else 0.0
+    print(f"Converted {converted} of {len(sources)} images in {elapsed:.2f} s ({rate:.2f} images/sec), {failures} failed.", file=sys.stderr)
+    return 1 if failures else 0
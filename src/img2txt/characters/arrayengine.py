@@ -0,0 +1,81 @@
+'''Module containing the array-based conversion engine behind BrailleImage.
+
+Everything in this module operates on whole images at once using NumPy. NumPy
+is an optional dependency; check ``NUMPY_AVAILABLE`` before calling into the
+module.
+
+:author: Willow Ciesialka'''
+
+from __future__ import annotations
+from typing import Callable, Tuple
+from PIL.Image import Image
+from img2txt.methods.threshold import compile_threshold
+from img2txt.characters.brailleimage import ALPHA_TOLERANCE
+
+try:
+    import numpy as np
+except ImportError: # pragma: no cover - depends on the environment
+    np = None
+
+NUMPY_AVAILABLE: bool = np is not None
+
+# Bit value of each dot in a 2x4 cell, indexed [sub_y][sub_x]. Mirrors BrailleFlag.get.
+DOT_WEIGHTS: Tuple[Tuple[int, int], ...] = (
+    (0x1, 0x8),
+    (0x2, 0x10),
+    (0x4, 0x20),
+    (0x40, 0x80)
+)
+
+def image_to_cells(img: Image, method: Callable, *, tolerance: float = 0.5, invert: bool = False):
+    '''Convert an RGBA image into braille cell data.
+
+    :param img: Source image in RGBA mode.
+    :type img: Image
+    :param method: Threshold method, as found in THRESHOLD_METHODS.
+    :param tolerance: Tolerance for the method.
+    :type tolerance: float
+    :param invert: Invert the method.
+    :type invert: bool
+    :return: Tuple of the cell flags, shape (char_height, char_width) and dtype uint8,
+        and the dot colors, shape (char_height, char_width, 8, 3) and dtype uint8,
+        where dot ``i`` corresponds to the flag ``1 << i``. Colors of unset dots are 0.
+    '''
+    width, height = img.size
+    pixels = np.asarray(img, dtype=np.uint8).reshape(height, width, 4)
+    rgb = pixels[..., :3]
+    mask = pixels[..., 3] >= ALPHA_TOLERANCE
+    mask &= compile_threshold(method, tolerance, invert).mask(rgb)
+
+    # Pad to whole cells, then split the axes into (cell, dot).
+    char_width = -(-width // 2)
+    char_height = -(-height // 4)
+    padded_mask = np.zeros((char_height * 4, char_width * 2), dtype=bool)
+    padded_mask[:height, :width] = mask
+    padded_rgb = np.zeros((char_height * 4, char_width * 2, 3), dtype=np.uint8)
+    padded_rgb[:height, :width] = rgb
+    padded_rgb[~padded_mask] = 0
+
+    cell_mask = padded_mask.reshape(char_height, 4, char_width, 2)
+    flags = (cell_mask * np.array(DOT_WEIGHTS, dtype=np.uint8)[None, :, None, :]).sum(axis=(1, 3), dtype=np.uint8)
+
+    # Reorder the dots of each cell so that dot i holds the color of flag 1 << i.
+    cell_rgb = padded_rgb.reshape(char_height, 4, char_width, 2, 3).transpose(0, 2, 1, 3, 4).reshape(char_height, char_width, 8, 3)
+    order = np.argsort(np.array(DOT_WEIGHTS).reshape(8))
+    colors = np.ascontiguousarray(cell_rgb[:, :, order])
+    return flags, colors
+
+def reduce_cells(flags: bytes, colors: bytes, reduction: Callable) -> bytes:
+    '''Reduce the dot colors of every cell to one color.
+
+    :param flags: One byte of flags per cell.
+    :type flags: bytes
+    :param colors: Three bytes of color per dot, eight dots per cell.
+    :type colors: bytes
+    :param reduction: Reduction, as found in REDUCTION_METHODS.
+    :return: Three bytes of color per cell.
+    :rtype: bytes
+    '''
+    cell_flags = np.frombuffer(flags, dtype=np.uint8)
+    cell_colors = np.frombuffer(colors, dtype=np.uint8).reshape(len(cell_flags), 8, 3)
+    return reduction.reduce(cell_flags, cell_colors).tobytes()
@@ -4,23 +4,37 @@
 
 from __future__ import annotations
 from math import ceil, floor
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Iterator, List, Tuple
 from os import linesep
-from PIL.Image import Image
-from img2txt.characters.braillesegment import BrailleSegment, BrailleFlag
+from img2txt.characters.braillesegment import BrailleSegment, BrailleFlag, DOT_COUNT
+from img2txt.characters.coloredtext import ColoredText
 from img2txt.methods.colors import ColoredTextFormatter
+from img2txt.methods.reduction import CellReduction, MeanReduction
+from img2txt.methods.threshold import compile_threshold
+from img2txt import profiling
+
+if TYPE_CHECKING:
+    from PIL.Image import Image
 
 ALPHA_TOLERANCE: int = 255//2
+# Reduction used when none is given: the integer mean of the dots.
+DEFAULT_REDUCTION: CellReduction = MeanReduction()
+# Number of set bits of every byte.
+POPCOUNT: bytes = bytes(bin(value).count("1") for value in range(256))
 
 class BrailleImage:
-    '''Representation of a Braille Image.'''
+    '''Representation of a Braille Image.
+
+    Cells are stored in two flat buffers rather than as individual BrailleSegment objects:
+    one byte of flags per cell, and three bytes of color for each of the eight dots of a cell.'''
     def __init__(self, width: int, height: int):
 
         self.__width: int = width
         self.__height: int = height
 
-        self.__segments: List[BrailleSegment] = \
-            [BrailleSegment() for _ in range(self.char_width * self.char_height)]
+        cell_count = self.char_width * self.char_height
+        self.__flags: bytearray = bytearray(cell_count)
+        self.__colors: bytearray = bytearray(cell_count * DOT_COUNT * 3)
 
     @classmethod
     def from_image(cls, img: Image, method, *, tolerance: float = 0.5, invert: bool = False) -> BrailleImage:
@@ -31,19 +45,84 @@ class BrailleImage:
         :type tolerance: float
         :param method: Method used to calculate luminance.
         :returns: Constructed BrailleImage.
-        :rtype: BrailleImage'''
+        :rtype: BrailleImage
+        :raises ValueError: Raised if the method is spatial, such as a dithering method, as those need the array engine.'''
         width, height = img.size
         braille = cls(width, height)
+        with profiling.stage("from_image"):
+            predicate = compile_threshold(method, tolerance, invert)
+            if predicate.spatial:
+                raise ValueError(f"{predicate.__class__.__name__} thresholds whole images at once, which needs NumPy. Install NumPy and use from_image_fast.")
+
+            for y in range(height):
+                for x in range(width):
+                    red, green, blue, alpha = img.getpixel((x, y))
+                    if alpha >= ALPHA_TOLERANCE:
+                        if predicate((red, green, blue)):
+                            braille.plot(x, y, (red, green, blue))
+
+        braille.__count_dots()
+        return braille
+
+    @classmethod
+    def from_image_fast(cls, img: Image, method, *, tolerance: float = 0.5, invert: bool = False) -> BrailleImage:
+        '''Return a BrailleImage constructed from an Image using the array engine.
+        Produces the same BrailleImage as from_image, falling back to it when NumPy is not installed.
+        :param img: Source image.
+        :type img: Image
+        :param tolerance: Luminance tolerance.
+        :type tolerance: float
+        :param method: Method used to calculate luminance.
+        :returns: Constructed BrailleImage.
+        :rtype: BrailleImage'''
+        from img2txt.characters import arrayengine
+        if not arrayengine.NUMPY_AVAILABLE:
+            return cls.from_image(img, method, tolerance=tolerance, invert=invert)
 
-        for y in range(height):
-            for x in range(width):
-                red, green, blue, alpha = img.getpixel((x, y))
-                if alpha >= ALPHA_TOLERANCE:
-                    if method((red, green, blue), tolerance=tolerance, invert=invert):
-                        braille.plot(x, y, (red, green, blue))
+        width, height = img.size
+        braille = cls(width, height)
+        with profiling.stage("from_image"):
+            flags, colors = arrayengine.image_to_cells(img, method, tolerance=tolerance, invert=invert)
+            braille.__flags[:] = flags.tobytes()
+            braille.__colors[:] = colors.tobytes()
+        braille.__count_dots()
+        return braille
 
+    @classmethod
+    def from_cells(cls, width: int, height: int, flags: bytes, colors: bytes) -> BrailleImage:
+        '''Return a BrailleImage constructed from cell buffers, as returned by cells.
+        :param width: Width of image.
+        :type width: int
+        :param height: Height of image.
+        :type height: int
+        :param flags: One byte of flags per cell.
+        :type flags: bytes
+        :param colors: Three bytes of color per dot, eight dots per cell.
+        :type colors: bytes
+        :returns: Constructed BrailleImage.
+        :rtype: BrailleImage
+        :raises ValueError: ValueError raised if the buffers do not match the size of the image.'''
+        braille = cls(width, height)
+        if len(flags) != len(braille.__flags) or len(colors) != len(braille.__colors):
+            raise ValueError(f"Cell buffers do not match a {width}x{height} image.")
+        braille.__flags[:] = flags
+        braille.__colors[:] = colors
         return braille
 
+    def cells(self) -> Tuple[bytes, bytes]:
+        '''Return copies of the cell buffers.
+        :returns: Tuple containing the flags, one byte per cell, and the colors, three bytes per dot.
+        :rtype: Tuple[bytes, bytes]'''
+        return bytes(self.__flags), bytes(self.__colors)
+
+    def dot_count(self) -> int:
+        '''Return the number of dots that are set, i.e. of pixels plotted.'''
+        return sum(self.__flags.translate(POPCOUNT))
+
+    def __count_dots(self):
+        if profiling.active() is not None:
+            profiling.count("pixels_plotted", self.dot_count())
+
     @property
     def width(self) -> int:
         '''Width of image.'''
@@ -64,14 +143,14 @@ class BrailleImage:
         '''Character height of image.'''
         return ceil(self.__height / 4)
 
-    def __get_segment(self, x: int, y: int) -> BrailleSegment:
+    def __get_index(self, x: int, y: int) -> int:
         '''Get the segment specified by the x and y position.
         :param x: x position.
         :type x: int
         :param y: y position.
         :type y: int
-        :returns: Braille Segment that occupies the position (x,y)
-        :rtype: BrailleSegment
+        :returns: Index of the cell that occupies the position (x,y)
+        :rtype: int
         :raises ValueError: ValueError raised if x < 0 or y < 0 or x > width or y > height
         '''
         if x < 0 or x > self.width:
@@ -81,8 +160,27 @@ class BrailleImage:
         else:
             char_x = floor(x / 2)
             char_y = floor(y / 4)
-            i = char_x + (char_y * self.char_width)
-            return self.__segments[i]
+            return char_x + (char_y * self.char_width)
+
+    def get_segment(self, x: int, y: int) -> BrailleSegment:
+        '''Get the segment specified by the x and y position.
+        The segment is a view; changes made through it are reflected in the image.
+        :param x: x position.
+        :type x: int
+        :param y: y position.
+        :type y: int
+        :returns: Braille Segment that occupies the position (x,y)
+        :rtype: BrailleSegment
+        :raises ValueError: ValueError raised if x < 0 or y < 0 or x > width or y > height
+        '''
+        return BrailleSegment.view(self.__flags, self.__colors, self.__get_index(x, y))
+
+    def segments(self) -> Iterator[BrailleSegment]:
+        '''Iterate over the segments of the image, row by row.
+        :returns: Iterator of segment views.
+        :rtype: Iterator[BrailleSegment]'''
+        for i in range(len(self.__flags)):
+            yield BrailleSegment.view(self.__flags, self.__colors, i)
 
     def plot(self, x: int, y: int, color: Tuple[int, int, int] = None, *, unplot: bool = False):
         '''Plots the "pixel" residing at (x, y).
@@ -93,7 +191,7 @@ class BrailleImage:
         :param unplot: If True, the method will instead unplot the point residing at (x, y).\
              Default is False.
         :type unplot: bool'''
-        segment = self.__get_segment(x, y)
+        segment = self.get_segment(x, y)
 
         sub_x = x % 2
         sub_y = y % 4
@@ -107,22 +205,70 @@ class BrailleImage:
                 raise ValueError("Cannot plot without setting color!")
             segment.set_flag(flag, color)
     
-    def get_colored_text(self, formatter: ColoredTextFormatter) -> str:
+    def cell_colors(self, reduction: CellReduction = DEFAULT_REDUCTION) -> bytes:
+        '''Return the color of every cell, reduced from the colors of its set dots.
+        Every cell is reduced at once when NumPy is installed.
+
+        :param reduction: Reduction, as found in REDUCTION_METHODS. Default is the mean.
+        :type reduction: CellReduction
+        :return: Three bytes of color per cell, row by row.
+        :rtype: bytes
+        '''
+        from img2txt.characters import arrayengine
+        if arrayengine.NUMPY_AVAILABLE:
+            return arrayengine.reduce_cells(self.__flags, self.__colors, reduction)
+        return bytes(band for i, flags in enumerate(self.__flags) for band in reduction(self.__colors, i, flags))
+
+    def iter_colored_rows(self, reduction: CellReduction = DEFAULT_REDUCTION) -> Iterator[List[ColoredText]]:
+        '''Yield the colored text of the cells of the image one row at a time.
+
+        :param reduction: Reduction choosing the color of every cell, as found in REDUCTION_METHODS.\
+             Default is the mean.
+        :type reduction: CellReduction
+        :return: Iterator of lists containing the colored text of each cell of a row, in order.
+        :rtype: Iterator[List[ColoredText]]
+        '''
+        char_width = self.char_width
+        if char_width == 0:
+            return
+        with profiling.stage("reduce"):
+            colors = self.cell_colors(reduction)
+        for start in range(0, len(self.__flags), char_width):
+            profiling.count("cells_rendered", char_width)
+            row = []
+            for i in range(start, start + char_width):
+                offset = i * 3
+                row.append(ColoredText(chr(0x2800 + self.__flags[i]), (colors[offset], colors[offset + 1], colors[offset + 2])))
+            yield row
+
+    def iter_colored_lines(self, formatter: ColoredTextFormatter, reduction: CellReduction = DEFAULT_REDUCTION) -> Iterator[str]:
+        '''Yield the colored text of the image one line at a time.
+
+        :param formatter: Appropriate formatter for display method.
+        :type formatter: ColoredTextFormatter
+        :param reduction: Reduction choosing the color of every cell, as found in REDUCTION_METHODS.\
+             Default is the mean.
+        :type reduction: CellReduction
+        :return: Iterator of strings containing the formatted colored text of each line,\
+             without line separators.
+        :rtype: Iterator[str]
+        '''
+        for row in self.iter_colored_rows(reduction):
+            yield formatter.format_line(row)
+
+    def get_colored_text(self, formatter: ColoredTextFormatter, reduction: CellReduction = DEFAULT_REDUCTION) -> str:
         '''Return string representation of colored text.
 
         :param formatter: Appropriate formatter for display method.
         :type formatter: ColoredTextFormatter
+        :param reduction: Reduction choosing the color of every cell, as found in REDUCTION_METHODS.\
+             Default is the mean.
+        :type reduction: CellReduction
         :return: String containing the formatted colored text.
         :rtype: str
         '''
-        return_string = ""
-        for i, segment in enumerate(self.__segments):
-            if i > 0 and i % self.char_width == 0:
-                return_string += linesep
-            segment_text = segment.as_colored_text()
-            return_string += formatter.format(segment_text)
-        return return_string
+        return linesep.join(self.iter_colored_lines(formatter, reduction))
 
 
     def __repr__(self):
-        return f"BrailleImage({self.width}, {self.height}, list[BrailleSegment])"
\ No newline at end of file
+        return f"BrailleImage({self.width}, {self.height})"
\ No newline at end of file
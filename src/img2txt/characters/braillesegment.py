@@ -42,22 +42,59 @@ class BrailleFlag(Enum):
         return BrailleFlag.H
 
 
+DOT_COUNT: int = 8
+
+# Index of each flag's dot within a cell's colors; the dot of flag 1 << i is stored at index i.
+DOT_INDEX = {enumeration.value: enumeration.value.bit_length() - 1 for enumeration in BrailleFlag}
+
+# Dot indices that are set for every possible flag value.
+SET_DOTS = tuple(tuple(dot for dot in range(DOT_COUNT) if flags & (1 << dot)) for flags in range(256))
+
+
 class BrailleSegment:
     '''Class representing a 2x4 segment of a BrailleImage.
-    Contains methods for setting and unsetting flags.'''
+    Contains methods for setting and unsetting flags.
+
+    A segment stores its flags and dot colors in flat buffers: one byte of flags per cell and
+    three bytes of color per dot. A standalone segment owns buffers holding a single cell, while
+    BrailleSegment.view returns a segment backed by the buffers of a whole image.'''
 
-    __slots__ = ('__flags', '__colors')
+    __slots__ = ('__flags', '__colors', '__index')
 
     def __init__(self):
-        self.__flags: int = 0
-        self.__colors = {enumeration.value: None for enumeration in BrailleFlag}
+        self.__flags: bytearray = bytearray(1)
+        self.__colors: bytearray = bytearray(DOT_COUNT * 3)
+        self.__index: int = 0
+
+    @classmethod
+    def view(cls, flags: bytearray, colors: bytearray, index: int) -> BrailleSegment:
+        '''Return a segment backed by shared buffers.
+        :param flags: Buffer with one byte of flags per cell.
+        :type flags: bytearray
+        :param colors: Buffer with three bytes of color per dot, eight dots per cell.\
+             Dot i holds the color of the flag with value 1 << i.
+        :type colors: bytearray
+        :param index: Index of the cell within the buffers.
+        :type index: int
+        :returns: Segment reading and writing cell ``index`` of the buffers.
+        :rtype: BrailleSegment'''
+        segment = cls.__new__(cls)
+        segment.__flags = flags
+        segment.__colors = colors
+        segment.__index = index
+        return segment
+
+    @property
+    def flags(self) -> int:
+        '''Integer value of the set flags.'''
+        return self.__flags[self.__index]
 
     def as_char(self) -> str:
         '''Return the character representation of the Braille pattern in UTF-16/UTF-32 Encoding.
         :returns: A string containing the Braille Pattern.
         :rtype: str'''
         # In UTF-16 and UTF-32 Encoding, the base Braille pattern is 0x2800.
-        return chr(0x2800 + self.__flags)
+        return chr(0x2800 + self.flags)
 
     def get_color(self) -> Tuple[int, int, int]:
         '''Get the average color of the components.
@@ -65,20 +102,7 @@ class BrailleSegment:
         :return: Average color of every bit in the segment.
         :rtype: Tuple[int, int, int]
         '''
-        total_red = 0
-        total_green = 0 
-        total_blue = 0
-        total_segments = 0
-        for color in self.__colors.values():
-            if color is None:
-                continue
-            total_red += color[0]
-            total_green += color[1]
-            total_blue += color[2]
-            total_segments += 1
-        if total_segments == 0:
-            return (0, 0, 0)
-        return (total_red // total_segments, total_green // total_segments, total_blue // total_segments)
+        return average_dot_color(self.__colors, self.__index, self.flags)
 
     def as_colored_text(self) -> ColoredText:
         '''Return the ColoredText representation of this character.
@@ -92,40 +116,41 @@ class BrailleSegment:
         return self.as_char()
 
     def __repr__(self):
-        return f"BrailleSegment({hex(self.__flags)})"
+        return f"BrailleSegment({hex(self.flags)})"
 
     def copy(self) -> BrailleSegment:
         '''Return a copy of the BrailleSegment.'''
         new_copy = BrailleSegment()
-        for flag, color in self.__colors.items():
-            if color is None:
-                continue
-            new_copy.set_flag(flag, color)
+        start = self.__index * DOT_COUNT * 3
+        new_copy.__flags[0] = self.flags
+        new_copy.__colors[:] = self.__colors[start:start + DOT_COUNT * 3]
         return new_copy
 
     def fill(self, color: Tuple[int, int, int]):
         '''Completely fill the BrailleSegment.
         :param color: Color to fill.
         :type color: Tuple[int, int, int]'''
-        self.__flags = 0xFF
-        for bit in self.__colors:
-            self.__colors[bit] = color
+        start = self.__index * DOT_COUNT * 3
+        self.__flags[self.__index] = 0xFF
+        self.__colors[start:start + DOT_COUNT * 3] = bytes(color) * DOT_COUNT
 
     def set_flag(self, flag: BrailleFlag, color: Tuple[int, int, int]):
         '''Set the BrailleSegment flag.
         :param flag: Flag to set.
         :type flag: BrailleFlag
         '''
-        self.__flags = self.__flags | flag.value
-        self.__colors[flag.value] = color
+        start = (self.__index * DOT_COUNT + DOT_INDEX[flag.value]) * 3
+        self.__flags[self.__index] |= flag.value
+        self.__colors[start:start + 3] = bytes(color)
 
     def unset_flag(self, flag: BrailleFlag):
         '''Unset the BrailleSegment flag.
         :param flag: Flag to unset.
         :type flag: BrailleFlag
         '''
-        self.__flags = self.__flags & (~flag.value)
-        self.__colors[flag.value] = None
+        start = (self.__index * DOT_COUNT + DOT_INDEX[flag.value]) * 3
+        self.__flags[self.__index] &= ~flag.value & 0xFF
+        self.__colors[start:start + 3] = bytes(3)
 
     def flag_is_set(self, flag: BrailleFlag) -> bool:
         '''Return if the BrailleSegment flag is set.
@@ -133,4 +158,32 @@ class BrailleSegment:
         :type flag: BrailleFlag
         :returns: True if flag is set, False otherwise.
         :rtype: bool'''
-        return self.__flags & flag.value == flag.value
+        return self.flags & flag.value == flag.value
+
+
+def average_dot_color(colors: bytearray, index: int, flags: int) -> Tuple[int, int, int]:
+    '''Get the average color of the set dots of a cell stored in a color buffer.
+
+    :param colors: Buffer with three bytes of color per dot, eight dots per cell.
+    :type colors: bytearray
+    :param index: Index of the cell within the buffer.
+    :type index: int
+    :param flags: Flags of the cell.
+    :type flags: int
+    :return: Average color of the set dots, or (0, 0, 0) if no dot is set.
+    :rtype: Tuple[int, int, int]
+    '''
+    if flags == 0:
+        return (0, 0, 0)
+    total_red = 0
+    total_green = 0
+    total_blue = 0
+    total_segments = 0
+    start = index * DOT_COUNT * 3
+    for dot in SET_DOTS[flags]:
+        offset = start + dot * 3
+        total_red += colors[offset]
+        total_green += colors[offset + 1]
+        total_blue += colors[offset + 2]
+        total_segments += 1
+    return (total_red // total_segments, total_green // total_segments, total_blue // total_segments)
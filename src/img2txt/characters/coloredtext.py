@@ -3,7 +3,7 @@
 :author: Willow Ciesialka'''
 
 import img2txt.colors.colors as colors
-from img2txt.colors.colordifference import find_nearest_color_neighbor
+import img2txt.colors.quantization as quantization
 
 class ColoredText:
 
@@ -37,6 +37,22 @@ class ColoredText:
             raise ValueError("color bands should be between 0-255.")
         self.__color = new_color
     
+    def html_color_name(self) -> str:
+        '''Get the name of the nearest HTML named color.
+
+        :return: Name of the nearest named color.
+        :rtype: str
+        '''
+        return quantization.nearest("named_colors", self.color)
+
+    def html_hex_color(self) -> str:
+        '''Get the exact color as an HTML hex color.
+
+        :return: Hex color of the form #rrggbb.
+        :rtype: str
+        '''
+        return f"#{self.color[0]:02x}{self.color[1]:02x}{self.color[2]:02x}"
+
     def html(self) -> str:
         '''Get text representation in HTML
 
@@ -44,18 +60,35 @@ class ColoredText:
         :rtype: str
         '''
         # Find nearest named color
-        name, _ = find_nearest_color_neighbor(self.color, colors.NAMED_COLORS)
+        name = self.html_color_name()
         return f"<span style=\"color: {name};\">{self.text}</span>"
     
+    def four_bit_ansi_escape(self) -> str:
+        '''Get the four-bit ANSI escape sequence that sets the foreground to the nearest color.
+
+        :return: Four-bit ANSI escape sequence.
+        :rtype: str
+        '''
+        # Find nearest four-bit ANSI color.
+        index = quantization.nearest("four_bit_ansi", self.color)
+        return colors.FOUR_BIT_ANSI[index].fg()
+
     def four_bit_ansi(self) -> str:
         '''Get text representation using four-bit ANSI.
 
         :return: Text representation in four-bit ANSI.
         :rtype: str
         '''
-        # Find nearest four-bit ANSI color.
-        index, _ = find_nearest_color_neighbor(self.color, [ansi.rgb for ansi in colors.FOUR_BIT_ANSI])
-        return colors.FOUR_BIT_ANSI[index].fg() + self.text + colors.ANSI_RESET
+        return self.four_bit_ansi_escape() + self.text + colors.ANSI_RESET
+
+    def eight_bit_ansi_escape(self) -> str:
+        '''Get the eight-bit ANSI escape sequence that sets the foreground to the nearest color.
+
+        :return: Eight-bit ANSI escape sequence.
+        :rtype: str
+        '''
+        index = quantization.nearest("eight_bit_ansi", self.color)
+        return colors.EIGHT_BIT_ANSI[index].fg()
 
     def eight_bit_ansi(self) -> str:
         '''Get text representation using eight-bit ANSI.
@@ -63,17 +96,23 @@ class ColoredText:
         :return: Text representation in eight-bit ANSI.
         :rtype: str
         '''
-        index, _ = find_nearest_color_neighbor(self.color, [ansi.rgb for ansi in colors.EIGHT_BIT_ANSI])
-        return colors.EIGHT_BIT_ANSI[index].fg() + self.text + colors.ANSI_RESET
-    
+        return self.eight_bit_ansi_escape() + self.text + colors.ANSI_RESET
+
+    def true_color_ansi_escape(self) -> str:
+        '''Get the "true-color" (24-bit) ANSI escape sequence that sets the foreground to the color.
+
+        :return: True-color ANSI escape sequence.
+        :rtype: str
+        '''
+        return colors.TrueColorAnsi(self.color).fg()
+
     def true_color_ansi(self) -> str:
         '''Get text representation using "true-color" (24-bit) ANSI.
 
         :return: Text representaiton using true-color ANSI.
         :rtype: str
         '''
-        ansi = colors.TrueColorAnsi(self.color)
-        return ansi.fg() + self.text + colors.ANSI_RESET
+        return self.true_color_ansi_escape() + self.text + colors.ANSI_RESET
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.__text}, {self.__color})"
@@ -5,6 +5,17 @@
 
 from typing import Tuple, Dict, List, Any
 from math import atan2, radians, cos, sin, exp, inf, degrees
+from img2txt.colors.lrucache import LRUCache
+
+def gamma_expand(channel: float) -> float:
+    '''Convert a normalized sRGB band to linear light.
+
+    :param channel: Band value in [0.0, 1.0].
+    :type channel: float
+    :return: Linear band value in [0.0, 1.0].
+    :rtype: float
+    '''
+    return (channel / 12.92) if (channel <= 0.04045) else ((channel + 0.055) / 1.055) ** 2.4
 
 def rgb_to_xyz(rgb: Tuple[int, int, int]) -> Tuple[float, float, float]:
     '''Convert a color in RGB space to XYZ space
@@ -20,9 +31,9 @@ def rgb_to_xyz(rgb: Tuple[int, int, int]) -> Tuple[float, float, float]:
     b = float(rgb[2]) / 255.0
 
     # Apply gamma correction if needed
-    r = (r / 12.92) if (r <= 0.04045) else ((r + 0.055) / 1.055) ** 2.4
-    g = (g / 12.92) if (g <= 0.04045) else ((g + 0.055) / 1.055) ** 2.4
-    b = (b / 12.92) if (b <= 0.04045) else ((b + 0.055) / 1.055) ** 2.4
+    r = gamma_expand(r)
+    g = gamma_expand(g)
+    b = gamma_expand(b)
 
     # Apply the RGB to XYZ conversion matrix
     x = r * 0.4124564 + g * 0.3575761 + b * 0.1804375
@@ -132,6 +143,109 @@ def ciede2000(lab_1: Tuple[float, float, float], lab_2: Tuple[float, float, floa
     delta_E = (delta_E_a + delta_E_b + delta_E_c + delta_E_d)**0.5
     return delta_E
 
+def rgb_to_lab_many(rgb):
+    '''Convert an array of colors in RGB space to L*ab space.
+    Equal to applying rgb_to_lab to every color, bit for bit, for integer input in [0, 255].
+
+    :param rgb: Array-like of shape (..., 3) with each band in [0, 255].
+    :return: Array of shape (..., 3) of colors in L*ab colorspace.
+    :rtype: numpy.ndarray
+    '''
+    import numpy as np
+    rgb = np.asarray(rgb)
+    if rgb.shape[-1:] != (3,):
+        raise ValueError(f"rgb should have shape (..., 3), not {rgb.shape}.")
+    if np.issubdtype(rgb.dtype, np.integer) and rgb.size and rgb.min() >= 0 and rgb.max() <= 255:
+        table = np.array([gamma_expand(float(value) / 255.0) for value in range(256)])
+        linear = table[rgb]
+    else:
+        channel = rgb.astype(np.float64) / 255.0
+        linear = np.where(channel <= 0.04045, channel / 12.92, ((channel + 0.055) / 1.055) ** 2.4)
+    r = linear[..., 0]
+    g = linear[..., 1]
+    b = linear[..., 2]
+
+    x = (r * 0.4124564 + g * 0.3575761 + b * 0.1804375) * 100.0 / 95.047
+    y = (r * 0.2126729 + g * 0.7151522 + b * 0.0721750) * 100.0 / 100.000
+    z = (r * 0.0193339 + g * 0.1191920 + b * 0.9503041) * 100.0 / 108.883
+
+    x = np.where(x > 0.008856, x, (903.3 * x + 16.0) / 116.0)
+    y = np.where(y > 0.008856, y, (903.3 * y + 16.0) / 116.0)
+    z = np.where(z > 0.008856, z, (903.3 * z + 16.0) / 116.0)
+
+    lab = np.empty(linear.shape, dtype=np.float64)
+    lab[..., 0] = np.minimum(100.0, np.maximum(0.0, 116.0 * y - 16.0))
+    lab[..., 1] = (x - y) * 500.0
+    lab[..., 2] = (y - z) * 200.0
+    return lab
+
+def ciede2000_matrix(lab_1, lab_2):
+    '''Get the distances between every pair of two sets of colors utilizing the CIEDE2000 method.
+    Agrees with ciede2000 to within an absolute difference of 1e-9.
+
+    :param lab_1: Array-like of shape (N, 3) of colors in L*ab space.
+    :param lab_2: Array-like of shape (M, 3) of colors in L*ab space.
+    :return: Array of shape (N, M) where element [i, j] is the distance between lab_1[i] and lab_2[j].
+    :rtype: numpy.ndarray
+    '''
+    import numpy as np
+    lab_1 = np.asarray(lab_1, dtype=np.float64).reshape(-1, 3)
+    lab_2 = np.asarray(lab_2, dtype=np.float64).reshape(-1, 3)
+    L_1, a_1, b_1 = lab_1[:, 0, None], lab_1[:, 1, None], lab_1[:, 2, None]
+    L_2, a_2, b_2 = lab_2[None, :, 0], lab_2[None, :, 1], lab_2[None, :, 2]
+
+    # Constants
+    K_H = 1.0
+    K_C = 1.0
+    K_L = 1.0
+
+    # Same arithmetic as ciede2000, one step per line.
+    L_Hat_Prime = (L_1 + L_2)/2.0
+    C_1 = (a_1**2 + b_1**2)**0.5
+    C_2 = (a_2**2 + b_2**2)**0.5
+    C_Hat = (C_1 + C_2)/2.0
+    G = 0.5*(1 - ((C_Hat ** 7)/((C_Hat**7) + (25**7)))**0.5)
+    a_1_Prime = a_1 * (1+G)
+    a_2_Prime = a_2 * (1+G)
+    C_1_Prime = (a_1_Prime**2 + b_1**2)**0.5
+    C_2_Prime = (a_2_Prime**2 + b_2**2)**0.5
+    C_Hat_Prime = (C_1_Prime + C_2_Prime)/2.0
+    h_1_Prime = np.degrees(np.arctan2(np.broadcast_to(b_1, a_1_Prime.shape), a_1_Prime))
+    h_1_Prime = np.where(h_1_Prime >= 0, h_1_Prime + 360.0, h_1_Prime)
+    h_2_Prime = np.degrees(np.arctan2(np.broadcast_to(b_2, a_2_Prime.shape), a_2_Prime))
+    h_2_Prime = np.where(h_2_Prime >= 0, h_2_Prime + 360.0, h_2_Prime)
+    H_Hat_Prime = np.where(
+        np.abs(h_1_Prime - h_2_Prime) > 180.0,
+        (h_1_Prime + h_2_Prime + 360)/2.0,
+        (h_1_Prime + h_2_Prime)/2.0
+    )
+    T = 1.0 - 0.17*np.cos(np.radians(H_Hat_Prime - 30)) + 0.24*np.cos(np.radians(2*H_Hat_Prime)) + 0.32*np.cos(np.radians(3*H_Hat_Prime + 6)) - 0.20*np.cos(np.radians(4*H_Hat_Prime - 63))
+
+    condition = np.abs(h_2_Prime - h_1_Prime)
+    delta_h_Prime = np.where(
+        condition <= 180,
+        h_2_Prime - h_1_Prime,
+        np.where(h_2_Prime <= h_1_Prime, h_2_Prime - h_1_Prime + 360, h_2_Prime - h_1_Prime - 360)
+    )
+
+    delta_L_Prime = L_2 - L_1
+    delta_C_Prime = C_2_Prime - C_1_Prime
+    delta_H_Prime = 2 * (C_1_Prime*C_2_Prime)**0.5 * np.sin(np.radians(delta_h_Prime/2))
+    S_L = 1.0 + (0.015 * (L_Hat_Prime - 50)**2)/((20+(L_Hat_Prime - 50)**2)**0.5)
+    S_C = 1.0 + 0.045 * C_Hat_Prime
+    S_H = 1.0 + 0.015*C_Hat_Prime*T
+    delta_theta = 30*np.exp(np.radians(-((H_Hat_Prime-275)/25)**2))
+    R_C = 2.0 * ((C_Hat_Prime**7)/(C_Hat_Prime**7 + 25**7))
+    R_T = (0.0-R_C)*np.sin(np.radians(2*delta_theta))
+
+    # Put it all together!
+    delta_E_a = (delta_L_Prime / (K_L*S_L))**2
+    delta_E_b = (delta_C_Prime / (K_C*S_C))**2
+    delta_E_c = (delta_H_Prime / (K_H*S_H))**2
+    delta_E_d = R_T * (delta_C_Prime / (K_C * S_C)) * (delta_H_Prime / (K_H * S_H))
+    delta_E = (delta_E_a + delta_E_b + delta_E_c + delta_E_d)**0.5
+    return delta_E
+
 def redmean(rgb_1: Tuple[int, int, int], rgb_2: Tuple[int, int, int]) -> float:
     '''Return the euclidean difference between two colors in RGB colorspace using the redmean method.
 
@@ -150,7 +264,11 @@ def redmean(rgb_1: Tuple[int, int, int], rgb_2: Tuple[int, int, int]) -> float:
     return ( (2+r_bar/256)*delta_r + 4*delta_g + (2 + (255-r_bar)/256) * delta_b ) ** 0.5
 
 
-difference_lookup = {}
+DIFFERENCE_CACHE_SIZE: int = 1 << 18
+
+# Cache of color differences, keyed by the pair of packed colors packed into one integer.
+# Resize with difference_lookup.maxsize, and watch with difference_lookup.snapshot().
+difference_lookup = LRUCache(DIFFERENCE_CACHE_SIZE)
 
 def color_difference(rgb_1: Tuple[int, int, int], rgb_2: Tuple[int, int, int]) -> float:
     '''Return the difference between two colors in RGB colorspace.
@@ -168,19 +286,16 @@ def color_difference(rgb_1: Tuple[int, int, int], rgb_2: Tuple[int, int, int]) -
     if hash_1 == hash_2:
         # Exact match!
         return 0
-    lookup_a = min(hash_1, hash_2)
-    lookup_b = max(hash_1, hash_2)
-    if lookup_a in difference_lookup:
-        if lookup_b in difference_lookup[lookup_a]:
-            return difference_lookup[lookup_a][lookup_b]
-    else:
-        difference_lookup[lookup_a] = {}
+    lookup_key = min(hash_1, hash_2) << 24 | max(hash_1, hash_2)
+    c_diff = difference_lookup.get(lookup_key)
+    if c_diff is not None:
+        return c_diff
 
     lab_1 = rgb_to_lab(rgb_1)
     lab_2 = rgb_to_lab(rgb_2)
     c_diff = ciede2000(lab_1, lab_2)
     # c_diff = redmean(rgb_1, rgb_2)
-    difference_lookup[lookup_a][lookup_b] = c_diff
+    difference_lookup.put(lookup_key, c_diff)
     return c_diff
 
 def find_nearest_color_neighbor(color: Tuple[int, int, int], population: Tuple | List | Dict) -> Tuple[Any, Tuple[int, int, int]]:
@@ -209,4 +324,58 @@ def find_nearest_color_neighbor(color: Tuple[int, int, int], population: Tuple |
             min_difference = difference
             key_value = index
     
-    return (key_value, population[key_value])
\ No newline at end of file
+    return (key_value, population[key_value])
+
+# Differences closer than this to the best match are re-ranked with the scalar metric, as the
+# batched metric may differ from it by up to 1e-9.
+TIE_MARGIN: float = 1e-6
+
+def find_nearest_color_neighbors(colors, population: Tuple | List | Dict):
+    '''Find the nearest color in a population of colors for every color of an array.
+    Bulk counterpart of find_nearest_color_neighbor, giving the same results: colors whose
+    best matches are within TIE_MARGIN of each other are re-ranked with color_difference.
+
+    :param colors: Array-like of shape (..., 3) of colors in RGB colorspace.
+    :param population: Population of colors. If dict, its values are used in order.
+    :type population: Tuple | List | Dict
+    :return: Integer array of shape (...) holding the position in the population of each nearest color.
+    :rtype: numpy.ndarray
+    '''
+    import numpy as np
+    if isinstance(population, dict):
+        population = list(population.values())
+    elif not isinstance(population, list | tuple):
+        raise TypeError(f"population must be type tuple, list, or dict, not type {population.__class__.__name__}")
+    colors = np.asarray(colors)
+    shape = colors.shape[:-1]
+    flat = colors.reshape(-1, 3)
+    palette = np.asarray(population).reshape(-1, 3)
+    palette_lab = rgb_to_lab_many(palette)
+
+    # Bound the size of the intermediate distance matrices.
+    chunk = max(1, (1 << 20) // max(1, len(palette)))
+    nearest = np.empty(len(flat), dtype=np.intp)
+    for start in range(0, len(flat), chunk):
+        block = flat[start:start + chunk]
+        differences = ciede2000_matrix(rgb_to_lab_many(block), palette_lab)
+        differences[(block[:, None, :] == palette[None, :, :]).all(axis=-1)] = 0
+        close = np.isnan(differences).any(axis=1)
+        differences[np.isnan(differences)] = inf
+        best = differences.argmin(axis=1)
+        close |= (differences <= differences[np.arange(len(block)), best, None] + TIE_MARGIN).sum(axis=1) > 1
+        for i in np.flatnonzero(close).tolist():
+            position = _nearest_position(tuple(int(band) for band in block[i]), population)
+            if position is not None:
+                best[i] = position
+        nearest[start:start + chunk] = best
+    return nearest.reshape(shape)
+
+def _nearest_position(color: Tuple[int, int, int], population: Tuple | List) -> int | None:
+    min_difference = inf
+    position = None
+    for index, compare_color in enumerate(population):
+        difference = color_difference(color, tuple(compare_color))
+        if difference < min_difference:
+            min_difference = difference
+            position = index
+    return position
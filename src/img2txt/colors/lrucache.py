@@ -0,0 +1,139 @@
+'''Module containing a bounded least-recently-used cache with statistics.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, NamedTuple
+
+class CacheInfo(NamedTuple):
+    '''Snapshot of the statistics of an LRUCache.'''
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int | None
+
+class LRUCache:
+    '''Mapping with a size limit that evicts the least recently used entry when full.
+    Counts hits, misses and evictions. Safe to share between threads.'''
+
+    __slots__ = ("__entries", "__maxsize", "__hits", "__misses", "__evictions", "__lock")
+
+    def __init__(self, maxsize: int | None = 128):
+        '''
+        :param maxsize: Maximum number of entries. None for no limit.
+        :type maxsize: int | None
+        '''
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock: Lock = Lock()
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__maxsize: int | None = None
+        self.maxsize = maxsize
+
+    @property
+    def maxsize(self) -> int | None:
+        '''Maximum number of entries, or None for no limit.
+        Lowering the limit evicts entries immediately.'''
+        return self.__maxsize
+
+    @maxsize.setter
+    def maxsize(self, new_maxsize: int | None):
+        if new_maxsize is not None:
+            if not isinstance(new_maxsize, int):
+                raise TypeError(f"maxsize should be of type int or None, not type {new_maxsize.__class__.__name__}.")
+            if new_maxsize < 0:
+                raise ValueError(f"maxsize must be >= 0, not {new_maxsize}.")
+        with self.__lock:
+            self.__maxsize = new_maxsize
+            self.__evict()
+
+    @property
+    def hits(self) -> int:
+        '''Number of lookups that found an entry.'''
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        '''Number of lookups that did not find an entry.'''
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        '''Number of entries evicted to respect the size limit.'''
+        return self.__evictions
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        '''Return the value for a key and mark it as recently used.
+
+        :param key: Key to look up.
+        :type key: Hashable
+        :param default: Value to return if the key is not cached.
+        :type default: Any
+        :return: Cached value, or default.
+        :rtype: Any
+        '''
+        with self.__lock:
+            try:
+                value = self.__entries[key]
+            except KeyError:
+                self.__misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        '''Insert or replace an entry, evicting the least recently used entries if needed.
+
+        :param key: Key of the entry.
+        :type key: Hashable
+        :param value: Value of the entry.
+        :type value: Any
+        '''
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            self.__evict()
+
+    def clear(self, *, reset_stats: bool = False):
+        '''Remove every entry.
+
+        :param reset_stats: Also reset the hit, miss and eviction counters. Default is False.
+        :type reset_stats: bool
+        '''
+        with self.__lock:
+            self.__entries.clear()
+            if reset_stats:
+                self.__hits = 0
+                self.__misses = 0
+                self.__evictions = 0
+
+    def snapshot(self) -> CacheInfo:
+        '''Return a consistent snapshot of the cache statistics.
+
+        :return: Hits, misses, evictions, current size and size limit.
+        :rtype: CacheInfo
+        '''
+        with self.__lock:
+            return CacheInfo(self.__hits, self.__misses, self.__evictions, len(self.__entries), self.__maxsize)
+
+    def __evict(self):
+        if self.__maxsize is None:
+            return
+        while len(self.__entries) > self.__maxsize:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(maxsize={self.__maxsize})"
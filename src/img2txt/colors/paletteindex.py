@@ -0,0 +1,138 @@
+'''Module containing a spatial index for finding the nearest color of a palette.
+
+The index is a k-d tree over the L*ab coordinates of the palette. Searching it visits palette
+colors in order of a lower bound on their CIEDE2000 difference, and stops once no remaining color
+can beat the best one found. Only the visited colors are compared with the exact metric, so the
+result is always the same as the linear search of find_nearest_color_neighbor.
+
+The lower bound follows from the terms of ciede2000: the cross term weighted by R_T removes at
+most ``RT_BOUND / 2`` of the chroma and hue terms, S_L and S_C are bounded from above, and the
+chroma and hue differences together are at least the distance in the a*b* plane.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from heapq import heappush, heappop
+from math import inf
+from typing import Any, Dict, List, Tuple
+from img2txt.colors.colordifference import rgb_to_lab, color_difference
+
+# Largest magnitude of R_T: R_C <= 2 and delta_theta is at most 30 degrees.
+RT_BOUND: float = 2.0 * 0.8660254037844387
+CHROMA_WEIGHT: float = 1.0 - RT_BOUND / 2.0
+# The a* axis is stretched by up to 1.5 before the chroma is taken.
+CHROMA_STRETCH: float = 1.5
+# Slack for rounding in the bound, so equal differences are never pruned.
+EPSILON: float = 1e-9
+LEAF_SIZE: int = 8
+
+def _lightness_scale(lightness_mean: float) -> float:
+    return 1.0 + (0.015 * (lightness_mean - 50)**2)/((20+(lightness_mean - 50)**2)**0.5)
+
+def _distance_to_range(value: float, low: float, high: float) -> float:
+    if value < low:
+        return low - value
+    if value > high:
+        return value - high
+    return 0.0
+
+class _Node:
+
+    __slots__ = ("low", "high", "max_chroma", "points", "left", "right")
+
+    def __init__(self, points: List[int], labs: List[Tuple[float, float, float]], chromas: List[float]):
+        self.low = tuple(min(labs[i][axis] for i in points) for axis in range(3))
+        self.high = tuple(max(labs[i][axis] for i in points) for axis in range(3))
+        self.max_chroma = max(chromas[i] for i in points)
+        self.points = None
+        self.left = None
+        self.right = None
+        if len(points) <= LEAF_SIZE:
+            self.points = points
+            return
+        axis = max(range(3), key=lambda axis: self.high[axis] - self.low[axis])
+        points = sorted(points, key=lambda i: labs[i][axis])
+        middle = len(points) // 2
+        self.left = _Node(points[:middle], labs, chromas)
+        self.right = _Node(points[middle:], labs, chromas)
+
+class PaletteIndex:
+    '''Index over a palette for exact nearest color searches with few metric evaluations.'''
+
+    __slots__ = ("__keys", "__population", "__labs", "__chromas", "__root")
+
+    def __init__(self, population: Tuple | List | Dict):
+        '''
+        :param population: Population of colors. If dict, keys used as indices.
+        :type population: Tuple | List | Dict
+        '''
+        if isinstance(population, dict):
+            self.__keys = list(population.keys())
+            self.__population = list(population.values())
+        elif isinstance(population, list | tuple):
+            self.__keys = list(range(len(population)))
+            self.__population = list(population)
+        else:
+            raise TypeError(f"population must be type tuple, list, or dict, not type {population.__class__.__name__}")
+        if len(self.__population) == 0:
+            raise ValueError("population must not be empty.")
+        self.__labs = [rgb_to_lab(rgb) for rgb in self.__population]
+        self.__chromas = [(lab[1]**2 + lab[2]**2)**0.5 for lab in self.__labs]
+        self.__root = _Node(list(range(len(self.__population))), self.__labs, self.__chromas)
+
+    def __len__(self) -> int:
+        return len(self.__population)
+
+    def __bound(self, lab: Tuple[float, float, float], chroma: float, delta_l: float, delta_ab_2: float, max_chroma: float, far_lightness: float) -> float:
+        lightness_scale = _lightness_scale((lab[0] + far_lightness) / 2.0)
+        chroma_scale = 1.0 + 0.045 * CHROMA_STRETCH * (chroma + max_chroma) / 2.0
+        return ((delta_l / lightness_scale)**2 + CHROMA_WEIGHT * delta_ab_2 / chroma_scale**2)**0.5
+
+    def __node_bound(self, lab: Tuple[float, float, float], chroma: float, node: _Node) -> float:
+        delta_l = _distance_to_range(lab[0], node.low[0], node.high[0])
+        delta_a = _distance_to_range(lab[1], node.low[1], node.high[1])
+        delta_b = _distance_to_range(lab[2], node.low[2], node.high[2])
+        # S_L grows with the distance of the mean lightness from 50, so take the node's far end.
+        far_lightness = node.low[0] if abs(lab[0] + node.low[0] - 100) > abs(lab[0] + node.high[0] - 100) else node.high[0]
+        return self.__bound(lab, chroma, delta_l, delta_a**2 + delta_b**2, node.max_chroma, far_lightness)
+
+    def nearest(self, color: Tuple[int, int, int]) -> Tuple[Any, Tuple[int, int, int]]:
+        '''Find the nearest color in the palette.
+
+        :param color: Color to find neighbor of.
+        :type color: Tuple[int, int, int]
+        :return: Tuple containing indice found and nearest color.
+        :rtype: Tuple[Any, Tuple[int, int, int]]
+        '''
+        lab = rgb_to_lab(color)
+        chroma = (lab[1]**2 + lab[2]**2)**0.5
+        best_difference = inf
+        best_index = None
+        # Nodes are visited in order of their bound; the counter breaks ties without comparing nodes.
+        heap = [(0.0, 0, self.__root)]
+        counter = 1
+        while heap:
+            node_bound, _, node = heappop(heap)
+            if node_bound - EPSILON > best_difference:
+                break
+            if node.points is None:
+                for child in (node.left, node.right):
+                    heappush(heap, (self.__node_bound(lab, chroma, child), counter, child))
+                    counter += 1
+                continue
+            for i in node.points:
+                compare_lab = self.__labs[i]
+                delta_ab_2 = (lab[1] - compare_lab[1])**2 + (lab[2] - compare_lab[2])**2
+                bound = self.__bound(lab, chroma, abs(lab[0] - compare_lab[0]), delta_ab_2, self.__chromas[i], compare_lab[0])
+                if bound - EPSILON > best_difference:
+                    continue
+                difference = color_difference(color, self.__population[i])
+                # Equal differences go to the earliest color, as in the linear search.
+                if difference < best_difference or (difference == best_difference and i < best_index):
+                    best_difference = difference
+                    best_index = i
+        if best_index is None:
+            # Only reachable if every difference is NaN; defer to the linear search's behavior.
+            best_index = 0
+        return (self.__keys[best_index], self.__population[best_index])
@@ -0,0 +1,371 @@
+'''Module containing precomputed lookup tables for quantizing colors to a palette.
+
+A table divides RGB space into a grid of ``2**bits`` cells per channel. Cells whose corners all
+share the same nearest palette color store that color's index; cells that straddle a decision
+boundary are marked ambiguous and resolved at lookup time with an exact search through a
+PaletteIndex.
+
+Tables are built once with ``python -m img2txt.colors.quantization build`` and shipped as package
+data. Each table records the palette and metric it was built for, and tables that no longer match
+are ignored in favor of the exact search.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import struct
+import sys
+import zlib
+from array import array
+from math import inf
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+import img2txt.colors.colors as colors
+from img2txt.colors.colordifference import TIE_MARGIN, ciede2000, ciede2000_matrix, rgb_to_lab, rgb_to_lab_many
+from img2txt.colors.paletteindex import PaletteIndex
+from img2txt import profiling
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Bump whenever the output of color_difference changes, so stale tables are not used.
+METRIC_VERSION: str = "ciede2000-1"
+
+FORMAT_VERSION: int = 1
+MAGIC: bytes = b"I2TQ"
+HEADER = struct.Struct("<4sHB32s")
+AMBIGUOUS: int = 0xFFFF
+DEFAULT_BITS: int = 6
+
+def palettes() -> Dict[str, Tuple[List[Any], List[Tuple[int, int, int]]]]:
+    '''Return the palettes that tables can be built for.
+
+    :return: Dict mapping palette name to a tuple of the palette keys and their colors.
+    :rtype: Dict[str, Tuple[List[Any], List[Tuple[int, int, int]]]]
+    '''
+    return {
+        "four_bit_ansi": (list(range(len(colors.FOUR_BIT_ANSI))), [ansi.rgb for ansi in colors.FOUR_BIT_ANSI]),
+        "eight_bit_ansi": (list(range(len(colors.EIGHT_BIT_ANSI))), [ansi.rgb for ansi in colors.EIGHT_BIT_ANSI]),
+        "named_colors": (list(colors.NAMED_COLORS.keys()), list(colors.NAMED_COLORS.values()))
+    }
+
+def palette_digest(population: List[Tuple[int, int, int]], bits: int) -> bytes:
+    '''Return the digest identifying a table for a palette.
+
+    :param population: Colors of the palette, in order.
+    :type population: List[Tuple[int, int, int]]
+    :param bits: Bits per channel of the table.
+    :type bits: int
+    :return: SHA-256 digest over the metric version, bits, and palette colors.
+    :rtype: bytes
+    '''
+    import hashlib
+    digest = hashlib.sha256()
+    digest.update(METRIC_VERSION.encode("ascii"))
+    digest.update(bytes((bits,)))
+    for rgb in population:
+        digest.update(struct.pack("<3i", *rgb))
+    return digest.digest()
+
+def nearest_index(rgb: Tuple[int, int, int], population: List[Tuple[int, int, int]], labs: List[Tuple[float, float, float]]) -> int:
+    '''Find the index of the nearest color without going through the difference lookup.
+    Ties and exact matches are resolved exactly like find_nearest_color_neighbor.
+
+    :param rgb: Color to find neighbor of.
+    :type rgb: Tuple[int, int, int]
+    :param population: Colors of the palette.
+    :type population: List[Tuple[int, int, int]]
+    :param labs: Colors of the palette in L*ab colorspace.
+    :type labs: List[Tuple[float, float, float]]
+    :return: Index of the nearest color.
+    :rtype: int
+    '''
+    lab = rgb_to_lab(rgb)
+    min_difference = inf
+    key_value = None
+    for index, compare_color in enumerate(population):
+        difference = 0 if compare_color == rgb else ciede2000(lab, labs[index])
+        if difference < min_difference:
+            min_difference = difference
+            key_value = index
+    return key_value
+
+def nearest_indices(points: List[Tuple[int, int, int]], population: List[Tuple[int, int, int]], labs: List[Tuple[float, float, float]]) -> List[int]:
+    '''Find the index of the nearest color for many colors, giving the same results as nearest_index.
+    Uses the batched metric when NumPy is installed, re-ranking near ties with the scalar metric.
+
+    :param points: Colors to find neighbors of.
+    :type points: List[Tuple[int, int, int]]
+    :param population: Colors of the palette.
+    :type population: List[Tuple[int, int, int]]
+    :param labs: Colors of the palette in L*ab colorspace.
+    :type labs: List[Tuple[float, float, float]]
+    :return: Index of the nearest color of every point.
+    :rtype: List[int]
+    '''
+    try:
+        import numpy as np
+    except ImportError:
+        return [nearest_index(rgb, population, labs) for rgb in points]
+
+    result = []
+    palette = np.asarray(population)
+    palette_lab = np.asarray(labs)
+    chunk = max(1, (1 << 20) // len(population))
+    for start in range(0, len(points), chunk):
+        block = np.asarray(points[start:start + chunk])
+        differences = ciede2000_matrix(rgb_to_lab_many(block), palette_lab)
+        differences[(block[:, None, :] == palette[None, :, :]).all(axis=-1)] = 0
+        best = differences.argmin(axis=1)
+        close = (differences <= differences[np.arange(len(block)), best, None] + TIE_MARGIN).sum(axis=1) > 1
+        close |= np.isnan(differences).any(axis=1)
+        best = best.tolist()
+        for i in np.flatnonzero(close).tolist():
+            best[i] = nearest_index(points[start + i], population, labs)
+        result.extend(best)
+    return result
+
+class PaletteTable:
+    '''Lookup table mapping RGB colors to the nearest color of a palette.'''
+
+    __slots__ = ("__keys", "__population", "__bits", "__indices", "__index")
+
+    def __init__(self, keys: List[Any], population: List[Tuple[int, int, int]], bits: int, indices: array | None):
+        if indices is not None and len(indices) != 1 << (3 * bits):
+            raise ValueError(f"Table for {bits} bits should have {1 << (3 * bits)} entries, not {len(indices)}.")
+        self.__keys = keys
+        self.__population = population
+        self.__bits = bits
+        self.__indices = indices
+        self.__index: PaletteIndex | None = None
+
+    @property
+    def bits(self) -> int:
+        '''Bits per channel of the grid.'''
+        return self.__bits
+
+    @property
+    def compiled(self) -> bool:
+        '''Whether the table holds precomputed indices. If not, every lookup is an exact search.'''
+        return self.__indices is not None
+
+    @property
+    def keys(self) -> List[Any]:
+        '''Keys of the palette, in order.'''
+        return self.__keys
+
+    @property
+    def population(self) -> List[Tuple[int, int, int]]:
+        '''Colors of the palette, in order.'''
+        return self.__population
+
+    def cell(self, rgb: Tuple[int, int, int]) -> int:
+        '''Return the position of the grid cell containing a color.'''
+        shift = 8 - self.__bits
+        return ((rgb[0] >> shift) << (2 * self.__bits)) | ((rgb[1] >> shift) << self.__bits) | (rgb[2] >> shift)
+
+    def is_ambiguous(self, rgb: Tuple[int, int, int]) -> bool:
+        '''Return whether a color falls in a cell that is resolved with the exact search.'''
+        return self.__indices is None or self.__indices[self.cell(rgb)] == AMBIGUOUS
+
+    def lookup(self, rgb: Tuple[int, int, int]) -> Any:
+        '''Return the key of the palette color nearest to a color.
+
+        :param rgb: Color in RGB colorspace.
+        :type rgb: Tuple[int, int, int]
+        :return: Key of the nearest palette color.
+        :rtype: Any
+        '''
+        profiling.count("palette_lookups")
+        if self.__indices is not None:
+            index = self.__indices[self.cell(rgb)]
+            if index != AMBIGUOUS:
+                return self.__keys[index]
+        with profiling.stage("palette_search"):
+            if self.__index is None:
+                self.__index = PaletteIndex(self.__population)
+            index, _ = self.__index.nearest(rgb)
+        return self.__keys[index]
+
+    @classmethod
+    def build(cls, keys: List[Any], population: List[Tuple[int, int, int]], bits: int = DEFAULT_BITS) -> PaletteTable:
+        '''Build a table by evaluating the exact search at every grid corner.
+
+        :param keys: Keys of the palette, in order.
+        :type keys: List[Any]
+        :param population: Colors of the palette, in order.
+        :type population: List[Tuple[int, int, int]]
+        :param bits: Bits per channel of the grid.
+        :type bits: int
+        :return: Compiled table.
+        :rtype: PaletteTable
+        '''
+        if bits < 1 or bits > 8:
+            raise ValueError(f"bits must be between [1, 8], not {bits}.")
+        size = 1 << bits
+        step = 1 << (8 - bits)
+        corners = [min(i * step, 255) for i in range(size + 1)]
+        labs = [rgb_to_lab(rgb) for rgb in population]
+
+        # Nearest palette index at every corner of the grid.
+        points = size + 1
+        grid = [(red, green, blue) for red in corners for green in corners for blue in corners]
+        nearest = array("H", nearest_indices(grid, population, labs))
+
+        indices = array("H", bytes(2 * size**3))
+        for r_i in range(size):
+            for g_i in range(size):
+                for b_i in range(size):
+                    first = nearest[(r_i * points + g_i) * points + b_i]
+                    decided = all(
+                        nearest[((r_i + dr) * points + g_i + dg) * points + b_i + db] == first
+                        for dr in (0, 1) for dg in (0, 1) for db in (0, 1)
+                    )
+                    indices[(r_i * size + g_i) * size + b_i] = first if decided else AMBIGUOUS
+        return cls(keys, population, bits, indices)
+
+    def save(self, path: Path | str):
+        '''Write the table to a file.
+
+        :param path: Path to write to.
+        :type path: Path | str
+        :raises ValueError: Raised if the table is not compiled.
+        '''
+        if self.__indices is None:
+            raise ValueError("Cannot save a table without precomputed indices.")
+        indices = array("H", self.__indices)
+        if sys.byteorder != "little":
+            indices.byteswap()
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, self.__bits, palette_digest(self.__population, self.__bits))
+        with open(path, "wb") as table_file:
+            table_file.write(header + zlib.compress(indices.tobytes(), 9))
+
+    @classmethod
+    def load(cls, keys: List[Any], population: List[Tuple[int, int, int]], data: bytes) -> PaletteTable | None:
+        '''Load a table written by save.
+
+        :param keys: Keys of the palette, in order.
+        :type keys: List[Any]
+        :param population: Colors of the palette, in order.
+        :type population: List[Tuple[int, int, int]]
+        :param data: Contents of the table file.
+        :type data: bytes
+        :return: Loaded table, or None if the data is malformed or was built for a different\
+             palette, metric, or format version.
+        :rtype: PaletteTable | None
+        '''
+        if len(data) < HEADER.size:
+            return None
+        magic, version, bits, digest = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION or digest != palette_digest(population, bits):
+            return None
+        try:
+            indices = array("H", zlib.decompress(data[HEADER.size:]))
+        except zlib.error:
+            return None
+        if sys.byteorder != "little":
+            indices.byteswap()
+        if len(indices) != 1 << (3 * bits):
+            return None
+        return cls(keys, population, bits, indices)
+
+
+__tables: Dict[str, PaletteTable] = {}
+
+def get_table(name: str) -> PaletteTable:
+    '''Return the table for a palette, loading the shipped table on first use.
+    If no usable table is shipped, the returned table performs the exact search.
+
+    :param name: Name of the palette, as found in palettes().
+    :type name: str
+    :return: Table for the palette.
+    :rtype: PaletteTable
+    '''
+    table = __tables.get(name)
+    if table is None:
+        # Imported here, as importlib.resources is slow to import and only needed once per palette.
+        from importlib import resources
+        keys, population = palettes()[name]
+        resource = resources.files("img2txt.colors").joinpath("tables", f"{name}.lut")
+        try:
+            table = PaletteTable.load(keys, population, resource.read_bytes())
+        except FileNotFoundError:
+            table = None
+        if table is None:
+            table = PaletteTable(keys, population, DEFAULT_BITS, None)
+        __tables[name] = table
+    return table
+
+def nearest(name: str, rgb: Tuple[int, int, int]) -> Any:
+    '''Return the key of the color in a palette nearest to a color.
+
+    :param name: Name of the palette, as found in palettes().
+    :type name: str
+    :param rgb: Color in RGB colorspace.
+    :type rgb: Tuple[int, int, int]
+    :return: Key of the nearest palette color.
+    :rtype: Any
+    '''
+    return get_table(name).lookup(rgb)
+
+def disagreement(table: PaletteTable, samples: List[Tuple[int, int, int]]) -> Tuple[int, int]:
+    '''Compare the table against the exact search.
+
+    :param table: Table to check.
+    :type table: PaletteTable
+    :param samples: Colors to check.
+    :type samples: List[Tuple[int, int, int]]
+    :return: Tuple containing the number of colors that disagree and the number that were ambiguous.
+    :rtype: Tuple[int, int]
+    '''
+    labs = [rgb_to_lab(rgb) for rgb in table.population]
+    mismatches = 0
+    ambiguous = 0
+    for rgb in samples:
+        if table.is_ambiguous(rgb):
+            ambiguous += 1
+        elif table.lookup(rgb) != table.keys[nearest_index(rgb, table.population, labs)]:
+            mismatches += 1
+    return mismatches, ambiguous
+
+
+def main():
+    import argparse
+    import random
+    from pathlib import Path
+
+    argparser = argparse.ArgumentParser(description="Build and check palette quantization tables.")
+    subparsers = argparser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Build tables and write them to the output directory.")
+    build_parser.add_argument("--palette", '-p', action="append", choices=palettes().keys(), help="Palette to build. May be repeated. Default is every palette.")
+    build_parser.add_argument("--bits", '-b', action="store", type=int, default=DEFAULT_BITS, help="Bits per channel of the grid.")
+    build_parser.add_argument("--output", '-o', action="store", type=Path, default=Path(__file__).parent / "tables", help="Output directory.")
+    check_parser = subparsers.add_parser("check", help="Measure disagreement between the shipped tables and the exact search.")
+    check_parser.add_argument("--palette", '-p', action="append", choices=palettes().keys(), help="Palette to check. May be repeated. Default is every palette.")
+    check_parser.add_argument("--samples", '-n', action="store", type=int, default=100000, help="Number of random colors to check.")
+    check_parser.add_argument("--seed", '-s', action="store", type=int, default=0, help="Seed for the random colors.")
+
+    args = argparser.parse_args()
+    names = args.palette or list(palettes().keys())
+
+    if args.command == "build":
+        args.output.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            keys, population = palettes()[name]
+            table = PaletteTable.build(keys, population, args.bits)
+            path = args.output / f"{name}.lut"
+            table.save(path)
+            print(f"{name}: wrote {path}")
+    else:
+        rng = random.Random(args.seed)
+        samples = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(args.samples)]
+        for name in names:
+            table = get_table(name)
+            if not table.compiled:
+                print(f"{name}: no table, lookups use the exact search")
+                continue
+            mismatches, ambiguous = disagreement(table, samples)
+            print(f"{name}: {mismatches}/{len(samples)} disagree ({mismatches / len(samples):.4%}), {ambiguous} resolved exactly")
+
+
+if __name__ == "__main__":
+    main()
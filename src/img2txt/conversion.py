@@ -0,0 +1,213 @@
+'''Module containing the steps shared by every way of converting an image file to text.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import argparse
+from math import ceil, floor
+from os import linesep
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, NamedTuple, TextIO, Tuple
+from img2txt import profiling
+from img2txt.methods import THRESHOLD_METHODS, COLOR_METHODS, COALESCED_COLOR_METHODS, REDUCTION_METHODS
+from img2txt.methods.colors import ColoredTextFormatter
+from img2txt.methods.dithering import DitheringMethod
+from img2txt.methods.reduction import CellReduction
+from img2txt.methods.tolerance import AUTO_TOLERANCE, auto_tolerance, supports_auto_tolerance
+
+if TYPE_CHECKING:
+    import PIL.Image as Image
+
+# Resampling filters for shrinking images to the character limit, from fastest to best quality,
+# by the names of their constants in PIL.Image, so that Pillow is only imported to open an image.
+RESAMPLING_FILTERS = {}
+RESAMPLING_FILTERS["nearest"] = "NEAREST"
+RESAMPLING_FILTERS["box"] = "BOX"
+RESAMPLING_FILTERS["bilinear"] = "BILINEAR"
+RESAMPLING_FILTERS["hamming"] = "HAMMING"
+RESAMPLING_FILTERS["bicubic"] = "BICUBIC"
+RESAMPLING_FILTERS["lanczos"] = "LANCZOS"
+
+# Images are first shrunk by an integer factor, at decode time where the format supports it,
+# to no less than this many times the target size, and then resampled.
+REDUCING_GAP: float = 2.0
+
+class ConversionOptions(NamedTuple):
+    '''Options of a conversion, by the names used on the command line.
+    The tolerance is AUTO_TOLERANCE to choose it for every image, see resolve_tolerance.'''
+    method: str = "luminance"
+    tolerance: float | str = 0.5
+    invert: bool = False
+    color: str = "none"
+    coalesce: bool = False
+    limit: int | None = None
+    resample: str = "bicubic"
+    reduction: str = "mean"
+
+    def threshold_method(self) -> Callable:
+        '''Return the threshold method, as found in THRESHOLD_METHODS.'''
+        return THRESHOLD_METHODS[self.method]
+
+    def formatter(self) -> ColoredTextFormatter:
+        '''Return a new formatter for one document.'''
+        if self.coalesce and self.color in COALESCED_COLOR_METHODS:
+            return COALESCED_COLOR_METHODS[self.color]()
+        return COLOR_METHODS[self.color]()
+
+    def cell_reduction(self) -> CellReduction:
+        '''Return the reduction choosing the color of every character, as found in REDUCTION_METHODS.'''
+        return REDUCTION_METHODS[self.reduction]
+
+def add_conversion_arguments(argparser: argparse.ArgumentParser):
+    '''Add the arguments that select ConversionOptions to a parser.'''
+    argparser.add_argument("--method", '-m', action="store", choices=THRESHOLD_METHODS.keys(), default="luminance", help="Select method to use to determine if a pixel should be included in the image.")
+    argparser.add_argument("--tolerance", '-t', action="store", type=parse_tolerance, default=0.5, help=f"Tolerance limit for determinance method, or \"{AUTO_TOLERANCE}\" to choose it from the histogram of the image.")
+    argparser.add_argument("--invert", '-i', action='store_true', help="Include this flag to invert the determinance method.")
+    argparser.add_argument("--color", '-c', action="store", choices=COLOR_METHODS.keys(), default="none", help="Select color display method.")
+    argparser.add_argument("--coalesce", '-z', action='store_true', help="Only emit ANSI color codes when the color changes, and reset once per line.")
+    argparser.add_argument("--limit", '-l', action="store", type=int, default=None, help="Enforce character limit.")
+    argparser.add_argument("--resample", '-r', action="store", choices=RESAMPLING_FILTERS.keys(), default="bicubic", help="Select filter used to shrink the image to the character limit, from fastest to best quality.")
+    argparser.add_argument("--reduction", action="store", choices=REDUCTION_METHODS.keys(), default="mean", help="Select how the color of a character is chosen from the colors of its dots.")
+
+def parse_tolerance(value: str) -> float | str:
+    '''Parse a tolerance given on the command line: a number, or AUTO_TOLERANCE.
+
+    :raises ValueError: Raised if the tolerance is neither.
+    '''
+    if value == AUTO_TOLERANCE:
+        return AUTO_TOLERANCE
+    return float(value)
+
+def conversion_options(args: argparse.Namespace) -> ConversionOptions:
+    '''Return the ConversionOptions of arguments parsed by a parser set up with add_conversion_arguments.
+
+    :raises ValueError: Raised if the character limit is not positive, or the tolerance is\
+         automatic and the method does not support it.
+    '''
+    if not args.limit is None:
+        if args.limit <= 0:
+            raise ValueError(f"Character limit must be > 0, not {args.limit}")
+    if args.tolerance == AUTO_TOLERANCE and not supports_auto_tolerance(THRESHOLD_METHODS[args.method]):
+        raise ValueError(f"Method {args.method} does not support an automatic tolerance.")
+    return ConversionOptions(args.method, args.tolerance, args.invert, args.color, args.coalesce, args.limit, args.resample, args.reduction)
+
+def missing_dependency(options: ConversionOptions) -> str | None:
+    '''Return why options cannot be converted with the packages installed, or None if they can.
+    Dithering methods threshold whole images at once, which needs NumPy.'''
+    if not isinstance(options.threshold_method(), DitheringMethod):
+        return None
+    from img2txt.characters import arrayengine
+    if arrayengine.NUMPY_AVAILABLE:
+        return None
+    return f"Method {options.method} needs NumPy, which is not installed. Install it, for example with the \"fast\" extra of img2txt."
+
+def resolve_tolerance(image: Image.Image, options: ConversionOptions) -> float:
+    '''Return the tolerance to convert an image with. An automatic tolerance is chosen from the
+    histogram of the image, and noted as "tolerance" in the active profile, if any.
+
+    :param image: Image in RGBA mode, already fitted to the character limit.
+    :type image: Image.Image
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :return: Tolerance in [0.0, 1.0].
+    :rtype: float
+    '''
+    if options.tolerance != AUTO_TOLERANCE:
+        return options.tolerance
+    with profiling.stage("histogram"):
+        tolerance = auto_tolerance(image, options.threshold_method())
+    profiling.note("tolerance", tolerance)
+    return tolerance
+
+def resampling_filter(name: str) -> int:
+    '''Return the Pillow constant of a resampling filter found in RESAMPLING_FILTERS.'''
+    import PIL.Image as Image
+    return getattr(Image, RESAMPLING_FILTERS[name])
+
+def limited_size(size: Tuple[int, int], limit: int | None) -> Tuple[int, int]:
+    '''Return the size an image should be shrunk to so that its text takes at most a number of characters.
+
+    :param size: Width and height of the image.
+    :type size: Tuple[int, int]
+    :param limit: Character limit, or None for no limit.
+    :type limit: int | None
+    :return: Width and height, unchanged if the image is within the limit.
+    :rtype: Tuple[int, int]
+    '''
+    width, height = size
+    image_area = width * height
+    original_character_count = ceil(image_area / 8)
+    if limit and original_character_count > limit:
+        scaling_ratio = ((limit * 8) / image_area)**0.5
+        width = floor(width * scaling_ratio)
+        height = floor(height * scaling_ratio)
+    return (width, height)
+
+def fit_to_limit(image: Image.Image, limit: int | None, resample: str = "bicubic", *, draft: bool = False) -> Image.Image:
+    '''Shrink an image so that its text takes at most a number of characters.
+    The image is reduced by an integer factor before it is resampled. With draft, an image that is
+    still being loaded is also decoded at a reduced size where the format supports it, such as JPEG.
+
+    :param image: Image to shrink.
+    :type image: Image.Image
+    :param limit: Character limit, or None for no limit.
+    :type limit: int | None
+    :param resample: Name of the resampling filter, as found in RESAMPLING_FILTERS. Default is "bicubic".
+    :type resample: str
+    :param draft: Decode the image at a reduced size. This changes the image in place, so it is\
+         only given for images opened to be converted, never for images of the caller. Default is False.
+    :type draft: bool
+    :return: The image, resized if it was over the limit. The image given is left unchanged unless draft is given.
+    :rtype: Image.Image
+    '''
+    size = limited_size(image.size, limit)
+    if size != image.size:
+        if draft:
+            image.draft(None, (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+        with profiling.stage("decode"):
+            image.load()
+        with profiling.stage("resize"):
+            image = image.resize(size, resampling_filter(resample), reducing_gap=REDUCING_GAP)
+    return image
+
+def load_image(fp: str | BinaryIO, limit: int | None = None, resample: str = "bicubic") -> Image.Image:
+    '''Open an image, fit it to a character limit and convert it to RGBA.
+
+    :param fp: Path or binary file of the image.
+    :type fp: str | BinaryIO
+    :param limit: Character limit, or None for no limit.
+    :type limit: int | None
+    :param resample: Name of the resampling filter, as found in RESAMPLING_FILTERS. Default is "bicubic".
+    :type resample: str
+    :return: RGBA image.
+    :rtype: Image.Image
+    '''
+    import PIL.Image as Image
+    with profiling.stage("decode"):
+        image = Image.open(fp)
+    image = fit_to_limit(image, limit, resample, draft=True)
+    with profiling.stage("decode"):
+        image.load()
+    with profiling.stage("convert"):
+        return image.convert('RGBA')
+
+def write_document(output: TextIO, formatter: ColoredTextFormatter, lines: Iterable[str]):
+    '''Write formatted lines as a whole document, followed by a line separator.
+
+    :param output: Text stream to write to.
+    :type output: TextIO
+    :param formatter: Formatter the lines were formatted with.
+    :type formatter: ColoredTextFormatter
+    :param lines: Formatted lines, without line separators.
+    :type lines: Iterable[str]
+    '''
+    with profiling.stage("write"):
+        output.write(formatter.document_start())
+    for i, line in enumerate(profiling.timed("render", lines)):
+        with profiling.stage("write"):
+            if i > 0:
+                output.write(formatter.line_separator)
+            output.write(line)
+    with profiling.stage("write"):
+        output.write(formatter.document_end())
+        output.write(linesep)
@@ -0,0 +1,179 @@
+'''Module containing Converter, the interface for converting images to text from Python.
+
+A Converter is configured once. When it is created, the threshold method is compiled, unless the
+tolerance is chosen for every image, and the palette table of the color method is loaded.
+Formatters that keep no state between documents are also created once. Every call to ``convert``
+then only does the work of its own image.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import io
+import os
+from typing import TYPE_CHECKING, BinaryIO, Iterator, TextIO, Tuple, Union
+from img2txt.characters.brailleimage import BrailleImage
+from img2txt.colors import quantization
+from img2txt.conversion import RESAMPLING_FILTERS, ConversionOptions, fit_to_limit, load_image, missing_dependency, resolve_tolerance, write_document
+from img2txt.methods import THRESHOLD_METHODS, COLOR_METHODS, REDUCTION_METHODS
+from img2txt.methods.colors import ColoredTextFormatter
+from img2txt.methods.reduction import CellReduction
+from img2txt.methods.threshold import CompiledThreshold, compile_threshold
+from img2txt.methods.tolerance import AUTO_TOLERANCE, supports_auto_tolerance
+
+if TYPE_CHECKING:
+    import PIL.Image as Image
+
+# Anything convert accepts: an image, the contents of an image file, raw RGBA pixels, a path, or a binary file.
+Source = Union["Image.Image", bytes, bytearray, memoryview, str, os.PathLike, BinaryIO]
+
+class Converter:
+    '''Converts images to text with fixed options.'''
+
+    __slots__ = ("__options", "__threshold", "__formatter", "__reduction")
+
+    def __init__(self, method: str = "luminance", tolerance: float | str = 0.5, invert: bool = False, color: str = "none", *, coalesce: bool = False, limit: int | None = None, resample: str = "bicubic", reduction: str = "mean"):
+        '''
+        :param method: Threshold method, as found in THRESHOLD_METHODS. Default is "luminance".
+        :type method: str
+        :param tolerance: Tolerance for the method, in [0.0, 1.0], or AUTO_TOLERANCE to choose it\
+             for every image. Default is 0.5.
+        :type tolerance: float | str
+        :param invert: Invert the method. Default is False.
+        :type invert: bool
+        :param color: Color method, as found in COLOR_METHODS. Default is "none".
+        :type color: str
+        :param coalesce: Only emit ANSI color codes when the color changes. Default is False.
+        :type coalesce: bool
+        :param limit: Character limit, or None for no limit. Default is None.
+        :type limit: int | None
+        :param resample: Resampling filter used to shrink images to the limit, as found in\
+             RESAMPLING_FILTERS. Default is "bicubic".
+        :type resample: str
+        :param reduction: How the color of a character is chosen from the colors of its dots, as\
+             found in REDUCTION_METHODS. Default is "mean".
+        :type reduction: str
+        :raises ValueError: Raised if an option is unknown or out of range, or needs a package\
+             that is not installed.
+        '''
+        if method not in THRESHOLD_METHODS:
+            raise ValueError(f"Unknown method {method!r}, expected one of {', '.join(THRESHOLD_METHODS)}.")
+        if color not in COLOR_METHODS:
+            raise ValueError(f"Unknown color {color!r}, expected one of {', '.join(COLOR_METHODS)}.")
+        if resample not in RESAMPLING_FILTERS:
+            raise ValueError(f"Unknown resample {resample!r}, expected one of {', '.join(RESAMPLING_FILTERS)}.")
+        if reduction not in REDUCTION_METHODS:
+            raise ValueError(f"Unknown reduction {reduction!r}, expected one of {', '.join(REDUCTION_METHODS)}.")
+        if limit is not None and limit <= 0:
+            raise ValueError(f"Character limit must be > 0, not {limit}")
+        if tolerance == AUTO_TOLERANCE and not supports_auto_tolerance(THRESHOLD_METHODS[method]):
+            raise ValueError(f"Method {method!r} does not support an automatic tolerance.")
+        self.__options = ConversionOptions(method, tolerance, invert, color, coalesce, limit, resample, reduction)
+        missing = missing_dependency(self.__options)
+        if missing is not None:
+            raise ValueError(missing)
+        self.__reduction: CellReduction = self.__options.cell_reduction()
+        self.__threshold: CompiledThreshold | None = None
+        if tolerance != AUTO_TOLERANCE:
+            self.__threshold = compile_threshold(self.__options.threshold_method(), tolerance, invert)
+        formatter = self.__options.formatter()
+        if formatter.palette is not None:
+            quantization.get_table(formatter.palette)
+        # Formatters that keep state across a document are created for every document instead.
+        self.__formatter: ColoredTextFormatter | None = None if formatter.stateful else formatter
+
+    @classmethod
+    def from_options(cls, options: ConversionOptions) -> Converter:
+        '''Return a Converter for ConversionOptions, such as those given on the command line.'''
+        return cls(options.method, options.tolerance, options.invert, options.color, coalesce=options.coalesce, limit=options.limit, resample=options.resample, reduction=options.reduction)
+
+    @property
+    def options(self) -> ConversionOptions:
+        return self.__options
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.__options._asdict().items())
+        return f"{self.__class__.__name__}({fields})"
+
+    def image(self, source: Source, *, size: Tuple[int, int] | None = None) -> Image.Image:
+        '''Return a source as an RGBA image fitted to the character limit.
+
+        Images already in RGBA mode and within the limit are used as they are, and raw pixels are
+        wrapped without being copied. Images given are never changed.
+
+        :param source: PIL image; contents of an image file as bytes; raw RGBA pixels as any\
+             buffer, if size is given; path; or binary file.
+        :type source: Source
+        :param size: Width and height of raw RGBA pixels. Only given for raw pixels.
+        :type size: Tuple[int, int] | None
+        :return: RGBA image.
+        :rtype: Image.Image
+        :raises ValueError: Raised if raw pixels do not match the size.
+        :raises TypeError: Raised if the source is of an unsupported type.
+        '''
+        import PIL.Image as Image
+        options = self.__options
+        if size is not None:
+            width, height = size
+            pixels = memoryview(source)
+            if pixels.nbytes != width * height * 4:
+                raise ValueError(f"Expected {width * height * 4} bytes of RGBA pixels for size {width}x{height}, not {pixels.nbytes}.")
+            image = Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1)
+            return fit_to_limit(image, options.limit, options.resample)
+        if isinstance(source, Image.Image):
+            image = fit_to_limit(source, options.limit, options.resample)
+            return image if image.mode == "RGBA" else image.convert("RGBA")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        elif not isinstance(source, (str, os.PathLike)) and not hasattr(source, "read"):
+            raise TypeError(f"source should be an image, bytes, a path or a binary file, not type {source.__class__.__name__}.")
+        return load_image(source, options.limit, options.resample)
+
+    def tolerance(self, image: Image.Image) -> float:
+        '''Return the tolerance an image, as returned by image, is converted with: the one given,
+        or the one chosen for the image if it is automatic.'''
+        return resolve_tolerance(image, self.__options)
+
+    def braille(self, source: Source, *, size: Tuple[int, int] | None = None, tolerance: float | None = None) -> BrailleImage:
+        '''Return the BrailleImage of a source. Takes the same arguments as image, and a tolerance
+        to use instead of the one given to the Converter, such as one returned by tolerance.'''
+        image = self.image(source, size=size)
+        threshold = self.__threshold
+        if threshold is None or (tolerance is not None and tolerance != threshold.tolerance):
+            if tolerance is None:
+                tolerance = self.tolerance(image)
+            threshold = compile_threshold(self.__options.threshold_method(), tolerance, self.__options.invert)
+        return BrailleImage.from_image_fast(image, threshold)
+
+    def formatter(self) -> ColoredTextFormatter:
+        '''Return the formatter for a document: the shared one, or a new one if formatters of the color method keep state.'''
+        return self.__formatter if self.__formatter is not None else self.__options.formatter()
+
+    def iter_lines(self, source: Source, *, size: Tuple[int, int] | None = None, tolerance: float | None = None) -> Iterator[str]:
+        '''Convert a source, yielding one formatted line at a time, without line separators and
+        without the text written before and after the document. Takes the same arguments as braille.'''
+        yield from self.braille(source, size=size, tolerance=tolerance).iter_colored_lines(self.formatter(), self.__reduction)
+
+    def convert(self, source: Source, output: TextIO | None = None, *, size: Tuple[int, int] | None = None, tolerance: float | None = None) -> str | None:
+        '''Convert a source to text.
+
+        :param source: Image to convert. See image.
+        :type source: Source
+        :param output: Text stream the document is written to, as it is formatted. If None, the\
+             document is returned instead.
+        :type output: TextIO | None
+        :param size: Width and height of raw RGBA pixels. Only given for raw pixels.
+        :type size: Tuple[int, int] | None
+        :param tolerance: Tolerance to use instead of the one given to the Converter. See braille.
+        :type tolerance: float | None
+        :return: The document, the same text the command line writes, if output is None.
+        :rtype: str | None
+        '''
+        braille = self.braille(source, size=size, tolerance=tolerance)
+        formatter = self.formatter()
+        if output is None:
+            output = io.StringIO(newline="")
+            write_document(output, formatter, braille.iter_colored_lines(formatter, self.__reduction))
+            return output.getvalue()
+        write_document(output, formatter, braille.iter_colored_lines(formatter, self.__reduction))
+        return None
@@ -4,11 +4,18 @@
 '''
 
 import img2txt.methods.threshold as __threshold
+import img2txt.methods.dithering as __dithering
 import img2txt.methods.colors as __colors
+import img2txt.methods.reduction as __reduction
 
 THRESHOLD_METHODS = {}
 THRESHOLD_METHODS["luminance"] = __threshold.luminance_method
 THRESHOLD_METHODS["lightness"] = __threshold.lightness_method
+THRESHOLD_METHODS["bayer2"] = __dithering.bayer2_method
+THRESHOLD_METHODS["bayer4"] = __dithering.bayer4_method
+THRESHOLD_METHODS["bayer8"] = __dithering.bayer8_method
+THRESHOLD_METHODS["floydsteinberg"] = __dithering.floyd_steinberg_method
+THRESHOLD_METHODS["atkinson"] = __dithering.atkinson_method
 
 COLOR_METHODS = {}
 COLOR_METHODS["none"] = __colors.PlaintextFormatter
@@ -16,3 +23,19 @@ COLOR_METHODS["4bitansi"] = __colors.FourBitAnsiFormatter
 COLOR_METHODS["8bitansi"] = __colors.EightBitAnsiFormatter
 COLOR_METHODS["truecoloransi"] = __colors.TrueColorAnsiFormatter
 COLOR_METHODS["html"] = __colors.HTMLFormatter
+COLOR_METHODS["compacthtml"] = __colors.CompactHTMLFormatter
+COLOR_METHODS["compacthtmlhex"] = __colors.CompactHexHTMLFormatter
+
+# Run-aware counterparts of the ANSI color methods.
+COALESCED_COLOR_METHODS = {}
+COALESCED_COLOR_METHODS["4bitansi"] = __colors.CoalescingFourBitAnsiFormatter
+COALESCED_COLOR_METHODS["8bitansi"] = __colors.CoalescingEightBitAnsiFormatter
+COALESCED_COLOR_METHODS["truecoloransi"] = __colors.CoalescingTrueColorAnsiFormatter
+
+# Ways of choosing the color of a character from the colors of its dots.
+REDUCTION_METHODS = {}
+REDUCTION_METHODS["mean"] = __reduction.MeanReduction()
+REDUCTION_METHODS["luminance"] = __reduction.LuminanceReduction()
+REDUCTION_METHODS["median"] = __reduction.MedianReduction()
+REDUCTION_METHODS["saturated"] = __reduction.SaturatedReduction()
+REDUCTION_METHODS["dominant"] = __reduction.DominantReduction()
@@ -4,10 +4,24 @@
 '''
 
 from abc import abstractmethod
+from typing import Dict, Iterable
 from img2txt.characters.coloredtext import ColoredText
+from img2txt.colors.colors import ANSI_RESET
 from os import linesep
 
+# Empty braille pattern; its color is never visible.
+BLANK = chr(0x2800)
+
 class ColoredTextFormatter:
+    '''Base for formatters. Formatters are used either as classes or, for formatters that keep
+    state across a document, as instances.'''
+
+    # Separator written between lines.
+    line_separator: str = linesep
+    # Whether formatting depends on earlier lines of the document, so lines cannot be formatted independently.
+    stateful: bool = False
+    # Name of the palette colors are matched to, as found in quantization.palettes(), if any.
+    palette = None
 
     @staticmethod
     @abstractmethod
@@ -20,14 +34,37 @@ class ColoredTextFormatter:
             raise TypeError(f"colored_text should be of type ColoredText, not type {colored_text.__class__.__name__}")
         return cls._visit(colored_text)
 
+    @classmethod
+    def format_line(cls, colored_texts: Iterable[ColoredText]) -> str:
+        '''Format a whole line of colored text.
+
+        :param colored_texts: Colored text of the line, in order.
+        :type colored_texts: Iterable[ColoredText]
+        :return: Formatted line.
+        :rtype: str
+        '''
+        return "".join(cls.format(colored_text) for colored_text in colored_texts)
+
+    def document_start(self) -> str:
+        '''Return text written before the first line.'''
+        return ""
+
+    def document_end(self) -> str:
+        '''Return text written after the last line.'''
+        return ""
+
 class FourBitAnsiFormatter(ColoredTextFormatter):
 
+    palette: str = "four_bit_ansi"
+
     @staticmethod
     def _visit(colored_text: ColoredText):
         return colored_text.four_bit_ansi()
 
 class EightBitAnsiFormatter(ColoredTextFormatter):
 
+    palette: str = "eight_bit_ansi"
+
     @staticmethod
     def _visit(colored_text: ColoredText):
         return colored_text.eight_bit_ansi()
@@ -40,6 +77,9 @@ class TrueColorAnsiFormatter(ColoredTextFormatter):
 
 class HTMLFormatter(ColoredTextFormatter):
 
+    line_separator: str = "<br>"
+    palette: str = "named_colors"
+
     @staticmethod
     def _visit(colored_text: ColoredText):
         return colored_text.html()
@@ -48,4 +88,128 @@ class PlaintextFormatter(ColoredTextFormatter):
 
     @staticmethod
     def _visit(colored_text: ColoredText):
-        return colored_text.text
\ No newline at end of file
+        return colored_text.text
+
+class CoalescingAnsiFormatter(ColoredTextFormatter):
+    '''Base for ANSI formatters that only emit an escape sequence when the color changes
+    within a line, skip the color of empty cells, and reset once at the end of the line.'''
+
+    @staticmethod
+    @abstractmethod
+    def _escape(colored_text: ColoredText) -> str:
+        pass
+
+    @classmethod
+    def format_line(cls, colored_texts: Iterable[ColoredText]) -> str:
+        parts = []
+        current_escape = None
+        for colored_text in colored_texts:
+            if colored_text.text != BLANK:
+                escape = cls._escape(colored_text)
+                if escape != current_escape:
+                    parts.append(escape)
+                    current_escape = escape
+            parts.append(colored_text.text)
+        if current_escape is not None:
+            parts.append(ANSI_RESET)
+        return "".join(parts)
+
+class CoalescingFourBitAnsiFormatter(CoalescingAnsiFormatter):
+
+    palette: str = "four_bit_ansi"
+
+    @staticmethod
+    def _visit(colored_text: ColoredText):
+        return colored_text.four_bit_ansi()
+
+    @staticmethod
+    def _escape(colored_text: ColoredText):
+        return colored_text.four_bit_ansi_escape()
+
+class CoalescingEightBitAnsiFormatter(CoalescingAnsiFormatter):
+
+    palette: str = "eight_bit_ansi"
+
+    @staticmethod
+    def _visit(colored_text: ColoredText):
+        return colored_text.eight_bit_ansi()
+
+    @staticmethod
+    def _escape(colored_text: ColoredText):
+        return colored_text.eight_bit_ansi_escape()
+
+class CoalescingTrueColorAnsiFormatter(CoalescingAnsiFormatter):
+
+    @staticmethod
+    def _visit(colored_text: ColoredText):
+        return colored_text.true_color_ansi()
+
+    @staticmethod
+    def _escape(colored_text: ColoredText):
+        return colored_text.true_color_ansi_escape()
+
+class CompactHTMLFormatter(ColoredTextFormatter):
+    '''HTML formatter that merges runs of the same color into one span with a short class name,
+    inside a <pre> element. The class names are defined by a single <style> block written after
+    the content, so lines can be written as soon as they are formatted.
+
+    Instances keep the class names of a document; use a new instance for every document.'''
+
+    stateful: bool = True
+    palette: str = "named_colors"
+    # Use the exact color instead of the nearest named color.
+    hex_colors: bool = False
+
+    def __init__(self):
+        self.__class_names: Dict[str, str] = {}
+
+    @staticmethod
+    def _visit(colored_text: ColoredText):
+        return colored_text.html()
+
+    @staticmethod
+    def _class_name(number: int) -> str:
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        name = letters[number % 26]
+        number //= 26
+        while number > 0:
+            name += letters[number % 26]
+            number //= 26
+        return name
+
+    def __class_name(self, colored_text: ColoredText) -> str:
+        color = colored_text.html_hex_color() if self.hex_colors else colored_text.html_color_name()
+        class_name = self.__class_names.get(color)
+        if class_name is None:
+            class_name = self._class_name(len(self.__class_names))
+            self.__class_names[color] = class_name
+        return class_name
+
+    def format_line(self, colored_texts: Iterable[ColoredText]) -> str:
+        parts = []
+        current_class = None
+        for colored_text in colored_texts:
+            if colored_text.text != BLANK:
+                class_name = self.__class_name(colored_text)
+                if class_name != current_class:
+                    if current_class is not None:
+                        parts.append("</span>")
+                    parts.append(f"<span class={class_name}>")
+                    current_class = class_name
+            parts.append(colored_text.text)
+        if current_class is not None:
+            parts.append("</span>")
+        return "".join(parts)
+
+    def document_start(self) -> str:
+        return "<pre>"
+
+    def document_end(self) -> str:
+        rules = "".join(f".{class_name}{{color:{color}}}" for color, class_name in self.__class_names.items())
+        return f"</pre><style>{rules}</style>"
+
+class CompactHexHTMLFormatter(CompactHTMLFormatter):
+    '''CompactHTMLFormatter using exact hex colors.'''
+
+    hex_colors: bool = True
+    palette = None
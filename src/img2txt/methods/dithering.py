@@ -0,0 +1,255 @@
+'''Module containing threshold methods that dither, so that gradients become a density of dots
+rather than a hard edge.
+
+Every pixel is given its luminance, as returned by luminance_method but in fixed point, shifted by
+the tolerance so that the tolerance plays the same part as for luminance_method: the higher it is,
+the more dots are included. Ordered dithering compares that value to a tiled Bayer matrix, entirely with array
+arithmetic. Error diffusion decides pixels in raster order and spreads the error of each over the
+neighbours not yet decided. A pixel only waits for pixels on earlier anti-diagonals
+``x + slope * y``, so a whole anti-diagonal is decided at once with array operations. As the error
+is an integer, the result does not depend on the order its shares arrive in, and an image dithered
+in horizontal bands is the same as the image dithered whole.
+
+Dithering thresholds are spatial, see CompiledThreshold.spatial, and need NumPy.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from abc import abstractmethod
+from functools import partial
+from typing import Callable, List, Tuple
+from img2txt.methods.threshold import CompiledThreshold, luminance_method
+
+# Fixed-point value of 1.0.
+FIXED_ONE: int = 1 << 12
+
+# Error diffusion kernels, as (dx, dy, weight) of every neighbour, and the shift the weighted
+# error is divided by.
+FLOYD_STEINBERG: Tuple[Tuple[int, int, int], ...] = ((1, 0, 7), (-1, 1, 3), (0, 1, 5), (1, 1, 1))
+FLOYD_STEINBERG_SHIFT: int = 4
+# Atkinson only spreads 6/8 of the error, which keeps highlights and shadows clean.
+ATKINSON: Tuple[Tuple[int, int, int], ...] = ((1, 0, 1), (2, 0, 1), (-1, 1, 1), (0, 1, 1), (1, 1, 1), (0, 2, 1))
+ATKINSON_SHIFT: int = 3
+
+def bayer_matrix(size: int) -> List[List[int]]:
+    '''Return the Bayer index matrix of a size.
+
+    :param size: Width and height of the matrix, a power of two.
+    :type size: int
+    :return: Rows of the matrix, holding every index in [0, size**2) once.
+    :rtype: List[List[int]]
+    :raises ValueError: Raised if the size is not a power of two.
+    '''
+    if size < 1 or size & (size - 1):
+        raise ValueError(f"Bayer matrix size must be a power of two, not {size}.")
+    matrix = [[0]]
+    while len(matrix) < size:
+        n = len(matrix)
+        matrix = [[4 * matrix[y % n][x % n] + ((0, 2), (3, 1))[y // n][x // n] for x in range(2 * n)] for y in range(2 * n)]
+    return matrix
+
+class DitherThreshold(CompiledThreshold):
+    '''Base of the dithering thresholds.'''
+
+    __slots__ = ("__red", "__green", "__blue", "__bias")
+
+    spatial = True
+
+    def __init__(self, tolerance: float, invert: bool):
+        super().__init__(luminance_method.value_method, tolerance, invert)
+        self.__red = [round(.299 * ((value / 255.0)**2) * FIXED_ONE) for value in range(256)]
+        self.__green = [round(.587 * ((value / 255.0)**2) * FIXED_ONE) for value in range(256)]
+        self.__blue = [round(.114 * ((value / 255.0)**2) * FIXED_ONE) for value in range(256)]
+        self.__bias = round((0.5 - tolerance) * FIXED_ONE)
+
+    def __call__(self, pixel: Tuple[int, int, int]) -> bool:
+        raise TypeError(f"{self.__class__.__name__} thresholds whole images, not single pixels; use mask.")
+
+    def values(self, rgb):
+        '''Return the luminance of every pixel in fixed point, shifted by the tolerance so that
+        pixels are dark below FIXED_ONE // 2 and light above it.
+
+        :param rgb: Array of shape (..., 3) and dtype uint8.
+        :return: Array of shape (...) and dtype int32.
+        '''
+        import numpy as np
+        luminance = np.array(self.__red, dtype=np.int32)[rgb[..., 0]]
+        luminance += np.array(self.__green, dtype=np.int32)[rgb[..., 1]]
+        luminance += np.array(self.__blue, dtype=np.int32)[rgb[..., 2]]
+        luminance += self.__bias
+        return luminance
+
+    def mask(self, rgb):
+        '''Dither a whole image.
+
+        :param rgb: Array of shape (height, width, 3) and dtype uint8.
+        :return: Boolean array of shape (height, width).
+        '''
+        return self.dither(rgb, 0, None)[0]
+
+    def in_bands(self) -> CompiledThreshold:
+        return DitherBands(self)
+
+    @abstractmethod
+    def dither(self, rgb, top: int, carry):
+        '''Dither a horizontal band of an image.
+
+        :param rgb: Array of shape (rows, width, 3) and dtype uint8.
+        :param top: Row of the image the band starts at.
+        :type top: int
+        :param carry: What the band above left for this one, or None for the first band.
+        :return: Tuple of the boolean mask of the band, of shape (rows, width), and what this\
+             band leaves for the one below.
+        '''
+
+class DitherBands(CompiledThreshold):
+    '''A DitherThreshold applied to the horizontal bands of one image in turn, as returned by
+    DitherThreshold.in_bands.'''
+
+    __slots__ = ("__threshold", "__top", "__carry")
+
+    spatial = True
+
+    def __init__(self, threshold: DitherThreshold):
+        super().__init__(luminance_method.value_method, threshold.tolerance, threshold.invert)
+        self.__threshold = threshold
+        self.__top = 0
+        self.__carry = None
+
+    def __call__(self, pixel: Tuple[int, int, int]) -> bool:
+        return self.__threshold(pixel)
+
+    def mask(self, rgb):
+        mask, self.__carry = self.__threshold.dither(rgb, self.__top, self.__carry)
+        self.__top += rgb.shape[0]
+        return mask
+
+    def in_bands(self) -> CompiledThreshold:
+        return self.__threshold.in_bands()
+
+class OrderedDither(DitherThreshold):
+    '''Ordered dithering with a Bayer matrix tiled over the image from its top left corner.
+    Every pixel is decided on its own, so frames of an animation only change where the image does.'''
+
+    __slots__ = ("__thresholds",)
+
+    def __init__(self, size: int, tolerance: float, invert: bool):
+        '''
+        :param size: Width and height of the Bayer matrix, a power of two.
+        :type size: int
+        :param tolerance: Tolerance for the method.
+        :type tolerance: float
+        :param invert: Invert the method.
+        :type invert: bool
+        '''
+        super().__init__(tolerance, invert)
+        self.__thresholds = [[round((index + 0.5) / size**2 * FIXED_ONE) for index in row] for row in bayer_matrix(size)]
+
+    def dither(self, rgb, top: int, carry):
+        import numpy as np
+        rows, width = rgb.shape[:2]
+        thresholds = np.array(self.__thresholds, dtype=np.int32)
+        size = len(thresholds)
+        tiled = thresholds[((top + np.arange(rows)) % size)[:, None], (np.arange(width) % size)[None, :]]
+        return (self.values(rgb) < tiled) ^ self.invert, None
+
+class ErrorDiffusion(DitherThreshold):
+    '''Error diffusion dithering. Pixels are decided in raster order, and the error of each is
+    spread over its neighbours to the right and below by a kernel.'''
+
+    __slots__ = ("__kernel", "__shift", "__slope", "__left", "__right", "__below")
+
+    def __init__(self, kernel: Tuple[Tuple[int, int, int], ...], shift: int, tolerance: float, invert: bool):
+        '''
+        :param kernel: (dx, dy, weight) of every neighbour the error is spread over. dy is never\
+             negative, and dx is positive where dy is 0.
+        :type kernel: Tuple[Tuple[int, int, int], ...]
+        :param shift: The share of the error of a neighbour is ``(error * weight) >> shift``.
+        :type shift: int
+        :param tolerance: Tolerance for the method.
+        :type tolerance: float
+        :param invert: Invert the method.
+        :type invert: bool
+        :raises ValueError: Raised if the kernel spreads the error to pixels already decided.
+        '''
+        super().__init__(tolerance, invert)
+        if any(dy < 0 or (dy == 0 and dx <= 0) for dx, dy, _ in kernel):
+            raise ValueError("kernel must only spread the error to the right and below.")
+        self.__kernel = tuple(kernel)
+        self.__shift = shift
+        # Smallest slope for which every neighbour is on a later anti-diagonal.
+        self.__slope = max([1] + [-(-(1 - dx) // dy) for dx, dy, _ in kernel if dy > 0])
+        self.__left = max([0] + [-dx for dx, _, _ in kernel])
+        self.__right = max([0] + [dx for dx, _, _ in kernel])
+        self.__below = max(dy for _, dy, _ in kernel)
+
+    def dither(self, rgb, top: int, carry):
+        import numpy as np
+        from numpy.lib.stride_tricks import as_strided
+        rows, width = rgb.shape[:2]
+        slope = self.__slope
+        left = self.__left
+        below = self.__below
+        # Values, skewed so that anti-diagonal ``t`` is row ``t + left`` and pixel
+        # (x, y) is at [x + slope * y + left, y], with room for the error spread past either edge
+        # and below the band. Every anti-diagonal, and every neighbour of one, is then a slice.
+        columns = rows + below
+        skewed = np.zeros((width + slope * columns + left + self.__right, columns), dtype=np.int32)
+        item = skewed.itemsize
+        pixels = as_strided(skewed[left:], shape=(columns, width), strides=((slope * columns + 1) * item, columns * item))
+        pixels[:rows] = self.values(rgb)
+        if carry is not None:
+            pixels[:below] += carry
+
+        # Neighbours sharing a weight get the same share, so it is only worked out once.
+        shares = {}
+        for dx, dy, weight in self.__kernel:
+            shares.setdefault(weight, []).append((dx + slope * dy, dy))
+        shares = list(shares.items())
+        half = FIXED_ONE // 2
+        shift = self.__shift
+        for diagonal in range(width + slope * (rows - 1) if rows else 0):
+            first = max(0, -(-(diagonal - width + 1) // slope))
+            last = min(rows - 1, diagonal // slope) + 1
+            row = diagonal + left
+            values = skewed[row, first:last]
+            error = np.where(values >= half, values - FIXED_ONE, values)
+            for weight, neighbours in shares:
+                share = (error * weight) >> shift
+                for step, dy in neighbours:
+                    skewed[row + step, first + dy:last + dy] += share
+        # Pixels keep their value once decided.
+        light = pixels[:rows] >= half
+        return light ^ (not self.invert), pixels[rows:].copy()
+
+class DitheringMethod:
+    '''Threshold method, as found in THRESHOLD_METHODS, that compiles to a DitherThreshold.
+    Unlike other threshold methods, it cannot be called with a single pixel.'''
+
+    __slots__ = ("name", "compile_method")
+
+    # Value compared to the tolerance, shifted, by every DitherThreshold.
+    value_method = staticmethod(luminance_method.value_method)
+
+    def __init__(self, name: str, compile_method: Callable[[float, bool], DitherThreshold]):
+        '''
+        :param name: Name of the method.
+        :type name: str
+        :param compile_method: Function taking a tolerance and invert flag and returning the DitherThreshold.
+        :type compile_method: Callable[[float, bool], DitherThreshold]
+        '''
+        self.name = name
+        self.compile_method = compile_method
+
+    def __call__(self, *args, **kwargs):
+        raise TypeError(f"{self.name} thresholds whole images, not single pixels; compile it with compile_threshold.")
+
+    def __repr__(self) -> str:
+        return f"<dithering method {self.name}>"
+
+bayer2_method = DitheringMethod("bayer2_method", partial(OrderedDither, 2))
+bayer4_method = DitheringMethod("bayer4_method", partial(OrderedDither, 4))
+bayer8_method = DitheringMethod("bayer8_method", partial(OrderedDither, 8))
+floyd_steinberg_method = DitheringMethod("floyd_steinberg_method", partial(ErrorDiffusion, FLOYD_STEINBERG, FLOYD_STEINBERG_SHIFT))
+atkinson_method = DitheringMethod("atkinson_method", partial(ErrorDiffusion, ATKINSON, ATKINSON_SHIFT))
@@ -0,0 +1,183 @@
+'''Module containing the ways the color of a braille character is chosen from the colors of its
+set dots.
+
+Every reduction can be called once per cell of a color buffer, or applied to every cell of an
+image at once through CellReduction.reduce, which needs NumPy. Both use the same integer
+arithmetic and give the same colors.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from abc import abstractmethod
+from typing import List, Tuple
+from img2txt.characters.braillesegment import DOT_COUNT, SET_DOTS, average_dot_color
+
+def luminance_weight(rgb: Tuple[int, int, int]) -> int:
+    '''Return the weight of a dot in a luminance-weighted mean: its Rec. 709 luminance in
+    [0, 255], plus one so that black dots still count.'''
+    return (54 * rgb[0] + 183 * rgb[1] + 19 * rgb[2]) // 256 + 1
+
+def chroma(rgb: Tuple[int, int, int]) -> int:
+    '''Return the chroma of a color, the difference between its largest and smallest band.'''
+    return max(rgb) - min(rgb)
+
+class CellReduction:
+    '''Chooses the color of a cell from the colors of its set dots.
+    Cells without set dots are given (0, 0, 0).'''
+
+    __slots__ = ()
+
+    def __call__(self, colors: bytearray, index: int, flags: int) -> Tuple[int, int, int]:
+        '''Reduce one cell of a color buffer.
+
+        :param colors: Buffer with three bytes of color per dot, eight dots per cell.
+        :type colors: bytearray
+        :param index: Index of the cell within the buffer.
+        :type index: int
+        :param flags: Flags of the cell.
+        :type flags: int
+        :return: Color of the cell.
+        :rtype: Tuple[int, int, int]
+        '''
+        if flags == 0:
+            return (0, 0, 0)
+        start = index * DOT_COUNT * 3
+        return self._reduce_dots([tuple(colors[start + dot * 3:start + dot * 3 + 3]) for dot in SET_DOTS[flags]])
+
+    @abstractmethod
+    def _reduce_dots(self, dots: List[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+        '''Reduce the colors of the set dots of a cell, in order of their flags; there is at least one.'''
+
+    @abstractmethod
+    def reduce(self, flags, colors):
+        '''Reduce every cell at once. Requires NumPy.
+
+        :param flags: Array of shape (cells,) and dtype uint8.
+        :param colors: Array of shape (cells, 8, 3) and dtype uint8, where dot ``i`` corresponds\
+             to the flag ``1 << i``.
+        :return: Array of shape (cells, 3) and dtype uint8.
+        '''
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+def dot_mask(flags):
+    '''Return which dots of every cell are set, as a boolean array of shape (cells, 8).'''
+    import numpy as np
+    return ((flags[:, None] >> np.arange(DOT_COUNT, dtype=np.uint8)) & 1).astype(bool)
+
+class MeanReduction(CellReduction):
+    '''Integer mean of every band.'''
+
+    __slots__ = ()
+
+    def __call__(self, colors: bytearray, index: int, flags: int) -> Tuple[int, int, int]:
+        return average_dot_color(colors, index, flags)
+
+    def _reduce_dots(self, dots: List[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+        return tuple(sum(dot[band] for dot in dots) // len(dots) for band in range(3))
+
+    def reduce(self, flags, colors):
+        import numpy as np
+        mask = dot_mask(flags)
+        counts = np.maximum(mask.sum(axis=1), 1)[:, None]
+        sums = (colors * mask[..., None]).sum(axis=1, dtype=np.uint32)
+        return (sums // counts).astype(np.uint8)
+
+class LuminanceReduction(CellReduction):
+    '''Mean weighted by the luminance of every dot, so that bright dots, which stand out the
+    most, count the most.'''
+
+    __slots__ = ()
+
+    def _reduce_dots(self, dots: List[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+        weights = [luminance_weight(dot) for dot in dots]
+        total = sum(weights)
+        return tuple(sum(weight * dot[band] for weight, dot in zip(weights, dots)) // total for band in range(3))
+
+    def reduce(self, flags, colors):
+        import numpy as np
+        wide = colors.astype(np.uint32)
+        weights = (54 * wide[..., 0] + 183 * wide[..., 1] + 19 * wide[..., 2]) // 256 + 1
+        weights *= dot_mask(flags)
+        totals = np.maximum(weights.sum(axis=1), 1)[:, None]
+        return ((wide * weights[..., None]).sum(axis=1) // totals).astype(np.uint8)
+
+class MedianReduction(CellReduction):
+    '''Median of every band; the mean of the two middle values, rounded down, for an even
+    number of dots. Ignores the odd dot of a different color at an edge.'''
+
+    __slots__ = ()
+
+    def _reduce_dots(self, dots: List[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+        count = len(dots)
+        median = []
+        for band in range(3):
+            values = sorted(dot[band] for dot in dots)
+            median.append((values[(count - 1) // 2] + values[count // 2]) // 2)
+        return tuple(median)
+
+    def reduce(self, flags, colors):
+        import numpy as np
+        mask = dot_mask(flags)
+        counts = mask.sum(axis=1)
+        # Unset dots sort after every set dot.
+        values = np.where(mask[..., None], colors.astype(np.uint16), 256)
+        values.sort(axis=1)
+        low = np.take_along_axis(values, np.maximum(counts - 1, 0)[:, None, None] // 2, axis=1)[:, 0]
+        high = np.take_along_axis(values, (counts // 2)[:, None, None], axis=1)[:, 0]
+        median = (low + high) // 2
+        median[counts == 0] = 0
+        return median.astype(np.uint8)
+
+class SaturatedReduction(CellReduction):
+    '''Color of the most saturated dot, by chroma; the first of them if several are equally
+    saturated. Keeps colors vivid where the mean would turn them grey.'''
+
+    __slots__ = ()
+
+    def _reduce_dots(self, dots: List[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+        best = dots[0]
+        best_chroma = chroma(best)
+        for dot in dots[1:]:
+            dot_chroma = chroma(dot)
+            if dot_chroma > best_chroma:
+                best, best_chroma = dot, dot_chroma
+        return best
+
+    def reduce(self, flags, colors):
+        import numpy as np
+        mask = dot_mask(flags)
+        chromas = colors.max(axis=2).astype(np.int16) - colors.min(axis=2)
+        chromas[~mask] = -1
+        best = chromas.argmax(axis=1)
+        chosen = np.take_along_axis(colors, best[:, None, None], axis=1)[:, 0]
+        chosen[~mask.any(axis=1)] = 0
+        return chosen
+
+class DominantReduction(CellReduction):
+    '''Color shared by the most dots; the first of them if several are shared by as many.'''
+
+    __slots__ = ()
+
+    def _reduce_dots(self, dots: List[Tuple[int, int, int]]) -> Tuple[int, int, int]:
+        best = dots[0]
+        best_count = 0
+        for dot in dots:
+            count = dots.count(dot)
+            if count > best_count:
+                best, best_count = dot, count
+        return best
+
+    def reduce(self, flags, colors):
+        import numpy as np
+        mask = dot_mask(flags)
+        wide = colors.astype(np.uint32)
+        packed = (wide[..., 0] << 16) | (wide[..., 1] << 8) | wide[..., 2]
+        counts = ((packed[:, :, None] == packed[:, None, :]) & mask[:, None, :]).sum(axis=2)
+        counts[~mask] = -1
+        best = counts.argmax(axis=1)
+        chosen = np.take_along_axis(colors, best[:, None, None], axis=1)[:, 0]
+        chosen[~mask.any(axis=1)] = 0
+        return chosen
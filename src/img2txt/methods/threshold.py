@@ -1,22 +1,151 @@
 '''Module containing functions for filtering lists of pixels to turn into text.
 
+Every threshold method can be compiled for a tolerance and invert flag with compile_threshold.
+The compiled form validates its arguments once and is then called once per pixel, or once per
+image through CompiledThreshold.mask. Methods decorated with threshold_method can supply their own
+compiled form through the decorated method's ``compiler`` attribute. Spatial thresholds, such as
+those of img2txt.methods.dithering, depend on where a pixel is and on its neighbours, and only
+have the whole-image form.
+
 :author: Willow Ciesialka
 '''
 
-from typing import Tuple
-from img2txt.colors.colordifference import rgb_to_lab
+from __future__ import annotations
+import struct
+from functools import wraps
+from typing import Callable, Tuple
+from img2txt.colors.colordifference import rgb_to_lab, gamma_expand
+
+def validate_tolerance(tolerance: float):
+    '''Raise if a tolerance is outside of [0.0, 1.0].
+
+    :param tolerance: Tolerance to check.
+    :type tolerance: float
+    :raises ValueError: Raised if the tolerance is outside of [0.0, 1.0].
+    '''
+    if tolerance > 1 or tolerance < 0:
+        raise ValueError("tolerance must be between [0.0, 1.0].")
+
+class CompiledThreshold:
+    '''Threshold method compiled for a tolerance and invert flag.
+    Calling it with a pixel returns whether the pixel should be included in the image.'''
+
+    __slots__ = ("__method", "__tolerance", "__invert")
+
+    # Whether a pixel's result depends on its position and neighbours. Spatial thresholds cannot
+    # be called with a single pixel, and mask must be given the pixels of a whole image at once.
+    spatial: bool = False
+
+    def __init__(self, method: Callable, tolerance: float, invert: bool):
+        '''
+        :param method: Function returning the value of a pixel, to be compared to the tolerance.
+        :type method: Callable
+        :param tolerance: Tolerance for the method.
+        :type tolerance: float
+        :param invert: Invert the method.
+        :type invert: bool
+        '''
+        validate_tolerance(tolerance)
+        self.__method = method
+        self.__tolerance = tolerance
+        self.__invert = bool(invert)
+
+    @property
+    def tolerance(self) -> float:
+        return self.__tolerance
+
+    @property
+    def invert(self) -> bool:
+        return self.__invert
+
+    def __call__(self, pixel: Tuple[int, int, int]) -> bool:
+        return bool((self.__method(pixel) < self.__tolerance) ^ self.__invert)
+
+    def mask(self, rgb):
+        '''Evaluate the threshold over an array of pixels. Requires NumPy.
+        This implementation calls the compiled form once per distinct color; subclasses
+        override it with array arithmetic.
+
+        :param rgb: Array of shape (..., 3) and dtype uint8. For spatial thresholds, the pixels of\
+             a whole image, of shape (height, width, 3).
+        :return: Boolean array of shape (...).
+        '''
+        import numpy as np
+        packed = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+        unique, inverse = np.unique(packed, return_inverse=True)
+        results = np.fromiter(
+            (self(((p >> 16) & 0xFF, (p >> 8) & 0xFF, p & 0xFF)) for p in unique.tolist()),
+            dtype=bool,
+            count=len(unique)
+        )
+        return results[inverse].reshape(packed.shape)
+
+    def in_bands(self) -> CompiledThreshold:
+        '''Return a threshold for one image whose horizontal bands are passed to mask in turn,
+        from top to bottom, giving the same results as the whole image at once.
+        Thresholds that are not spatial are returned as they are.'''
+        return self
+
+class CallableThreshold(CompiledThreshold):
+    '''Compiled form of a plain callable that takes a pixel, tolerance, and invert flag
+    and returns whether the pixel should be included.'''
+
+    __slots__ = ("__predicate",)
+
+    def __init__(self, predicate: Callable, tolerance: float, invert: bool):
+        super().__init__(predicate, tolerance, invert)
+        self.__predicate = predicate
+
+    def __call__(self, pixel: Tuple[int, int, int]) -> bool:
+        return bool(self.__predicate(pixel, tolerance=self.tolerance, invert=self.invert))
 
 def threshold_method(method):
     '''Decorator for threshold methods. Gets result of luminance and compares it
     to tolerance. Then, inverts if necessary.
+
+    The decorated method has a ``compiler`` attribute, which can be used as a decorator to supply
+    a function taking a tolerance and invert flag and returning a CompiledThreshold.
     '''
+    @wraps(method)
     def threshold_method_decorator(*args, tolerance: float = 0.5, invert: bool = False, **kwargs):
-        if tolerance > 1 or tolerance < 0:
-            raise ValueError("tolerance must be between [0.0, 1.0].")
+        validate_tolerance(tolerance)
         value = method(*args, **kwargs)
         return bool((value < tolerance) ^ invert)
+
+    def compiler(compile_method: Callable[[float, bool], CompiledThreshold]):
+        threshold_method_decorator.compile_method = compile_method
+        return compile_method
+
+    threshold_method_decorator.value_method = method
+    threshold_method_decorator.compile_method = None
+    threshold_method_decorator.compiler = compiler
     return threshold_method_decorator
 
+def compile_threshold(method: Callable, tolerance: float = 0.5, invert: bool = False) -> CompiledThreshold:
+    '''Compile a threshold method, as found in THRESHOLD_METHODS.
+    A method that is already compiled is returned as it is, with its own tolerance and invert flag.
+
+    :param method: Threshold method.
+    :type method: Callable
+    :param tolerance: Tolerance for the method.
+    :type tolerance: float
+    :param invert: Invert the method.
+    :type invert: bool
+    :return: Compiled threshold.
+    :rtype: CompiledThreshold
+    :raises ValueError: Raised if the tolerance is outside of [0.0, 1.0].
+    '''
+    validate_tolerance(tolerance)
+    if isinstance(method, CompiledThreshold):
+        return method
+    compile_method = getattr(method, "compile_method", None)
+    if compile_method is not None:
+        return compile_method(tolerance, invert)
+    value_method = getattr(method, "value_method", None)
+    if value_method is not None:
+        return CompiledThreshold(value_method, tolerance, invert)
+    return CallableThreshold(method, tolerance, invert)
+
 @threshold_method
 def luminance_method(pixel: Tuple[int, int, int]) -> float:
     '''Get the luminance of the pixel.
@@ -30,7 +159,7 @@ def luminance_method(pixel: Tuple[int, int, int]) -> float:
     g = pixel[1] / 255.0
     b = pixel[2] / 255.0
     # If luminance is less (more if invert) than threshold, add to list.
-    # Otherwise, add None. 
+    # Otherwise, add None.
     luminance = ( .299 * (r**2) + .587 * (g**2) + .114 * (b**2) )
     return luminance
 
@@ -47,4 +176,88 @@ def lightness_method(pixel: Tuple[int, int, int]) -> float:
     lightness = lab[0]/100
     if lightness < 0.0 or lightness > 1.0:
         raise ValueError(f"Lightness should fall between [0.0, 1.0], not {lightness}.")
-    return lightness
\ No newline at end of file
+    return lightness
+
+class LuminanceThreshold(CompiledThreshold):
+    '''Compiled luminance_method. Each channel's weighted square is tabulated and the terms are
+    summed in the same order as luminance_method, so results are identical.'''
+
+    __slots__ = ("__red", "__green", "__blue")
+
+    def __init__(self, tolerance: float, invert: bool):
+        super().__init__(luminance_method.value_method, tolerance, invert)
+        self.__red = [.299 * ((value / 255.0)**2) for value in range(256)]
+        self.__green = [.587 * ((value / 255.0)**2) for value in range(256)]
+        self.__blue = [.114 * ((value / 255.0)**2) for value in range(256)]
+
+    def __call__(self, pixel: Tuple[int, int, int]) -> bool:
+        luminance = self.__red[pixel[0]] + self.__green[pixel[1]] + self.__blue[pixel[2]]
+        return (luminance < self.tolerance) != self.invert
+
+    def mask(self, rgb):
+        import numpy as np
+        luminance = np.array(self.__red)[rgb[..., 0]] + np.array(self.__green)[rgb[..., 1]] + np.array(self.__blue)[rgb[..., 2]]
+        return (luminance < self.tolerance) ^ self.invert
+
+luminance_method.compiler(LuminanceThreshold)
+
+def _float_bits(value: float) -> int:
+    return struct.unpack("<q", struct.pack("<d", value))[0]
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<q", bits))[0]
+
+def _first_float(low: float, high: float, predicate: Callable[[float], bool]) -> float:
+    '''Return the smallest non-negative float in [low, high] for which a monotone predicate holds,
+    or high if there is none.'''
+    low_bits = _float_bits(low)
+    high_bits = _float_bits(high)
+    while low_bits < high_bits:
+        middle = (low_bits + high_bits) // 2
+        if predicate(_bits_float(middle)):
+            high_bits = middle
+        else:
+            low_bits = middle + 1
+    return _bits_float(low_bits)
+
+class LightnessThreshold(CompiledThreshold):
+    '''Compiled lightness_method. The relative luminance Y of a pixel is the sum of tabulated
+    per-channel terms, and lightness is a function of Y alone. That function rises, drops at the
+    branch of xyz_to_lab, and rises again, so the tolerance becomes a cutoff on Y for each branch.
+    The cutoffs are found by bisection over the exact arithmetic of rgb_to_lab.'''
+
+    __slots__ = ("__red", "__green", "__blue", "__branch", "__low_cutoff", "__high_cutoff")
+
+    # Y ranges over [0, 1] plus rounding.
+    MAX_Y: float = 2.0
+
+    def __init__(self, tolerance: float, invert: bool):
+        super().__init__(lightness_method.value_method, tolerance, invert)
+        linear = [gamma_expand(float(value) / 255.0) for value in range(256)]
+        self.__red = [value * 0.2126729 for value in linear]
+        self.__green = [value * 0.7151522 for value in linear]
+        self.__blue = [value * 0.0721750 for value in linear]
+        # First Y on the upper branch, then the first Y on each branch at or above the tolerance.
+        self.__branch = _first_float(0.0, self.MAX_Y, lambda y: (y * 100.0) / 100.000 > 0.008856)
+        self.__low_cutoff = _first_float(0.0, self.__branch, lambda y: self.lightness(y) >= tolerance)
+        self.__high_cutoff = _first_float(self.__branch, self.MAX_Y, lambda y: self.lightness(y) >= tolerance)
+
+    @staticmethod
+    def lightness(y: float) -> float:
+        '''Lightness, as returned by lightness_method, of a relative luminance in [0, 1].'''
+        y = (y * 100.0) / 100.000
+        y = y if y > 0.008856 else (903.3 * y + 16.0) / 116.0
+        return min(100.0, max(0.0, 116.0 * y - 16.0)) / 100
+
+    def __call__(self, pixel: Tuple[int, int, int]) -> bool:
+        y = self.__red[pixel[0]] + self.__green[pixel[1]] + self.__blue[pixel[2]]
+        cutoff = self.__low_cutoff if y < self.__branch else self.__high_cutoff
+        return (y < cutoff) != self.invert
+
+    def mask(self, rgb):
+        import numpy as np
+        y = np.array(self.__red)[rgb[..., 0]] + np.array(self.__green)[rgb[..., 1]] + np.array(self.__blue)[rgb[..., 2]]
+        cutoff = np.where(y < self.__branch, self.__low_cutoff, self.__high_cutoff)
+        return (y < cutoff) ^ self.invert
+
+lightness_method.compiler(LightnessThreshold)
@@ -0,0 +1,132 @@
+'''Module containing the automatic choice of a tolerance for an image.
+
+The values a threshold method compares to the tolerance are counted into a histogram in a single
+pass with Pillow: every band goes through a lookup table, the bands are combined into one with a
+conversion matrix, and the opaque pixels of the result are counted by Image.histogram. No pixel
+is handled in Python and NumPy is not needed. The tolerance is then chosen with Otsu's method,
+which splits the histogram where the variance between the two sides is largest.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, List, Tuple
+from img2txt.colors.colordifference import gamma_expand
+from img2txt.methods.threshold import LightnessThreshold, lightness_method, luminance_method
+
+if TYPE_CHECKING:
+    import PIL.Image as Image
+
+# Tolerance, given instead of a number, that is chosen for every image.
+AUTO_TOLERANCE: str = "auto"
+# Tolerance chosen for images whose opaque pixels all have the same value, or that have none.
+FALLBACK_TOLERANCE: float = 0.5
+# Decimal places chosen tolerances are rounded to, so that the value reported can be given again.
+TOLERANCE_DIGITS: int = 4
+
+def _opaque(image: Image.Image) -> Image.Image:
+    from img2txt.characters.brailleimage import ALPHA_TOLERANCE
+    return image.getchannel("A").point([0] * ALPHA_TOLERANCE + [255] * (256 - ALPHA_TOLERANCE))
+
+def _band_histogram(image: Image.Image, table: List[int], matrix: Tuple[float, float, float]) -> List[int]:
+    gray = image.convert("RGB").point(table * 3).convert("L", matrix + (0.0,))
+    return gray.histogram(mask=_opaque(image))
+
+def luminance_histogram(image: Image.Image) -> Tuple[List[int], List[float]]:
+    '''Count the values of luminance_method over the opaque pixels of an image.
+
+    :param image: Image in RGBA mode.
+    :type image: Image.Image
+    :return: Number of pixels in each of 256 bins, and the value of luminance_method at every bin.
+    :rtype: Tuple[List[int], List[float]]
+    '''
+    squares = [round(255 * (value / 255.0)**2) for value in range(256)]
+    counts = _band_histogram(image, squares, (.299, .587, .114))
+    return counts, [index / 255 for index in range(256)]
+
+def lightness_histogram(image: Image.Image) -> Tuple[List[int], List[float]]:
+    '''Count the values of lightness_method over the opaque pixels of an image. The bins are of
+    relative luminance, which lightness is a function of but not an increasing one: lightness is
+    clamped to 0 over part of the range of the darkest bins, so their values are not in order.
+
+    :param image: Image in RGBA mode.
+    :type image: Image.Image
+    :return: Number of pixels in each of 256 bins, and the value of lightness_method at every bin.
+    :rtype: Tuple[List[int], List[float]]
+    '''
+    linear = [round(255 * gamma_expand(value / 255.0)) for value in range(256)]
+    counts = _band_histogram(image, linear, (0.2126729, 0.7151522, 0.0721750))
+    return counts, [LightnessThreshold.lightness(index / 255) for index in range(256)]
+
+def value_histogram(image: Image.Image, method: Callable) -> Tuple[List[int], List[float]]:
+    '''Count the values a threshold method compares to the tolerance over the opaque pixels of an image.
+
+    :param image: Image in RGBA mode.
+    :type image: Image.Image
+    :param method: Threshold method, as found in THRESHOLD_METHODS.
+    :type method: Callable
+    :return: Number of pixels in each bin, and the value of the method at every bin, not\
+         necessarily in order.
+    :rtype: Tuple[List[int], List[float]]
+    :raises ValueError: Raised if the values of the method cannot be counted.
+    '''
+    value_method = getattr(method, "value_method", None)
+    if value_method is luminance_method.value_method:
+        return luminance_histogram(image)
+    if value_method is lightness_method.value_method:
+        return lightness_histogram(image)
+    raise ValueError(f"{getattr(method, '__name__', method)} does not support an automatic tolerance.")
+
+def supports_auto_tolerance(method: Callable) -> bool:
+    '''Return whether a tolerance can be chosen automatically for a threshold method.'''
+    return getattr(method, "value_method", None) in (luminance_method.value_method, lightness_method.value_method)
+
+def otsu(counts: List[int], values: List[float]) -> float:
+    '''Choose a tolerance splitting a histogram in two with Otsu's method.
+
+    :param counts: Number of pixels in every bin.
+    :type counts: List[int]
+    :param values: Value of every bin, in any order. Bins of the same value are counted as one.
+    :type values: List[float]
+    :return: Tolerance halfway between the highest value below it and the lowest value above it\
+         that pixels have, or FALLBACK_TOLERANCE if pixels do not have two different values.
+    :rtype: float
+    '''
+    # Split by value, not by bin.
+    merged = {}
+    for count, value in zip(counts, values):
+        if count:
+            merged[value] = merged.get(value, 0) + count
+    values = sorted(merged)
+    counts = [merged[value] for value in values]
+    total = sum(counts)
+    total_sum = sum(count * value for count, value in zip(counts, values))
+    low_count = 0
+    low_sum = 0.0
+    best = 0.0
+    split = None
+    for index in range(len(counts) - 1):
+        low_count += counts[index]
+        low_sum += counts[index] * values[index]
+        high_count = total - low_count
+        difference = low_sum / low_count - (total_sum - low_sum) / high_count
+        between = low_count * high_count * difference * difference
+        if between > best:
+            best = between
+            split = index
+    if split is None:
+        return FALLBACK_TOLERANCE
+    return (values[split] + values[split + 1]) / 2
+
+def auto_tolerance(image: Image.Image, method: Callable) -> float:
+    '''Choose the tolerance of a threshold method for an image.
+
+    :param image: Image in RGBA mode, already fitted to the character limit.
+    :type image: Image.Image
+    :param method: Threshold method, as found in THRESHOLD_METHODS.
+    :type method: Callable
+    :return: Tolerance in [0.0, 1.0], rounded to TOLERANCE_DIGITS decimal places.
+    :rtype: float
+    :raises ValueError: Raised if the method does not support an automatic tolerance.
+    '''
+    return round(otsu(*value_histogram(image, method)), TOLERANCE_DIGITS)
@@ -0,0 +1,139 @@
+'''Module containing multi-process conversion of images to text.
+
+The image is split into horizontal bands whose heights are multiples of four pixels, so every band
+covers whole rows of braille cells and bands never share a cell. The RGBA pixels are placed in
+shared memory once; each worker attaches to it, converts its band with BrailleImage.from_image_fast
+and, where the formatter allows it, formats the band's lines as well. The bands are stitched back
+together in order, so the output is identical to converting the image in a single process.
+Spatial thresholds, such as dithering, need the whole image at once, so images thresholded with
+them are converted in a single process.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor
+from math import ceil
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from typing import Callable, Iterator, List, Tuple
+from PIL import Image
+from img2txt.characters.brailleimage import DEFAULT_REDUCTION, BrailleImage
+from img2txt.methods.colors import ColoredTextFormatter
+from img2txt.methods.threshold import compile_threshold
+from img2txt.methods.reduction import CellReduction
+
+# Number of bands given to each worker, so that uneven bands even out.
+BANDS_PER_JOB: int = 4
+
+def resolve_jobs(jobs: int | None) -> int:
+    '''Return the number of worker processes to use.
+
+    :param jobs: Requested number of jobs. None or 0 for one per CPU.
+    :type jobs: int | None
+    :return: Number of jobs, at least 1.
+    :rtype: int
+    :raises ValueError: Raised if jobs is negative.
+    '''
+    if jobs is None or jobs == 0:
+        return cpu_count() or 1
+    if jobs < 0:
+        raise ValueError(f"jobs must be >= 0, not {jobs}.")
+    return jobs
+
+def band_rows(height: int, jobs: int) -> List[Tuple[int, int]]:
+    '''Split the rows of an image into bands aligned to braille cells.
+
+    :param height: Height of the image in pixels.
+    :type height: int
+    :param jobs: Number of jobs the bands are shared between.
+    :type jobs: int
+    :return: List of (top, rows) for every band, in order.
+    :rtype: List[Tuple[int, int]]
+    '''
+    cell_rows = ceil(height / 4)
+    band_cells = max(1, ceil(cell_rows / (jobs * BANDS_PER_JOB)))
+    return [(top, min(band_cells * 4, height - top)) for top in range(0, height, band_cells * 4)]
+
+def _convert_band(shared_name: str, width: int, top: int, rows: int, method: Callable, tolerance: float, invert: bool, formatter: ColoredTextFormatter | None, reduction: CellReduction):
+    shared = SharedMemory(name=shared_name)
+    try:
+        view = shared.buf[top * width * 4:(top + rows) * width * 4]
+        try:
+            band = Image.frombuffer("RGBA", (width, rows), view, "raw", "RGBA", 0, 1)
+            braille = BrailleImage.from_image_fast(band, method, tolerance=tolerance, invert=invert)
+            del band
+        finally:
+            view.release()
+    finally:
+        shared.close()
+    if formatter is None:
+        return braille.cells()
+    return list(braille.iter_colored_lines(formatter, reduction))
+
+def iter_colored_lines(img: Image.Image, method: Callable, formatter: ColoredTextFormatter, *, tolerance: float = 0.5, invert: bool = False, jobs: int | None = None, executor: Executor | None = None, reduction: CellReduction = DEFAULT_REDUCTION) -> Iterator[str]:
+    '''Convert an image to text using several processes, yielding one formatted line at a time.
+    Gives the same lines as ``BrailleImage.from_image_fast(...).iter_colored_lines(formatter, reduction)``.
+
+    :param img: Source image in RGBA mode.
+    :type img: Image.Image
+    :param method: Threshold method, as found in THRESHOLD_METHODS.
+    :type method: Callable
+    :param formatter: Formatter, as found in COLOR_METHODS.
+    :type formatter: ColoredTextFormatter
+    :param tolerance: Tolerance for the method.
+    :type tolerance: float
+    :param invert: Invert the method.
+    :type invert: bool
+    :param jobs: Number of worker processes. None or 0 for one per CPU. With 1 and no executor,\
+         or with a spatial threshold, the image is converted in this process.
+    :type jobs: int | None
+    :param executor: Process pool to run the bands on, kept warm between images by the caller.\
+         If None, a pool of ``jobs`` processes is created for this image.
+    :type executor: Executor | None
+    :param reduction: Reduction choosing the color of every character, as found in\
+         REDUCTION_METHODS. Default is the mean.
+    :type reduction: CellReduction
+    :return: Iterator of formatted lines, without line separators.
+    :rtype: Iterator[str]
+    '''
+    if img.mode != "RGBA":
+        raise ValueError(f"img should be in RGBA mode, not {img.mode}.")
+    jobs = resolve_jobs(jobs)
+    width, height = img.size
+    threshold = compile_threshold(method, tolerance, invert)
+    if (executor is None and jobs == 1) or width == 0 or height == 0 or threshold.spatial:
+        braille = BrailleImage.from_image_fast(img, threshold, tolerance=tolerance, invert=invert)
+        yield from braille.iter_colored_lines(formatter, reduction)
+        return
+
+    pixels = img.tobytes()
+    shared = SharedMemory(create=True, size=len(pixels))
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        shared.buf[:len(pixels)] = pixels
+        del pixels
+        # Stateful formatters see the lines of the whole document in order, so only convert in the workers.
+        band_formatter = None if formatter.stateful else formatter
+        futures = [
+            executor.submit(_convert_band, shared.name, width, top, rows, method, tolerance, invert, band_formatter, reduction)
+            for top, rows in band_rows(height, jobs)
+        ]
+        if band_formatter is not None:
+            for future in futures:
+                yield from future.result()
+        else:
+            cells = [future.result() for future in futures]
+            flags = b"".join(band[0] for band in cells)
+            colors = b"".join(band[1] for band in cells)
+            del cells
+            braille = BrailleImage.from_cells(width, height, flags, colors)
+            del flags, colors
+            yield from braille.iter_colored_lines(formatter, reduction)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+        shared.close()
+        shared.unlink()
@@ -0,0 +1,167 @@
+'''Module containing instrumentation of conversions: stage timers, counters, cache statistics and
+peak memory.
+
+Instrumented code calls ``stage`` and ``count`` unconditionally. They do nothing unless a Profiler
+is active in the current context, which ``profile`` arranges, so the cost when profiling is off
+is one context variable lookup. Reports are plain dicts and can be forwarded to other metrics
+systems by hooks registered with ``add_hook``.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from img2txt.colors.colordifference import difference_lookup
+
+try:
+    import resource
+except ImportError: # pragma: no cover - not available on Windows
+    resource = None
+
+__active: ContextVar = ContextVar("img2txt_profiler", default=None)
+__hooks: List[Callable[[Dict[str, Any]], None]] = []
+__NULL_CONTEXT = nullcontext()
+
+class Profiler:
+    '''Accumulates the time spent in named stages and named counts.
+    Stages may nest; the time of a stage includes the stages inside it.'''
+
+    __slots__ = ("__seconds", "__calls", "__counters", "__metadata", "__start", "__cache_start", "__trace_memory")
+
+    def __init__(self, *, trace_memory: bool = True):
+        '''
+        :param trace_memory: Trace the peak memory allocated by Python with tracemalloc, which\
+             slows Python code down. Default is True.
+        :type trace_memory: bool
+        '''
+        self.__seconds: Dict[str, float] = {}
+        self.__calls: Dict[str, int] = {}
+        self.__counters: Dict[str, int] = {}
+        self.__metadata: Dict[str, Any] = {}
+        self.__start: float = perf_counter()
+        self.__cache_start = difference_lookup.snapshot()
+        self.__trace_memory: bool = trace_memory
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        '''Time the code inside the context as part of a stage.'''
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.__seconds[name] = self.__seconds.get(name, 0.0) + perf_counter() - start
+            self.__calls[name] = self.__calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: int = 1):
+        '''Add to a counter.'''
+        self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def note(self, name: str, value: Any):
+        '''Record a value chosen during the conversion, such as an automatic tolerance.'''
+        self.__metadata[name] = value
+
+    def report(self) -> Dict[str, Any]:
+        '''Return the measurements so far.
+
+        :return: Dict with the wall time, the seconds and calls of every stage, the counters,\
+             the values noted, the hits and misses of the color difference cache since the profiler started,\
+             and the peak memory.
+        :rtype: Dict[str, Any]
+        '''
+        cache = difference_lookup.snapshot()
+        memory = {"peak_traced_bytes": None, "max_rss_bytes": None}
+        if self.__trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                memory["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux.
+            memory["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {
+            "wall_seconds": perf_counter() - self.__start,
+            "stages": {name: {"seconds": self.__seconds[name], "calls": self.__calls[name]} for name in self.__seconds},
+            "counters": dict(self.__counters),
+            "metadata": dict(self.__metadata),
+            "difference_cache": {
+                "hits": cache.hits - self.__cache_start.hits,
+                "misses": cache.misses - self.__cache_start.misses,
+                "evictions": cache.evictions - self.__cache_start.evictions,
+                "size": cache.size,
+                "maxsize": cache.maxsize
+            },
+            "memory": memory
+        }
+
+def active() -> Profiler | None:
+    '''Return the Profiler of the current context, if any.'''
+    return __active.get()
+
+def stage(name: str):
+    '''Return a context that times its code as a stage of the active Profiler, if any.'''
+    profiler = __active.get()
+    if profiler is None:
+        return __NULL_CONTEXT
+    return profiler.stage(name)
+
+def count(name: str, amount: int = 1):
+    '''Add to a counter of the active Profiler, if any.'''
+    profiler = __active.get()
+    if profiler is not None:
+        profiler.count(name, amount)
+
+def note(name: str, value: Any):
+    '''Record a value in the active Profiler, if any.'''
+    profiler = __active.get()
+    if profiler is not None:
+        profiler.note(name, value)
+
+def timed(name: str, iterable: Iterable) -> Iterator:
+    '''Iterate, timing the production of every item as a stage of the active Profiler, if any.
+    Only the iterable's own work is timed, not the consumer's.'''
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def add_hook(hook: Callable[[Dict[str, Any]], None]):
+    '''Register a function to be called with the report of every profile when it ends.'''
+    __hooks.append(hook)
+
+def remove_hook(hook: Callable[[Dict[str, Any]], None]):
+    '''Unregister a function registered with add_hook.'''
+    __hooks.remove(hook)
+
+@contextmanager
+def profile(*, trace_memory: bool = True) -> Iterator[Profiler]:
+    '''Profile the code inside the context. When it ends, the hooks are called with the report.
+
+    :param trace_memory: Trace the peak memory allocated by Python. Default is True.
+    :type trace_memory: bool
+    :return: Profiler, active inside the context.
+    :rtype: Iterator[Profiler]
+    '''
+    # Imported here, so that importing this module stays cheap for code that is never profiled.
+    import tracemalloc
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    profiler = Profiler(trace_memory=trace_memory)
+    token = __active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        __active.reset(token)
+        report = profiler.report()
+        if started_tracing:
+            tracemalloc.stop()
+        for hook in list(__hooks):
+            hook(report)
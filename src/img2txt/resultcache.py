@@ -0,0 +1,320 @@
+'''Module containing the on-disk cache of converted documents.
+
+An entry is the document the command line writes for an image, with the tolerance it was converted
+with. Its key is the SHA-256 of the contents of the image file, every conversion option and the
+version of img2txt, so an entry is never out of date: changing any of them changes the key, and
+entries that are no longer used are eventually evicted.
+
+Entries are files, spread over 256 subdirectories by the first two digits of their key. An entry
+is written to a temporary file in the cache directory and renamed over its key, which is atomic,
+so processes sharing a cache never read part of an entry. Two processes writing the same entry
+write the same document. Reading an entry updates its modification time, so the entries least
+recently used are the oldest ones.
+
+Listing the entries takes time in proportion to their number, so writes do not list them. The
+total size is estimated in a file of the cache directory, which every write adds to. Only once the
+estimate goes over the size of the cache are the entries listed, and the oldest deleted until the
+cache is within LOW_WATER of its size, which leaves room for many writes before the next listing.
+The estimate is then replaced by the size found. Processes writing at the same time may lose some
+of each other's additions, so the cache can go somewhat over its size until the next listing.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import os
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterator, List, NamedTuple, Tuple
+from img2txt import profiling
+
+if TYPE_CHECKING:
+    from img2txt.conversion import ConversionOptions
+
+# Largest total size of the entries of a cache, in megabytes, unless given.
+DEFAULT_CACHE_MB: int = 256
+# Suffix of entry files, and prefix of the temporary files they are written to.
+ENTRY_SUFFIX: str = ".txt"
+TEMPORARY_PREFIX: str = ".tmp-"
+# File of the cache directory holding the estimated total size of the entries.
+SIZE_FILE: str = "size"
+# Fraction of its size a cache that went over it is reduced to.
+LOW_WATER: float = 0.9
+# Size of the chunks image files are hashed in, in bytes.
+CHUNK_SIZE: int = 1 << 20
+
+def default_directory() -> str:
+    '''Return the cache directory used unless one is given: ``img2txt`` in $XDG_CACHE_HOME, or in ~/.cache.'''
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "img2txt")
+
+def file_digest(image_file: BinaryIO) -> Tuple[str, BinaryIO]:
+    '''Hash the contents of an image file.
+
+    :param image_file: Binary file, read from its current position.
+    :type image_file: BinaryIO
+    :return: Hex SHA-256 of the rest of the file, and a file to read the image from, at the same\
+         position: the same file if it can seek, or its contents in memory if not, such as\
+         standard input.
+    :rtype: Tuple[str, BinaryIO]
+    '''
+    import hashlib
+    import io
+    digest = hashlib.sha256()
+    with profiling.stage("hash"):
+        if not image_file.seekable():
+            data = image_file.read()
+            digest.update(data)
+            return digest.hexdigest(), io.BytesIO(data)
+        start = image_file.tell()
+        while chunk := image_file.read(CHUNK_SIZE):
+            digest.update(chunk)
+        image_file.seek(start)
+    return digest.hexdigest(), image_file
+
+def result_key(digest: str, options: ConversionOptions) -> str:
+    '''Return the key of the document of an image.
+
+    :param digest: Hex SHA-256 of the image file, as returned by file_digest.
+    :type digest: str
+    :param options: Options of the conversion. An automatic tolerance is part of the key as it\
+         is given, as the tolerance chosen only depends on the image.
+    :type options: ConversionOptions
+    :return: Hex SHA-256 of the digest, the options and the version of img2txt.
+    :rtype: str
+    '''
+    import hashlib
+    import json
+    from img2txt import __version__
+    fields = json.dumps({"version": __version__, "image": digest, "options": options._asdict()}, sort_keys=True)
+    return hashlib.sha256(fields.encode("utf-8")).hexdigest()
+
+class CachedResult(NamedTuple):
+    '''Entry of a ResultCache.'''
+    text: str
+    tolerance: float
+
+class CacheEntry(NamedTuple):
+    '''File of an entry, as listed by ResultCache.entries.'''
+    path: str
+    size: int
+    last_used: float
+
+class ResultCache:
+    '''Documents stored on disk, keyed by result_key. Shared safely by any number of processes.'''
+
+    __slots__ = ("__directory", "__max_bytes")
+
+    def __init__(self, directory: str | None = None, max_bytes: int = DEFAULT_CACHE_MB * 2**20):
+        '''
+        :param directory: Directory of the cache, created when the first entry is written. If\
+             None, default_directory().
+        :type directory: str | None
+        :param max_bytes: Largest total size of the entries, in bytes. Default is DEFAULT_CACHE_MB megabytes.
+        :type max_bytes: int
+        :raises ValueError: Raised if max_bytes is negative.
+        '''
+        if max_bytes < 0:
+            raise ValueError(f"Cache size must be >= 0, not {max_bytes}.")
+        self.__directory: str = directory if directory is not None else default_directory()
+        self.__max_bytes: int = max_bytes
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @property
+    def max_bytes(self) -> int:
+        return self.__max_bytes
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__directory, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> CachedResult | None:
+        '''Return the entry of a key and mark it as used, or None if there is none. An entry that
+        cannot be read, such as a truncated or foreign file, is deleted and counted as a miss.'''
+        import json
+        path = self.__path(key)
+        try:
+            with open(path, "rb") as entry_file:
+                data = entry_file.read()
+        except FileNotFoundError:
+            # Never written, or evicted by another process.
+            profiling.count("result_cache_misses")
+            return None
+        try:
+            header, _, text = data.partition(b"\n")
+            result = CachedResult(text.decode("utf-8"), json.loads(header)["tolerance"])
+        except (ValueError, KeyError, TypeError):
+            # Decoding and JSON errors are ValueErrors.
+            profiling.count("result_cache_invalid")
+            profiling.count("result_cache_misses")
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        profiling.count("result_cache_hits")
+        return result
+
+    def __write(self, path: str, data: bytes):
+        # Write to a temporary file and rename it, so that the file is never seen half written.
+        import tempfile
+        descriptor, temporary = tempfile.mkstemp(prefix=TEMPORARY_PREFIX, dir=self.__directory)
+        try:
+            with os.fdopen(descriptor, "wb") as written_file:
+                written_file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def __estimate(self) -> int | None:
+        try:
+            with open(os.path.join(self.__directory, SIZE_FILE), "rb") as size_file:
+                return int(size_file.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def __set_estimate(self, size: int):
+        if os.path.isdir(self.__directory):
+            self.__write(os.path.join(self.__directory, SIZE_FILE), str(size).encode("ascii"))
+
+    def put(self, key: str, result: CachedResult):
+        '''Store the entry of a key. If the estimated size of the cache goes over its size, evict
+        the entries least recently used until it is within LOW_WATER of its size.'''
+        import json
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = json.dumps({"tolerance": result.tolerance}).encode("utf-8")
+        data = header + b"\n" + result.text.encode("utf-8")
+        self.__write(path, data)
+        estimate = self.__estimate()
+        if estimate is None or estimate + len(data) > self.__max_bytes:
+            self.evict(int(self.__max_bytes * LOW_WATER))
+        else:
+            self.__set_estimate(estimate + len(data))
+
+    def entries(self) -> List[CacheEntry]:
+        '''Return every entry of the cache, least recently used first.'''
+        found = []
+        for directory in self.__scan(self.__directory):
+            if not directory.is_dir() or len(directory.name) != 2:
+                continue
+            for entry in self.__scan(directory.path):
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                found.append(CacheEntry(entry.path, stat.st_size, stat.st_mtime))
+        found.sort(key=lambda entry: entry.last_used)
+        return found
+
+    @staticmethod
+    def __scan(path: str) -> Iterator[os.DirEntry]:
+        try:
+            with os.scandir(path) as scanned:
+                yield from scanned
+        except FileNotFoundError:
+            return
+
+    def evict(self, max_bytes: int) -> Tuple[int, int]:
+        '''Delete the entries least recently used until their total size is at most max_bytes.
+        Lists every entry, and replaces the estimated size of the cache with the size found.
+
+        :param max_bytes: Largest total size of the entries left, in bytes.
+        :type max_bytes: int
+        :return: Number of entries deleted and their total size, in bytes.
+        :rtype: Tuple[int, int]
+        '''
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        deleted = 0
+        freed = 0
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            total -= entry.size
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                # Already evicted by another process.
+                continue
+            deleted += 1
+            freed += entry.size
+        self.__set_estimate(total)
+        if deleted:
+            profiling.count("result_cache_evictions", deleted)
+        return deleted, freed
+
+    def purge(self) -> Tuple[int, int]:
+        '''Delete every entry, and the temporary files of writes that never finished.
+
+        :return: Number of entries deleted and their total size, in bytes.
+        :rtype: Tuple[int, int]
+        '''
+        for entry in self.__scan(self.__directory):
+            if entry.name.startswith(TEMPORARY_PREFIX):
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+        return self.evict(0)
+
+    def stats(self) -> Dict[str, Any]:
+        '''Return the directory, size and number of entries of the cache.'''
+        entries = self.entries()
+        return {
+            "directory": self.__directory,
+            "entries": len(entries),
+            "bytes": sum(entry.size for entry in entries),
+            "max_bytes": self.__max_bytes,
+            "least_recently_used": entries[0].last_used if entries else None,
+            "most_recently_used": entries[-1].last_used if entries else None,
+        }
+
+def add_cache_arguments(argparser):
+    '''Add the arguments enabling a ResultCache, read by result_cache, to an argument parser.'''
+    argparser.add_argument("--cache", action="store_true", help="Reuse the documents of images already converted with the same options, kept in --cache-dir.")
+    argparser.add_argument("--cache-dir", action="store", default=None, metavar="DIR", help="Directory of the cache. Implies --cache. Default is $XDG_CACHE_HOME/img2txt.")
+    argparser.add_argument("--cache-size", action="store", type=int, default=DEFAULT_CACHE_MB, metavar="MB", help=f"Largest size of the cache, in megabytes; the documents least recently used are deleted beyond it. Default is {DEFAULT_CACHE_MB}.")
+
+def result_cache(args) -> ResultCache | None:
+    '''Return the ResultCache enabled by the arguments added by add_cache_arguments, or None.
+
+    :raises ValueError: Raised if the cache size is negative.
+    '''
+    if args.cache_size < 0:
+        raise ValueError(f"Cache size must be >= 0, not {args.cache_size}")
+    if not args.cache and args.cache_dir is None:
+        return None
+    return ResultCache(args.cache_dir, args.cache_size * 2**20)
+
+def main(argv: List[str] | None = None) -> int:
+    '''Entry point of ``img2txt cache``.'''
+    import argparse
+    import json
+    import sys
+    argparser = argparse.ArgumentParser(prog="img2txt cache", description="Inspect or empty the cache enabled by --cache.")
+    subparsers = argparser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="Write the size and number of entries of the cache as JSON.")
+    purge_parser = subparsers.add_parser("purge", help="Delete the entries of the cache.")
+    purge_parser.add_argument("--max-size", action="store", type=int, default=None, metavar="MB", help="Only delete the entries least recently used until the cache is at most this many megabytes.")
+    for subparser in (stats_parser, purge_parser):
+        subparser.add_argument("directory", action="store", nargs="?", default=None, help="Directory of the cache. Default is $XDG_CACHE_HOME/img2txt.")
+
+    args = argparser.parse_args(argv)
+    cache = ResultCache(args.directory)
+    if args.command == "stats":
+        json.dump(cache.stats(), sys.stdout, indent=4)
+        sys.stdout.write("\n")
+        return 0
+    if args.max_size is not None and args.max_size < 0:
+        argparser.error(f"--max-size must be >= 0, not {args.max_size}.")
+    deleted, freed = cache.purge() if args.max_size is None else cache.evict(args.max_size * 2**20)
+    print(f"Deleted {deleted} entries, {freed} bytes.", file=sys.stderr)
+    return 0
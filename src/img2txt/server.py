@@ -0,0 +1,472 @@
+'''Module containing a long-running conversion server and its client.
+
+Starting a process for every conversion pays for the interpreter, the imports, the palette tables
+and an empty color difference cache every time. The server pays for them once: it loads the
+palette tables when it starts and keeps them, and the cache, warm from request to request.
+
+The server speaks HTTP, on localhost or on a Unix socket. A request is a POST to ``/convert``
+whose body is the image file and whose query string holds the conversion options, by the names
+of the command line (``method``, ``tolerance``, ``invert``, ``color``, ``coalesce``, ``limit``,
+``resample`` and ``reduction``). The response is the text the command line would write, with the
+tolerance it was converted with, which may have been chosen automatically, in the X-Tolerance
+header. ``GET /stats`` returns counters of the server as JSON. With ``--cache``, documents are
+kept in a ResultCache, shared with the command line and other servers, and images already
+converted with the same options are answered from it without waiting for a job.
+
+At most ``jobs`` images are converted at once and at most ``backlog`` more requests wait for
+their turn. Requests beyond that are refused straight away with 503 and a Retry-After header,
+so that a burst of requests is pushed back to the clients rather than queued without bound.
+Images that cannot be decoded and invalid options are answered with 400, and any other error with
+500, its traceback being logged by the server rather than sent to the client.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+from img2txt.colors import colordifference, quantization
+from img2txt.conversion import AUTO_TOLERANCE, RESAMPLING_FILTERS, ConversionOptions, add_conversion_arguments, conversion_options, missing_dependency, parse_tolerance
+from img2txt.converter import Converter
+from img2txt.methods import THRESHOLD_METHODS, COLOR_METHODS, REDUCTION_METHODS
+from img2txt.resultcache import CachedResult, ResultCache, add_cache_arguments, result_cache, result_key
+from img2txt.parallel import resolve_jobs
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8317
+DEFAULT_BACKLOG: int = 16
+# Largest image file accepted, in bytes.
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+# Seconds clients are told to wait before retrying a refused request.
+RETRY_AFTER: int = 1
+# Number of Converters kept for the most recently requested options.
+CONVERTER_CACHE_SIZE: int = 32
+# Response header holding the tolerance an image was converted with.
+TOLERANCE_HEADER: str = "X-Tolerance"
+
+class OptionsError(ValueError):
+    '''Raised when the options of a request are not valid.'''
+
+def parse_options(query: str) -> ConversionOptions:
+    '''Read ConversionOptions from a query string. Missing options keep their defaults.
+
+    :param query: Query string, without the leading ``?``.
+    :type query: str
+    :return: Options of the conversion.
+    :rtype: ConversionOptions
+    :raises OptionsError: Raised if an option is unknown or has an invalid value.
+    '''
+    fields = {name: values[-1] for name, values in parse_qs(query, keep_blank_values=True).items()}
+    unknown = fields.keys() - ConversionOptions._fields
+    if unknown:
+        raise OptionsError(f"unknown options: {', '.join(sorted(unknown))}.")
+    defaults = ConversionOptions()
+    try:
+        tolerance = parse_tolerance(str(fields.get("tolerance", defaults.tolerance)))
+        limit = int(fields["limit"]) if fields.get("limit") else None
+    except ValueError as e:
+        raise OptionsError(str(e)) from None
+    if limit is not None and limit <= 0:
+        raise OptionsError(f"Character limit must be > 0, not {limit}")
+    options = ConversionOptions(
+        fields.get("method", defaults.method),
+        tolerance,
+        fields.get("invert", "") in ("1", "true", "yes"),
+        fields.get("color", defaults.color),
+        fields.get("coalesce", "") in ("1", "true", "yes"),
+        limit,
+        fields.get("resample", defaults.resample),
+        fields.get("reduction", defaults.reduction)
+    )
+    if options.method not in THRESHOLD_METHODS:
+        raise OptionsError(f"unknown method {options.method}.")
+    if options.color not in COLOR_METHODS:
+        raise OptionsError(f"unknown color {options.color}.")
+    if options.resample not in RESAMPLING_FILTERS:
+        raise OptionsError(f"unknown resample {options.resample}.")
+    if options.reduction not in REDUCTION_METHODS:
+        raise OptionsError(f"unknown reduction {options.reduction}.")
+    missing = missing_dependency(options)
+    if missing is not None:
+        raise OptionsError(missing)
+    return options
+
+def encode_options(options: ConversionOptions) -> str:
+    '''Write ConversionOptions as a query string, as read by parse_options.'''
+    fields = options._asdict()
+    fields["invert"] = int(options.invert)
+    fields["coalesce"] = int(options.coalesce)
+    if options.limit is None:
+        del fields["limit"]
+    return urlencode(fields)
+
+@lru_cache(maxsize=CONVERTER_CACHE_SIZE)
+def converter(options: ConversionOptions) -> Converter:
+    '''Return a Converter for options, reused by every request with the same options.'''
+    return Converter.from_options(options)
+
+def convert_bytes(data: bytes, options: ConversionOptions) -> Tuple[str, float]:
+    '''Convert an image file held in memory to text.
+
+    :param data: Contents of the image file.
+    :type data: bytes
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :return: The text the command line writes for the same image and options, and the\
+         tolerance it was converted with.
+    :rtype: Tuple[str, float]
+    :raises ValueError: Raised if the image cannot be decoded.
+    '''
+    import PIL.Image as Image
+    image_converter = converter(options)
+    try:
+        image = image_converter.image(data)
+    except (OSError, Image.DecompressionBombError) as e:
+        # Pillow raises OSError for data it cannot decode, such as a truncated file.
+        raise ValueError(f"Cannot decode image: {e}") from e
+    tolerance = image_converter.tolerance(image)
+    return image_converter.convert(image, tolerance=tolerance), tolerance
+
+def warm_up():
+    '''Load every palette table, so that the first request does not pay for it.'''
+    for name in quantization.palettes():
+        quantization.get_table(name)
+
+class ConversionService:
+    '''Converts images for the server, a bounded number at a time.'''
+
+    __slots__ = ("__jobs", "__slots", "__running", "__executor", "__lock", "__stats", "__cache")
+
+    def __init__(self, jobs: int = 1, backlog: int = DEFAULT_BACKLOG, cache: ResultCache | None = None):
+        '''
+        :param jobs: Number of images converted at once. With 1, images are converted in the\
+             server process; with more, in a pool of that many worker processes, each with its\
+             own warm caches. 0 for one per CPU.
+        :type jobs: int
+        :param backlog: Number of requests that may wait for a conversion to finish.\
+             Default is DEFAULT_BACKLOG.
+        :type backlog: int
+        :param cache: Cache of documents to answer from, and to store the documents converted in,\
+             or None to convert every image. Default is None.
+        :type cache: ResultCache | None
+        '''
+        if backlog < 0:
+            raise ValueError(f"backlog must be >= 0, not {backlog}.")
+        self.__jobs: int = resolve_jobs(jobs)
+        # Admission: a request holds a slot from the time it is accepted until it is answered.
+        self.__slots = threading.BoundedSemaphore(self.__jobs + backlog)
+        self.__running = threading.BoundedSemaphore(self.__jobs)
+        self.__executor: ProcessPoolExecutor | None = None
+        if self.__jobs > 1:
+            self.__executor = ProcessPoolExecutor(max_workers=self.__jobs, initializer=warm_up)
+        else:
+            warm_up()
+        self.__lock = threading.Lock()
+        self.__stats: Dict[str, int] = {"converted": 0, "cached": 0, "failed": 0, "refused": 0, "active": 0}
+        self.__cache: ResultCache | None = cache
+
+    @property
+    def jobs(self) -> int:
+        return self.__jobs
+
+    def __count(self, name: str, amount: int = 1):
+        with self.__lock:
+            self.__stats[name] += amount
+
+    def try_acquire(self) -> bool:
+        '''Take a slot for a request, or return False at once if the backlog is full.'''
+        if self.__slots.acquire(blocking=False):
+            self.__count("active")
+            return True
+        self.__count("refused")
+        return False
+
+    def release(self):
+        '''Give back the slot of a request taken by try_acquire.'''
+        self.__count("active", -1)
+        self.__slots.release()
+
+    def convert(self, data: bytes, options: ConversionOptions) -> Tuple[str, float]:
+        '''Convert an image, waiting for one of the jobs to be free. Returns the same as convert_bytes.
+
+        :raises Exception: Any error raised by the conversion.
+        '''
+        if self.__cache is not None:
+            import hashlib
+            key = result_key(hashlib.sha256(data).hexdigest(), options)
+            cached = self.__cache.get(key)
+            if cached is not None:
+                self.__count("cached")
+                return cached
+        with self.__running:
+            try:
+                if self.__executor is None:
+                    result = convert_bytes(data, options)
+                else:
+                    result = self.__executor.submit(convert_bytes, data, options).result()
+            except Exception:
+                self.__count("failed")
+                raise
+        self.__count("converted")
+        if self.__cache is not None:
+            self.__cache.put(key, CachedResult(*result))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        '''Return the counters of the service and, when converting in process, of the color difference cache.'''
+        with self.__lock:
+            stats: Dict[str, Any] = dict(self.__stats)
+        stats["jobs"] = self.__jobs
+        if self.__executor is None:
+            stats["difference_cache"] = colordifference.difference_lookup.snapshot()._asdict()
+        return stats
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    '''Answers the requests of a ConversionServer.'''
+
+    server_version = "img2txt"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # Clients of a Unix socket have no address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_text(self, status: int, text: str, content_type: str = "text/plain", headers: Dict[str, str] | None = None):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/stats":
+            self.send_text(200, json.dumps(self.server.service.stats()), "application/json")
+        else:
+            self.send_text(404, "Not found.\n")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/convert":
+            self.close_connection = True
+            self.send_text(404, "Not found.\n")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self.send_text(411, "Content-Length is required.\n")
+            return
+        if length > self.server.max_bytes:
+            self.close_connection = True
+            self.send_text(413, f"Images are limited to {self.server.max_bytes} bytes.\n")
+            return
+        service = self.server.service
+        if not service.try_acquire():
+            # The body is read so that the client, still sending it, sees the answer and not a reset.
+            self.rfile.read(length)
+            self.send_text(503, "Server is busy, try again later.\n", headers={"Retry-After": str(RETRY_AFTER)})
+            return
+        try:
+            data = self.rfile.read(length)
+            try:
+                options = parse_options(url.query)
+            except OptionsError as e:
+                self.send_text(400, f"{e}\n")
+                return
+            try:
+                text, tolerance = service.convert(data, options)
+            except ValueError as e:
+                self.send_text(400, f"{e}\n")
+                return
+            except Exception:
+                # Not the fault of the request, so it is logged, even when quiet, and not sent back.
+                sys.stderr.write(f"Error answering {self.requestline!r}:\n{traceback.format_exc()}")
+                self.send_text(500, "Internal server error.\n")
+                return
+            self.send_text(200, text, "text/html" if "html" in options.color else "text/plain", headers={TOLERANCE_HEADER: repr(tolerance)})
+        finally:
+            service.release()
+
+class ConversionServer(ThreadingHTTPServer):
+    '''HTTP server on a TCP address, answering every connection in its own thread.'''
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: ConversionService, *, max_bytes: int = DEFAULT_MAX_BYTES, quiet: bool = False):
+        self.service = service
+        self.max_bytes = max_bytes
+        self.quiet = quiet
+        super().__init__(address, ConversionHandler)
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class UnixConversionServer(socketserver.ThreadingUnixStreamServer):
+        '''HTTP server on a Unix socket, answering every connection in its own thread.'''
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, service: ConversionService, *, max_bytes: int = DEFAULT_MAX_BYTES, quiet: bool = False):
+            self.service = service
+            self.max_bytes = max_bytes
+            self.quiet = quiet
+            super().__init__(socket_path, ConversionHandler)
+
+        def server_close(self):
+            super().server_close()
+            try:
+                os.unlink(self.server_address)
+            except OSError:
+                pass
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    '''HTTPConnection to a server on a Unix socket.'''
+
+    def __init__(self, socket_path: str, timeout: float | None = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class ServerError(Exception):
+    '''Raised when the server refuses or fails a request.'''
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def connect(*, socket_path: str | None = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float | None = None) -> http.client.HTTPConnection:
+    '''Open a connection to a server, on a Unix socket if a path is given, otherwise over TCP.'''
+    if socket_path is not None:
+        return UnixHTTPConnection(socket_path, timeout=timeout)
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+def request_conversion(connection: http.client.HTTPConnection, data: bytes, options: ConversionOptions, *, retries: int = 0) -> Tuple[str, float]:
+    '''Ask a server to convert an image.
+
+    :param connection: Connection to the server, as returned by connect. It may be reused for further requests.
+    :type connection: http.client.HTTPConnection
+    :param data: Contents of the image file.
+    :type data: bytes
+    :param options: Options of the conversion.
+    :type options: ConversionOptions
+    :param retries: Number of times a request refused because the server is busy is sent again,\
+         after the wait the server asks for. Default is 0.
+    :type retries: int
+    :return: Text of the image, and the tolerance it was converted with, as sent in the\
+         X-Tolerance header.
+    :rtype: Tuple[str, float]
+    :raises ServerError: Raised if the server refuses or fails the request.
+    '''
+    url = "/convert?" + encode_options(options)
+    for attempt in range(retries + 1):
+        connection.request("POST", url, body=data, headers={"Content-Type": "application/octet-stream"})
+        response = connection.getresponse()
+        body = response.read().decode("utf-8")
+        if response.will_close:
+            connection.close()
+        if response.status == 200:
+            return body, float(response.getheader(TOLERANCE_HEADER, options.tolerance))
+        if response.status != 503 or attempt == retries:
+            raise ServerError(response.status, body.strip())
+        sleep(float(response.getheader("Retry-After", RETRY_AFTER)))
+
+def add_address_arguments(argparser: argparse.ArgumentParser):
+    '''Add the arguments that select the address of a server to a parser.'''
+    argparser.add_argument("--socket", '-s', action="store", default=None, help="Path of a Unix socket. If not given, localhost TCP is used.")
+    argparser.add_argument("--host", action="store", default=DEFAULT_HOST, help=f"Host to listen on or connect to. Default is {DEFAULT_HOST}.")
+    argparser.add_argument("--port", '-p', action="store", type=int, default=DEFAULT_PORT, help=f"Port to listen on or connect to. Default is {DEFAULT_PORT}.")
+
+def make_server(service: ConversionService, *, socket_path: str | None = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_bytes: int = DEFAULT_MAX_BYTES, quiet: bool = False) -> socketserver.BaseServer:
+    '''Create a server, on a Unix socket if a path is given, otherwise over TCP.
+    Call ``serve_forever`` to answer requests and ``server_close`` when done.'''
+    if socket_path is not None:
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise ValueError("Unix sockets are not supported on this platform.")
+        return UnixConversionServer(socket_path, service, max_bytes=max_bytes, quiet=quiet)
+    return ConversionServer((host, port), service, max_bytes=max_bytes, quiet=quiet)
+
+def serve_main(argv: List[str] | None = None) -> int:
+    '''Entry point of ``img2txt serve``.'''
+    argparser = argparse.ArgumentParser(prog="img2txt serve", description="Convert images sent over HTTP, keeping palettes and caches warm between requests.")
+    add_address_arguments(argparser)
+    argparser.add_argument("--jobs", '-j', action="store", type=int, default=1, help="Number of images converted at once. Above 1, images are converted in that many processes. 0 for one per CPU.")
+    argparser.add_argument("--backlog", '-b', action="store", type=int, default=DEFAULT_BACKLOG, help=f"Number of requests that may wait; more are refused with 503. Default is {DEFAULT_BACKLOG}.")
+    argparser.add_argument("--max-bytes", action="store", type=int, default=DEFAULT_MAX_BYTES, help=f"Largest image file accepted, in bytes. Default is {DEFAULT_MAX_BYTES}.")
+    argparser.add_argument("--quiet", '-q', action="store_true", help="Do not log requests.")
+    add_cache_arguments(argparser)
+
+    args = argparser.parse_args(argv)
+    if args.jobs < 0:
+        raise ValueError(f"Number of jobs must be >= 0, not {args.jobs}")
+    if args.max_bytes <= 0:
+        raise ValueError(f"Largest image file must be > 0 bytes, not {args.max_bytes}")
+    service = ConversionService(args.jobs, args.backlog, result_cache(args))
+    server = make_server(service, socket_path=args.socket, host=args.host, port=args.port, max_bytes=args.max_bytes, quiet=args.quiet)
+    address = args.socket if args.socket is not None else "http://%s:%d" % server.server_address[:2]
+    print(f"Serving on {address} with {service.jobs} jobs.", file=sys.stderr)
+    # Stop cleanly, removing the socket file, when terminated as well as when interrupted.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+def client_main(argv: List[str] | None = None) -> int:
+    '''Entry point of ``img2txt client``.'''
+    argparser = argparse.ArgumentParser(prog="img2txt client", description="Convert an image to text with a running \"img2txt serve\".")
+    add_conversion_arguments(argparser)
+    add_address_arguments(argparser)
+    argparser.add_argument("--retries", action="store", type=int, default=3, help="Number of times to retry while the server is busy. Default is 3.")
+    argparser.add_argument("--timeout", action="store", type=float, default=None, help="Seconds to wait for the server.")
+    argparser.add_argument("--output", '-o', action="store", type=argparse.FileType("w", encoding="utf-8"), default="-", help="Output file.")
+    argparser.add_argument("image", action="store", type=argparse.FileType("rb"))
+
+    args = argparser.parse_args(argv)
+    options = conversion_options(args)
+    data = args.image.read()
+    args.image.close()
+    connection = connect(socket_path=args.socket, host=args.host, port=args.port, timeout=args.timeout)
+    try:
+        text, tolerance = request_conversion(connection, data, options, retries=args.retries)
+    except (ServerError, OSError) as e:
+        print(f"img2txt client: {e}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+    if options.tolerance == AUTO_TOLERANCE:
+        print(f"Tolerance: {tolerance}", file=sys.stderr)
+    args.output.write(text)
+    args.output.close()
+    return 0
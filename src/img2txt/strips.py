@@ -0,0 +1,216 @@
+'''Module containing conversion of images too large to hold in memory, in horizontal strips.
+
+Formats that store their pixels uncompressed, such as BMP, PPM, TGA and uncompressed TIFF, are
+read a strip at a time straight from the file. Every strip is converted to braille rows, which are
+handed on before the next strip is read, so the memory taken depends on the width of the image and
+not on its height. Other formats must be decoded in full first; only their conversion is done in
+strips, and they are refused if decoding them would go over the memory limit.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+import os
+import struct
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple
+import PIL.Image as Image
+from img2txt.characters.brailleimage import DEFAULT_REDUCTION, BrailleImage
+from img2txt.methods.colors import ColoredTextFormatter
+from img2txt.methods.reduction import CellReduction
+from img2txt.methods.threshold import compile_threshold
+
+# Rough number of bytes needed per pixel of a strip while it is converted: the strip as read and as
+# RGBA, the arrays of the array engine, the cells and the formatted text.
+BYTES_PER_PIXEL: int = 32
+DEFAULT_MEMORY_LIMIT: int = 256 * 1024 * 1024
+
+# Bits per pixel of the raw modes that strips can be read in.
+RAWMODE_BITS = {}
+RAWMODE_BITS["1"] = 1
+RAWMODE_BITS["1;I"] = 1
+RAWMODE_BITS["L"] = 8
+RAWMODE_BITS["P"] = 8
+RAWMODE_BITS["LA"] = 16
+RAWMODE_BITS["I;16"] = 16
+RAWMODE_BITS["I;16B"] = 16
+RAWMODE_BITS["RGB"] = 24
+RAWMODE_BITS["BGR"] = 24
+RAWMODE_BITS["RGBA"] = 32
+RAWMODE_BITS["BGRA"] = 32
+RAWMODE_BITS["RGBX"] = 32
+RAWMODE_BITS["BGRX"] = 32
+RAWMODE_BITS["CMYK"] = 32
+
+class RawTile(NamedTuple):
+    '''Rows of an image stored uncompressed in its file.'''
+    top: int
+    bottom: int
+    offset: int
+    rawmode: str
+    stride: int
+    orientation: int
+
+def open_image(fp: str | BinaryIO) -> Image.Image:
+    '''Open an image without Pillow's limit on the number of pixels, which exists to stop images
+    from being decoded in full by accident.
+
+    The format plugins are tried the way Image.open tries them, but without its check of the
+    size, rather than lifting Image.MAX_IMAGE_PIXELS, which other threads may be relying on.
+
+    :param fp: Path or seekable binary file of the image.
+    :type fp: str | BinaryIO
+    :return: Opened image, not yet loaded.
+    :rtype: Image.Image
+    :raises PIL.UnidentifiedImageError: Raised if no plugin can open the image.
+    '''
+    path = isinstance(fp, (str, os.PathLike))
+    if path:
+        with open(fp, "rb") as image_file:
+            prefix = image_file.read(16)
+    else:
+        fp.seek(0)
+        prefix = fp.read(16)
+    tried = set()
+    for loader in (Image.preinit, Image.init):
+        loader()
+        for format_id in [format_id for format_id in Image.ID if format_id not in tried]:
+            tried.add(format_id)
+            factory, accept = Image.OPEN[format_id]
+            # accept returns a message instead of True for files of the format it cannot open.
+            accepted = accept is None or accept(prefix)
+            if not accepted or isinstance(accepted, str):
+                continue
+            if not path:
+                fp.seek(0)
+            try:
+                # A plugin given a path opens the file itself, and closes it with the image.
+                return factory(fp, fp if path else "")
+            except (SyntaxError, IndexError, TypeError, struct.error):
+                continue
+    raise Image.UnidentifiedImageError(f"cannot identify image file {fp!r}")
+
+def strip_height(width: int, memory_limit: int) -> int:
+    '''Return the number of rows of a strip, a multiple of four so that strips hold whole cells.
+
+    :param width: Width of the image.
+    :type width: int
+    :param memory_limit: Approximate number of bytes a strip may take while it is converted.
+    :type memory_limit: int
+    :return: Number of rows, at least 4.
+    :rtype: int
+    '''
+    rows = memory_limit // max(1, width * BYTES_PER_PIXEL)
+    return max(4, rows - rows % 4)
+
+def raw_tiles(image: Image.Image) -> List[RawTile] | None:
+    '''Return where the rows of an image that has not been loaded are stored in its file.
+
+    :param image: Opened image.
+    :type image: Image.Image
+    :return: Tiles of full rows from top to bottom, or None if the pixels cannot be read that way.
+    :rtype: List[RawTile] | None
+    '''
+    width, height = image.size
+    if getattr(image, "fp", None) is None or not image.tile:
+        return None
+    tiles = []
+    for tile in sorted(image.tile, key=lambda tile: tile[1][1]):
+        codec_name, extents, offset, args = tile[0], tile[1], tile[2], tile[3]
+        if codec_name != "raw" or extents[0] != 0 or extents[2] != width:
+            return None
+        if isinstance(args, str):
+            args = (args, 0, 1)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        if rawmode not in RAWMODE_BITS or orientation not in (1, -1):
+            return None
+        if stride == 0:
+            stride = (width * RAWMODE_BITS[rawmode] + 7) // 8
+        tiles.append(RawTile(extents[1], extents[3], offset, rawmode, stride, orientation))
+    if tiles[0].top != 0 or tiles[-1].bottom != height or any(a.bottom != b.top for a, b in zip(tiles, tiles[1:])):
+        return None
+    return tiles
+
+def _read_rows(image: Image.Image, tile: RawTile, top: int, bottom: int) -> Image.Image:
+    # Rows stored bottom-up are read from the end of the tile.
+    if tile.orientation == 1:
+        offset = tile.offset + (top - tile.top) * tile.stride
+    else:
+        offset = tile.offset + (tile.bottom - bottom) * tile.stride
+    image.fp.seek(offset)
+    data = image.fp.read((bottom - top) * tile.stride)
+    if len(data) < (bottom - top) * tile.stride:
+        raise OSError("image file is truncated.")
+    return Image.frombytes(image.mode, (image.size[0], bottom - top), data, "raw", tile.rawmode, tile.stride, tile.orientation)
+
+def iter_strips(image: Image.Image, rows: int) -> Iterator[Image.Image]:
+    '''Read an image in horizontal strips.
+
+    :param image: Opened image, not yet loaded if its strips are to be read from the file.
+    :type image: Image.Image
+    :param rows: Number of rows of every strip but the last.
+    :type rows: int
+    :return: Iterator of strips, from top to bottom, in the mode of the image.
+    :rtype: Iterator[Image.Image]
+    '''
+    width, height = image.size
+    tiles = raw_tiles(image)
+    if tiles is None:
+        image.load()
+        for top in range(0, height, rows):
+            yield image.crop((0, top, width, min(top + rows, height)))
+        return
+
+    for top in range(0, height, rows):
+        bottom = min(top + rows, height)
+        parts = [
+            (max(top, tile.top), _read_rows(image, tile, max(top, tile.top), min(bottom, tile.bottom)))
+            for tile in tiles if tile.top < bottom and tile.bottom > top
+        ]
+        if len(parts) == 1:
+            strip = parts[0][1]
+        else:
+            strip = Image.new(image.mode, (width, bottom - top))
+            for part_top, part in parts:
+                strip.paste(part, (0, part_top - top))
+        del parts
+        if image.mode == "P" and image.palette is not None:
+            strip.putpalette(image.palette.palette, image.palette.rawmode or image.palette.mode)
+        strip.info.update(image.info)
+        yield strip
+
+def iter_colored_lines(image: Image.Image, method: Callable, formatter: ColoredTextFormatter, *, tolerance: float = 0.5, invert: bool = False, memory_limit: int = DEFAULT_MEMORY_LIMIT, reduction: CellReduction = DEFAULT_REDUCTION) -> Iterator[str]:
+    '''Convert an image in horizontal strips, yielding one formatted line at a time.
+    Gives the same lines as converting the whole image at once.
+
+    :param image: Opened image, as returned by open_image, not yet loaded.
+    :type image: Image.Image
+    :param method: Threshold method, as found in THRESHOLD_METHODS.
+    :type method: Callable
+    :param formatter: Formatter, as found in COLOR_METHODS.
+    :type formatter: ColoredTextFormatter
+    :param tolerance: Tolerance for the method.
+    :type tolerance: float
+    :param invert: Invert the method.
+    :type invert: bool
+    :param memory_limit: Approximate number of bytes the conversion may take. Default is DEFAULT_MEMORY_LIMIT.
+    :type memory_limit: int
+    :param reduction: Reduction choosing the color of every character, as found in\
+         REDUCTION_METHODS. Default is the mean.
+    :type reduction: CellReduction
+    :return: Iterator of formatted lines, without line separators.
+    :rtype: Iterator[str]
+    :raises ValueError: Raised if the image cannot be read in strips and decoding it in full would go over the memory limit.
+    '''
+    width, height = image.size
+    if raw_tiles(image) is None:
+        decoded_size = width * height * len(image.getbands())
+        if decoded_size > memory_limit:
+            raise ValueError(f"{image.format} images cannot be read in strips, and decoding this one takes about {decoded_size // 2**20} MB, over the memory limit of {memory_limit // 2**20} MB.")
+    # Dithering carries its state from one strip to the next.
+    threshold = compile_threshold(method, tolerance, invert).in_bands()
+    for strip in iter_strips(image, strip_height(width, memory_limit)):
+        strip = strip.convert("RGBA")
+        braille = BrailleImage.from_image_fast(strip, threshold, tolerance=tolerance, invert=invert)
+        del strip
+        yield from braille.iter_colored_lines(formatter, reduction)
+        del braille
@@ -0,0 +1,127 @@
+'''Module containing rendering of successive BrailleImages to a terminal.
+
+The delta renderer remembers how every cell of the last frame looked once formatted, and for the
+next frame only writes the cells that look different, moving the cursor to them with ANSI
+cursor positioning sequences. Cells compare by their flags and quantized color, i.e. by the text
+the formatter writes for them, so a color change that the palette cannot show is not redrawn.
+
+:author: Willow Ciesialka
+'''
+
+from __future__ import annotations
+from typing import List
+from img2txt.characters.brailleimage import DEFAULT_REDUCTION, BrailleImage
+from img2txt.methods.colors import BLANK, ColoredTextFormatter
+from img2txt.methods.reduction import CellReduction
+
+CURSOR_HOME = "\033[H"
+CLEAR_SCREEN = "\033[2J"
+HIDE_CURSOR = "\033[?25l"
+SHOW_CURSOR = "\033[?25h"
+
+# Fraction of changed cells above which the whole frame is redrawn.
+FULL_FRAME_RATIO: float = 0.5
+
+def cursor_position(row: int, column: int) -> str:
+    '''Return the sequence moving the cursor to a cell, counted from 0.'''
+    return f"\033[{row + 1};{column + 1}H"
+
+class DeltaRenderer:
+    '''Renders successive BrailleImages of the same formatter, each drawn over the last at the
+    top left of the terminal.'''
+
+    __slots__ = ("__formatter", "__full_frame_ratio", "__reduction", "__cells", "__size")
+
+    def __init__(self, formatter: ColoredTextFormatter, *, full_frame_ratio: float = FULL_FRAME_RATIO, reduction: CellReduction = DEFAULT_REDUCTION):
+        '''
+        :param formatter: Formatter for display method. Must not be stateful.
+        :type formatter: ColoredTextFormatter
+        :param full_frame_ratio: Fraction of changed cells above which the whole frame is redrawn.\
+             Default is FULL_FRAME_RATIO.
+        :type full_frame_ratio: float
+        :param reduction: Reduction choosing the color of every character, as found in\
+             REDUCTION_METHODS. Default is the mean.
+        :type reduction: CellReduction
+        :raises ValueError: Raised if the formatter is stateful.
+        '''
+        if formatter.stateful:
+            raise ValueError(f"{formatter.__class__.__name__} is stateful, so lines cannot be redrawn in part.")
+        if full_frame_ratio < 0 or full_frame_ratio > 1:
+            raise ValueError("full_frame_ratio must be between [0.0, 1.0].")
+        self.__formatter = formatter
+        self.__full_frame_ratio = full_frame_ratio
+        self.__reduction = reduction
+        self.__cells: List[List[str]] | None = None
+        self.__size = None
+
+    def reset(self):
+        '''Forget the last frame, so the next one is drawn in full.'''
+        self.__cells = None
+        self.__size = None
+
+    def __cell_text(self, colored_text) -> str:
+        # The color of an empty cell is never visible.
+        if colored_text.text == BLANK:
+            return BLANK
+        return self.__formatter.format(colored_text)
+
+    def __full_frame(self, rows, clear: bool) -> str:
+        lines = (self.__formatter.format_line(row) for row in rows)
+        return (CLEAR_SCREEN if clear else "") + CURSOR_HOME + self.__formatter.line_separator.join(lines)
+
+    def render(self, braille: BrailleImage) -> str:
+        '''Return the text that turns the last frame rendered into this one.
+
+        :param braille: Next frame.
+        :type braille: BrailleImage
+        :return: Text to write to the terminal. The whole frame if it is the first, its size\
+             changed, or more than full_frame_ratio of its cells changed.
+        :rtype: str
+        '''
+        rows = list(braille.iter_colored_rows(self.__reduction))
+        cells = [[self.__cell_text(colored_text) for colored_text in row] for row in rows]
+        size = (braille.char_width, braille.char_height)
+        previous = self.__cells
+        previous_size = self.__size
+        self.__cells = cells
+        self.__size = size
+        if previous is None or previous_size != size:
+            return self.__full_frame(rows, previous is not None)
+
+        changed = 0
+        for row, previous_row in zip(cells, previous):
+            for cell, previous_cell in zip(row, previous_row):
+                if cell != previous_cell:
+                    changed += 1
+        if changed == 0:
+            return ""
+        if changed > self.__full_frame_ratio * size[0] * size[1]:
+            return self.__full_frame(rows, False)
+
+        parts = []
+        for y, (row, previous_row) in enumerate(zip(cells, previous)):
+            run_start = None
+            run_end = None
+            for x, (cell, previous_cell) in enumerate(zip(row, previous_row)):
+                if cell == previous_cell:
+                    continue
+                if run_start is not None:
+                    # Redraw the unchanged cells between two runs if that is shorter than moving the cursor.
+                    gap = sum(len(text) for text in row[run_end:x])
+                    if gap <= len(cursor_position(y, x)):
+                        run_end = x + 1
+                        continue
+                    parts.append(cursor_position(y, run_start))
+                    parts.append(self.__formatter.format_line(rows[y][run_start:run_end]))
+                run_start = x
+                run_end = x + 1
+            if run_start is not None:
+                parts.append(cursor_position(y, run_start))
+                parts.append(self.__formatter.format_line(rows[y][run_start:run_end]))
+        return "".join(parts)
+
+    def cursor_below(self) -> str:
+        '''Return the sequence moving the cursor to the start of the line below the last frame.'''
+        if self.__size is None:
+            return ""
+        return cursor_position(self.__size[1], 0)
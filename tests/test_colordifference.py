@@ -0,0 +1,62 @@
+'''Tests of the batched color difference functions against their scalar counterparts.
+
+:author: Willow Ciesialka
+'''
+
+from itertools import product
+from math import cos, radians, sin
+from random import Random
+import pytest
+from img2txt.colors import quantization
+from img2txt.colors.colordifference import ciede2000, ciede2000_matrix, find_nearest_color_neighbor, find_nearest_color_neighbors, rgb_to_lab, rgb_to_lab_many
+
+np = pytest.importorskip("numpy")
+
+TOLERANCE = 1e-9
+SEED = 2024
+
+def assert_matches_scalar(labs_1, labs_2):
+    matrix = ciede2000_matrix(labs_1, labs_2)
+    for i, lab_1 in enumerate(labs_1):
+        for j, lab_2 in enumerate(labs_2):
+            assert abs(matrix[i, j] - ciede2000(lab_1, lab_2)) <= TOLERANCE, (lab_1, lab_2)
+
+def test_rgb_to_lab_many_exact():
+    random = Random(SEED)
+    colors = [tuple(random.randrange(256) for _ in range(3)) for _ in range(2000)] + [(0, 0, 0), (255, 255, 255)]
+    labs = rgb_to_lab_many(colors)
+    for rgb, lab in zip(colors, labs):
+        assert tuple(lab.tolist()) == rgb_to_lab(rgb)
+
+def test_ciede2000_matrix_signed_zero_and_tiny_axes():
+    # a' and b' at and either side of zero, where the hue angle wraps around.
+    axis = (0.0, -0.0, 1e-9, -1e-9, 1.0, -1.0)
+    labs = [(50.0, a, b) for a, b in product(axis, repeat=2)]
+    assert_matches_scalar(labs, labs)
+
+def test_ciede2000_matrix_hue_difference_near_180():
+    labs_1 = []
+    labs_2 = []
+    for hue in range(0, 360, 15):
+        for offset in (-1e-6, 0.0, 1e-6, 0.5):
+            angle = radians(hue)
+            opposite = radians(hue + 180 + offset)
+            labs_1.append((50.0, 30 * cos(angle), 30 * sin(angle)))
+            labs_2.append((60.0, 20 * cos(opposite), 20 * sin(opposite)))
+    assert_matches_scalar(labs_1, labs_2)
+
+def test_ciede2000_matrix_random():
+    random = Random(SEED)
+    labs = [(random.uniform(0, 100), random.uniform(-128, 128), random.uniform(-128, 128)) for _ in range(200)]
+    assert_matches_scalar(labs, labs)
+
+@pytest.mark.parametrize("name", sorted(quantization.palettes()))
+def test_find_nearest_color_neighbors_agrees_with_scalar(name):
+    keys, population = quantization.palettes()[name]
+    random = Random(SEED)
+    colors = [tuple(random.randrange(256) for _ in range(3)) for _ in range(500)]
+    colors += [(value, value, value) for value in range(0, 256, 5)]
+    colors += [tuple(color) for color in population]
+    nearest = find_nearest_color_neighbors(colors, population)
+    for rgb, position in zip(colors, nearest.tolist()):
+        assert position == find_nearest_color_neighbor(rgb, population)[0], rgb
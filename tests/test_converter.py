@@ -0,0 +1,33 @@
+'''Tests of img2txt.converter.
+
+:author: Willow Ciesialka
+'''
+
+import io
+import PIL.Image as Image
+from img2txt.converter import Converter
+
+def jpeg(size=(2000, 2000)) -> Image.Image:
+    encoded = io.BytesIO()
+    Image.linear_gradient("L").resize(size).convert("RGB").save(encoded, "JPEG")
+    encoded.seek(0)
+    return Image.open(encoded)
+
+def test_convert_leaves_image_of_caller_unchanged():
+    image = jpeg()
+    Converter(limit=100).convert(image)
+    assert image.size == (2000, 2000)
+    assert image.mode == "RGB"
+
+def test_convert_image_same_as_file():
+    encoded = io.BytesIO()
+    jpeg().save(encoded, "PNG")
+    converter = Converter(limit=500, color="8bitansi")
+    assert converter.convert(Image.open(io.BytesIO(encoded.getvalue()))) == converter.convert(encoded.getvalue())
+
+def test_convert_rgba_image_within_limit_unchanged():
+    image = Image.new("RGBA", (40, 20), (255, 255, 255, 255))
+    pixels = image.tobytes()
+    Converter(limit=1000).convert(image)
+    assert image.size == (40, 20)
+    assert image.tobytes() == pixels
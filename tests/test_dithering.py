@@ -0,0 +1,46 @@
+'''Tests of the dithering threshold methods.
+
+:author: Willow Ciesialka
+'''
+
+import sys
+import PIL.Image as Image
+import pytest
+from img2txt.__main__ import main
+from img2txt.characters import arrayengine
+from img2txt.conversion import ConversionOptions, missing_dependency
+from img2txt.converter import Converter
+from img2txt.methods import THRESHOLD_METHODS
+from img2txt.methods.dithering import DitheringMethod
+from img2txt.methods.threshold import compile_threshold
+
+DITHERING = [name for name, method in THRESHOLD_METHODS.items() if isinstance(method, DitheringMethod)]
+
+@pytest.fixture
+def without_numpy(monkeypatch):
+    monkeypatch.setattr(arrayengine, "NUMPY_AVAILABLE", False)
+
+@pytest.mark.parametrize("name", DITHERING)
+def test_command_line_refuses_dithering_without_numpy(name, without_numpy, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "image.png"
+    Image.new("RGB", (8, 8)).save(path)
+    monkeypatch.setattr(sys, "argv", ["img2txt", "--method", name, str(path)])
+    with pytest.raises(SystemExit) as exit:
+        main()
+    assert exit.value.code == 2
+    assert "needs NumPy" in capsys.readouterr().err
+
+def test_converter_refuses_dithering_without_numpy(without_numpy):
+    with pytest.raises(ValueError, match="needs NumPy"):
+        Converter(method="bayer4")
+    assert missing_dependency(ConversionOptions(method="luminance")) is None
+
+@pytest.mark.skipif(not arrayengine.NUMPY_AVAILABLE, reason="needs NumPy")
+@pytest.mark.parametrize("name", DITHERING)
+def test_dithering_in_bands_same_as_whole(name):
+    import numpy as np
+    rgb = np.asarray(Image.linear_gradient("L").resize((37, 29)).convert("RGB"))
+    threshold = compile_threshold(THRESHOLD_METHODS[name], 0.4, False)
+    bands = threshold.in_bands()
+    banded = np.concatenate([bands.mask(rgb[top:top + 8]) for top in range(0, len(rgb), 8)])
+    assert (banded == threshold.mask(rgb)).all()
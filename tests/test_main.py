@@ -0,0 +1,42 @@
+'''Tests of the command line.
+
+:author: Willow Ciesialka
+'''
+
+import json
+import sys
+import PIL.Image as Image
+import pytest
+from img2txt.__main__ import main
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "image.png"
+    Image.linear_gradient("L").resize((32, 16)).save(path)
+    return path
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["img2txt", *map(str, args)])
+    main()
+
+def test_profile_before_image(image, tmp_path, monkeypatch):
+    output = tmp_path / "out.txt"
+    report = tmp_path / "profile.json"
+    run(monkeypatch, "--profile", report, image, "-o", output)
+    assert "stages" in json.loads(report.read_text())
+    assert output.read_text()
+
+def test_profile_to_standard_error(image, tmp_path, monkeypatch, capsys):
+    run(monkeypatch, "--profile", "-", image, "-o", tmp_path / "out.txt")
+    assert "stages" in json.loads(capsys.readouterr().err)
+
+def test_cache_before_image(image, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "home"))
+    run(monkeypatch, "--cache", image, "-o", tmp_path / "miss.txt")
+    run(monkeypatch, "--cache", image, "-o", tmp_path / "hit.txt")
+    assert (tmp_path / "hit.txt").read_text() == (tmp_path / "miss.txt").read_text()
+    assert len(list((tmp_path / "home" / "img2txt").glob("*/*.txt"))) == 1
+
+def test_cache_dir(image, tmp_path, monkeypatch):
+    run(monkeypatch, "--cache-dir", tmp_path / "cache", image, "-o", tmp_path / "out.txt")
+    assert len(list((tmp_path / "cache").glob("*/*.txt"))) == 1
@@ -0,0 +1,64 @@
+'''Tests of img2txt.resultcache.
+
+:author: Willow Ciesialka
+'''
+
+import os
+from img2txt.conversion import ConversionOptions
+from img2txt.resultcache import LOW_WATER, CachedResult, ResultCache, result_key
+
+def key(index: int) -> str:
+    return result_key(f"{index:064x}", ConversionOptions())
+
+def test_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.get(key(0)) is None
+    cache.put(key(0), CachedResult("⠀⣿\n", 0.25))
+    assert cache.get(key(0)) == CachedResult("⠀⣿\n", 0.25)
+
+def test_key_depends_on_every_option():
+    keys = {result_key("0" * 64, ConversionOptions()), result_key("1" * 64, ConversionOptions())}
+    for field, value in zip(ConversionOptions._fields, ("lightness", 0.25, True, "8bitansi", True, 100, "nearest", "median")):
+        keys.add(result_key("0" * 64, ConversionOptions()._replace(**{field: value})))
+    assert len(keys) == 2 + len(ConversionOptions._fields)
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), 10_000)
+    for index in range(9):
+        cache.put(key(index), CachedResult("x" * 999, 0.5))
+        os.utime(cache.entries()[-1].path, (index, index))
+    # Reading the oldest entry makes it the most recently used.
+    assert cache.get(key(0)) is not None
+    cache.put(key(9), CachedResult("x" * 2000, 0.5))
+    stats = cache.stats()
+    assert stats["bytes"] <= 10_000 * LOW_WATER
+    assert cache.get(key(0)) is not None
+    assert cache.get(key(1)) is None
+
+def test_writes_within_size_do_not_list_entries(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), 1_000_000)
+    cache.put(key(0), CachedResult("x", 0.5))
+    listed = []
+    monkeypatch.setattr(ResultCache, "entries", lambda self: listed.append(1) or [])
+    for index in range(1, 50):
+        cache.put(key(index), CachedResult("x" * 100, 0.5))
+    assert not listed
+
+def test_purge(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for index in range(5):
+        cache.put(key(index), CachedResult("x", 0.5))
+    assert cache.purge()[0] == 5
+    assert cache.stats()["entries"] == 0
+    cache.put(key(0), CachedResult("x", 0.5))
+    assert cache.stats()["entries"] == 1
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for index, data in enumerate((b"", b"{\"toler", b"[]\nx", b"{}\nx", b"{\"tolerance\": 0.5}\n\xff\xfe")):
+        cache.put(key(index), CachedResult("x", 0.5))
+        path = cache.entries()[-1].path
+        with open(path, "wb") as entry_file:
+            entry_file.write(data)
+        assert cache.get(key(index)) is None
+        assert not os.path.exists(path)
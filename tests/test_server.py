@@ -0,0 +1,58 @@
+'''Tests of the conversion server and client.
+
+:author: Willow Ciesialka
+'''
+
+import io
+import threading
+import PIL.Image as Image
+import pytest
+from img2txt import server
+from img2txt.conversion import ConversionOptions
+from img2txt.converter import Converter
+
+@pytest.fixture
+def address():
+    service = server.ConversionService()
+    httpd = server.make_server(service, port=0, quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[:2]
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+def request(address, data: bytes, options: ConversionOptions = ConversionOptions()):
+    connection = server.connect(host=address[0], port=address[1], timeout=10)
+    try:
+        return server.request_conversion(connection, data, options)
+    finally:
+        connection.close()
+
+def png() -> bytes:
+    encoded = io.BytesIO()
+    Image.linear_gradient("L").resize((64, 32)).save(encoded, "PNG")
+    return encoded.getvalue()
+
+def test_converts_like_converter(address):
+    data = png()
+    text, tolerance = request(address, data, ConversionOptions(tolerance="auto", color="8bitansi"))
+    converter = Converter(tolerance="auto", color="8bitansi")
+    assert tolerance == converter.tolerance(converter.image(data))
+    assert text == converter.convert(data)
+
+@pytest.mark.parametrize("data", [b"not an image", png()[:60]], ids=["garbage", "truncated"])
+def test_undecodable_image_is_bad_request(address, data):
+    with pytest.raises(server.ServerError) as error:
+        request(address, data)
+    assert error.value.status == 400
+
+def test_internal_error_is_not_sent_to_client(address, monkeypatch, capsys):
+    def fail(data, options):
+        raise RuntimeError("secret detail")
+    monkeypatch.setattr(server, "convert_bytes", fail)
+    with pytest.raises(server.ServerError) as error:
+        request(address, png())
+    assert error.value.status == 500
+    assert "secret detail" not in str(error.value)
+    assert "secret detail" in capsys.readouterr().err
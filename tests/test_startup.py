@@ -0,0 +1,14 @@
+'''Regression test of the startup time of the command line, see benchmarks.startup.
+
+:author: Willow Ciesialka
+'''
+
+from benchmarks.startup import DEFAULT_BUDGET_MS, DEFERRED_MODULES, check_startup
+
+def test_startup_within_budget():
+    result = check_startup(repeat=3)
+    assert result.best_ms <= DEFAULT_BUDGET_MS, f"importing img2txt.__main__ took {result.best_ms:.2f} ms, over {DEFAULT_BUDGET_MS} ms"
+
+def test_startup_defers_modules():
+    result = check_startup(repeat=1)
+    assert not result.imported_deferred, f"img2txt.__main__ imports {', '.join(result.imported_deferred)}, which should be deferred; expected none of {', '.join(DEFERRED_MODULES)}"
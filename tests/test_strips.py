@@ -0,0 +1,41 @@
+'''Tests of img2txt.strips.
+
+:author: Willow Ciesialka
+'''
+
+import io
+import PIL.Image as Image
+import pytest
+from img2txt import strips
+from img2txt.characters.brailleimage import BrailleImage
+from img2txt.methods import COLOR_METHODS, THRESHOLD_METHODS
+
+def ppm(size=(64, 48)) -> bytes:
+    encoded = io.BytesIO()
+    Image.linear_gradient("L").resize(size).convert("RGB").save(encoded, "PPM")
+    return encoded.getvalue()
+
+def test_open_image_past_pixel_limit_leaves_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+    data = ppm()
+    with pytest.raises(Image.DecompressionBombError):
+        Image.open(io.BytesIO(data))
+    path = tmp_path / "image.ppm"
+    path.write_bytes(data)
+    for source in (io.BytesIO(data), str(path), path):
+        image = strips.open_image(source)
+        assert image.size == (64, 48)
+        image.close()
+    assert Image.MAX_IMAGE_PIXELS == 100
+
+def test_open_image_unidentified():
+    with pytest.raises(Image.UnidentifiedImageError):
+        strips.open_image(io.BytesIO(b"not an image"))
+
+def test_strips_same_as_whole():
+    data = ppm((61, 250))
+    formatter = COLOR_METHODS["8bitansi"]()
+    method = THRESHOLD_METHODS["luminance"]
+    whole = list(BrailleImage.from_image_fast(Image.open(io.BytesIO(data)).convert("RGBA"), method).iter_colored_lines(formatter))
+    lines = list(strips.iter_colored_lines(strips.open_image(io.BytesIO(data)), method, formatter, memory_limit=61 * 32 * 8))
+    assert lines == whole
@@ -0,0 +1,38 @@
+'''Tests of the automatic tolerance.
+
+:author: Willow Ciesialka
+'''
+
+from random import Random
+import PIL.Image as Image
+from img2txt.methods.threshold import LightnessThreshold, lightness_method, luminance_method
+from img2txt.methods.tolerance import FALLBACK_TOLERANCE, auto_tolerance, lightness_histogram, otsu
+
+def test_otsu_splits_two_groups():
+    assert otsu([5, 0, 0, 5], [0.0, 0.25, 0.5, 1.0]) == 0.5
+
+def test_otsu_does_not_depend_on_order_of_bins():
+    random = Random(2024)
+    counts = [random.randrange(100) for _ in range(64)]
+    values = [random.random() for _ in range(64)]
+    order = sorted(range(64), key=lambda index: values[index])
+    assert otsu(counts, values) == otsu([counts[index] for index in order], [values[index] for index in order])
+
+def test_otsu_merges_bins_of_same_value():
+    assert otsu([3, 4, 0], [0.2, 0.2, 0.9]) == FALLBACK_TOLERANCE
+    assert otsu([3, 4, 2], [0.2, 0.2, 0.9]) == (0.2 + 0.9) / 2
+
+def test_lightness_tolerance_splits_by_value():
+    # The second darkest bins have a higher lightness than the bins above them.
+    assert LightnessThreshold.lightness(2 / 255) > LightnessThreshold.lightness(20 / 255)
+    image = Image.new("RGBA", (30, 1))
+    for x, gray in enumerate([2] * 10 + [20] * 10 + [200] * 10):
+        image.putpixel((x, 0), (gray, gray, gray, 255))
+    counts, values = lightness_histogram(image)
+    tolerance = auto_tolerance(image, lightness_method)
+    low = [value for count, value in zip(counts, values) if count and value < tolerance]
+    high = [value for count, value in zip(counts, values) if count and value > tolerance]
+    assert len(low) == 2 and len(high) == 1
+
+def test_uniform_image_falls_back():
+    assert auto_tolerance(Image.new("RGBA", (8, 8), (90, 90, 90, 255)), luminance_method) == FALLBACK_TOLERANCE